@@ -2,14 +2,77 @@ import pandas as pd
 import streamlit as st
 import streamlit.components.v1 as components
 import folium
-from folium.plugins import HeatMap
+from folium.plugins import FastMarkerCluster, HeatMap
+from folium.raster_layers import ImageOverlay
+from folium.utilities import JsCode
+from branca.colormap import LinearColormap
+from branca.element import MacroElement
+from jinja2 import Template
 from streamlit_folium import st_folium
 import plotly.express as px
 import plotly.graph_objects as go
-from io import BytesIO
-import re
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+import hashlib
+import importlib.util
+import os
 import numpy as np
 
+from pangkalan import (
+    DatasetStore,
+    FilterIndex,
+    NgramIndex,
+    SpatialIndex,
+    Tampilan,
+    bounds_sekitar,
+    fit_ols_per_grup,
+    grid_harga,
+    harga_koreksi_waktu,
+    haversine_km,
+    laporan_memori,
+    pembanding_terdekat,
+    permukaan_idw,
+    ringkas_status_koordinat,
+    siapkan_data,
+)
+from pangkalan.analisa import (
+    JALAN_OBYEK,
+    LAJUR_OBYEK,
+    LANE_OPTS,
+    OWN_OPTS,
+    ROAD_OPTS,
+    TAHUN_REF_DEFAULT,
+    ParameterKoreksi,
+    detect_kep,
+    grid_awal,
+    hitung_koreksi,
+    indikasi,
+    peruntukan_score,
+    road_total,
+    tabel_hasil,
+    tahun_referensi,
+)
+from pangkalan.ekspor import EKSPOR_BESAR, FORMAT_EKSPOR, ekspor_ke_file, ke_excel_bytes, path_ekspor
+from pangkalan.paralel import pool_ingest
+from pangkalan.parsing import KOORD_DITUKAR
+from pangkalan.store import NAMA_GABUNGAN, STORE_TIMING_KEY
+from pangkalan.tampilan import (
+    LABEL_OBYEK,
+    MAP_CSS,
+    PIN_OBYEK,
+    WARNA_PERMUKAAN,
+    format_currency,
+    get_color_by_year,
+    id_dari_tooltip,
+    label_harga,
+    label_jarak,
+    render_detail,
+    safe_get,
+    tooltip_dengan_id,
+    warna_tahun_series,
+    warnai_grid,
+)
+
 st.set_page_config(
     layout="wide",
     initial_sidebar_state="expanded",
@@ -21,144 +84,257 @@ st.markdown("""
 <style>
 .block-container { padding-top: 1rem; }
 .stMetric { background: #f8f9fa; border-radius: 8px; padding: 0.5rem; border-left: 4px solid #667eea; }
-.legend-box { position:fixed; bottom:30px; left:30px; z-index:1000; background:white;
-              padding:10px 14px; border-radius:8px; border:2px solid #ccc;
-              font-size:12px; font-family:sans-serif; box-shadow: 2px 2px 6px rgba(0,0,0,0.2); }
 </style>
 """, unsafe_allow_html=True)
 
-YEAR_COLORS = {
-    "gte_2025": "green",
-    "gte_2024": "blue",
-    "gte_2023": "orange",
-    "lt_2023":  "red",
-    "subject":  "purple",
+def detect_outliers_iqr(series):
+    q1, q3 = series.quantile(0.25), series.quantile(0.75)
+    iqr = q3 - q1
+    return (series < (q1 - 1.5 * iqr)) | (series > (q3 + 1.5 * iqr))
+
+# ─── Peta skala besar ────────────────────────────────────────────────────────
+# Di atas ambang jumlah titik, pembanding digambar sebagai titik ringan (canvas
+# GeoJSON / FastMarkerCluster) tanpa popup; detail dimuat di panel kanan saat diklik.
+PETA_RINGAN_MIN = 500
+PETA_LABEL_ZOOM = 15
+PETA_LABEL_MAX  = 300          # batas label harga yang digambar per tampilan
+
+# Permukaan harga IDW dihitung di thread latar; rerun menunggu sebentar saja
+PERMUKAAN_RADIUS_KM = 3.0
+PERMUKAAN_TUNGGU_S  = 2.0
+PERMUKAAN_PANTAU_S  = 1.0      # interval cek future yang belum selesai (fragment)
+
+WARNA_HEX = {"green": "#27ae60", "blue": "#2980b9", "orange": "#e67e22", "red": "#c0392b", "gray": "#7f8c8d"}
+
+class LabelZoom(MacroElement):
+    """Label harga yang hanya digambar pada zoom ≥ min_zoom dan di dalam area tampilan."""
+    _template = Template("""
+    {% macro script(this, kwargs) %}
+    (function () {
+        var map = {{ this._parent.get_name() }};
+        var data = {{ this.data|tojson }};
+        var layer = L.layerGroup();
+        function render() {
+            layer.clearLayers();
+            if (map.getZoom() < {{ this.min_zoom }}) { map.removeLayer(layer); return; }
+            var b = map.getBounds().pad(0.1), n = 0;
+            for (var i = 0; i < data.length && n < {{ this.max_labels }}; i++) {
+                if (!b.contains([data[i][0], data[i][1]])) continue;
+                L.marker([data[i][0], data[i][1]], {
+                    interactive: false,
+                    icon: L.divIcon({className: "", html: data[i][2], iconSize: null, iconAnchor: [0, 0]})
+                }).addTo(layer);
+                n++;
+            }
+            layer.addTo(map);
+        }
+        map.on("zoomend moveend", render);
+        render();
+    })();
+    {% endmacro %}
+    """)
+
+    def __init__(self, data, min_zoom=PETA_LABEL_ZOOM, max_labels=PETA_LABEL_MAX):
+        super().__init__()
+        self._name = "LabelZoom"
+        self.data = data
+        self.min_zoom = int(min_zoom)
+        self.max_labels = int(max_labels)
+
+# Titik kecil untuk FastMarkerCluster: row = [lat, lon, warna, tooltip]
+CLUSTER_CALLBACK = """
+function (row) {
+    var icon = L.divIcon({className: "", iconSize: [12, 12], iconAnchor: [6, 6],
+        html: '<div style="width:12px;height:12px;border-radius:50%;border:2px solid white;'
+            + 'box-shadow:0 0 2px rgba(0,0,0,.6);background:' + row[2] + '"></div>'});
+    return L.marker(new L.LatLng(row[0], row[1]), {icon: icon}).bindTooltip(row[3]);
 }
+"""
+
+# ─── Pangkalan data persisten ─────────────────────────────────────────────────
+# Setiap workbook diingesti sekali (kunci = hash isi file) lalu disimpan sebagai
+# Parquet; membuka ulang dataset tidak perlu unggah & parsing xlsx lagi.
+store = DatasetStore()
+
+# Worker forkserver/spawn menyiapkan __main__ menurut __spec__ skrip ini.
+# Entri paket (`python -m pangkalan`) tidak pernah dijalankan ulang di worker,
+# jadi aplikasi tidak ikut dieksekusi di sana — lihat pangkalan/pekerja.py.
+__spec__ = importlib.util.find_spec("pangkalan.__main__")
+
+@st.cache_resource(show_spinner=False)
+def pool_proses():
+    """Pool proses (forkserver/spawn) untuk parsing xlsx paralel; None di mesin 1 core → berurutan."""
+    return pool_ingest() if (os.cpu_count() or 1) > 1 else None
 
-def generate_streetview_url(lat, lon):
-    return f"https://www.google.com/maps/@?api=1&map_action=pano&viewpoint={lat},{lon}&heading=0&pitch=0&fov=75"
-
-def gdrive_file_id(url):
-    """Ekstrak file ID dari berbagai format URL Google Drive."""
-    if not url or str(url).strip() in ("", "#", "nan", "None", "-"):
-        return None
-    url = str(url).strip()
-    patterns = [
-        r"drive\.google\.com/file/d/([a-zA-Z0-9_-]+)",
-        r"drive\.google\.com/open\?id=([a-zA-Z0-9_-]+)",
-        r"drive\.google\.com/uc\?(?:[^&]*&)*id=([a-zA-Z0-9_-]+)",
-        r"[?&]id=([a-zA-Z0-9_-]+)",
-    ]
-    for pat in patterns:
-        m = re.search(pat, url)
-        if m:
-            return m.group(1)
-    return None
-
-def gdrive_thumbnail(url, width=300):
+def ingest_uploads(files):
     """
-    Coba beberapa format URL thumbnail Google Drive.
-    Kembalikan daftar URL (diurutkan dari paling reliable).
+    Workbook terunggah → key dataset (hash isi). Yang belum ada di store
+    di-parse paralel per berkas, dengan progress bar di sidebar.
     """
-    fid = gdrive_file_id(url)
-    if not fid:
-        return None, None
-    # lh3 = CDN langsung, tidak perlu redirect auth (lebih andal di iframe)
-    lh3  = f"https://lh3.googleusercontent.com/d/{fid}=w{width}"
-    # thumbnail = API resmi Google Drive (backup)
-    thumb = f"https://drive.google.com/thumbnail?id={fid}&sz=w{width}"
-    return lh3, thumb
-
-def build_foto_html(foto_url):
-    """Thumbnail inline + tombol buka tab baru."""
-    has_link = bool(foto_url) and str(foto_url).strip() not in ("", "#", "nan", "None", "-")
-    if not has_link:
-        return ""
-
-    foto_url = str(foto_url).strip()
-    lh3, thumb = gdrive_thumbnail(foto_url, width=280)
-
-    if lh3:
-        # Coba lh3 dulu; jika gagal, otomatis fallback ke thumbnail API via onerror
-        return f"""
-        <div style="margin:6px 0;text-align:center">
-          <img src="{lh3}"
-               style="width:100%;max-width:280px;border-radius:6px;
-                      border:1px solid #ddd;display:block;margin:0 auto 4px"
-               referrerpolicy="no-referrer"
-               onerror="this.src='{thumb}';this.onerror=null;"
-          >
-          <a href="{foto_url}" target="_blank"
-             style="font-size:11px;color:#2980b9;text-decoration:none">
-            &#128247; Buka foto selengkapnya &#8599;
-          </a>
-        </div>"""
-
-    # Bukan URL Google Drive — tampilkan sebagai link biasa
-    return (f'<a href="{foto_url}" target="_blank" '
-            f'style="font-size:12px">&#128247; Lihat Foto</a><br>')
-
-def format_currency(value):
-    try:
-        return f"Rp {float(value):,.0f}".replace(",", ".")
-    except Exception:
-        return "N/A"
+    bar = None
 
-def bersihkan_tahun(val):
-    try:
-        return pd.to_numeric(str(val).replace(",", "").strip(), errors="coerce", downcast="integer")
-    except Exception:
-        return None
+    def progres(selesai, total):
+        nonlocal bar
+        bar = bar or st.sidebar.progress(0.0)
+        bar.progress(selesai / total, text=f"Parsing workbook… {selesai}/{total}")
 
-def get_color_by_year(year):
+    datas, names = [f.getvalue() for f in files], [f.name for f in files]
     try:
-        y = int(year)
-        if y >= 2025:
-            return YEAR_COLORS["gte_2025"]
-        if y >= 2024:
-            return YEAR_COLORS["gte_2024"]
-        if y >= 2023:
-            return YEAR_COLORS["gte_2023"]
-        return YEAR_COLORS["lt_2023"]
-    except Exception:
-        return "gray"
-
-def haversine_km(lat1, lon1, lat2, lon2):
-    R = 6371.0
-    phi1, phi2 = np.radians(lat1), np.radians(lat2)
-    dphi = np.radians(lat2 - lat1)
-    dlam = np.radians(lon2 - lon1)
-    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlam / 2) ** 2
-    return R * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+        keys = store.ingest_banyak(datas, names, progres=progres, pool=pool_proses())
+    except BrokenProcessPool:
+        # Worker mati → pool cache tidak bisa dipakai lagi; buang dan parsing berurutan
+        pool_proses.clear()
+        keys = store.ingest_banyak(datas, names, progres=progres, workers=1)
+    if bar is not None:
+        bar.empty()
+    return tuple(keys)
+
+@st.cache_data(show_spinner="Menggabungkan ke pangkalan data...")
+def gabung_upload(keys):
+    """Workbook terunggah → pangkalan gabungan (hanya rekaman baru/berubah yang ditambahkan)."""
+    return store.gabung(keys)
+
+# Dataset dipakai bersama oleh semua sesi: cache_resource menyajikan satu
+# instance per hash dataset (cache_data mengembalikan salinan tiap panggilan).
+# Jangan diubah in-place — tampilan per sesi lewat Tampilan (posisi baris).
+@st.cache_resource(show_spinner="Membuka dataset...")
+def load_dataset(key):
+    return store.load(key)
+
+@st.cache_resource(show_spinner=False)
+def prepare_dataset(key):
+    """Tahun_Bersih + koreksi BTB — dihitung sekali per dataset, bukan tiap rerun UI."""
+    return siapkan_data(load_dataset(key))
+
+@st.cache_data(show_spinner="Mengukur memori...")
+def memori_dataset(key):
+    """Memori per kolom sebelum/sesudah tahap skema (ringkas_tipe)."""
+    return laporan_memori(siapkan_data(load_dataset(key), ringkas=False)[0], prepare_dataset(key)[0])
+
+@st.cache_resource(show_spinner=False)
+def filter_index(key):
+    """Indeks filter sidebar (read-only) — dibangun sekali per dataset."""
+    return FilterIndex.build(prepare_dataset(key)[0])
+
+@st.cache_resource(show_spinner=False)
+def spatial_index(key):
+    """KD-tree koordinat seluruh data pembanding — dibangun sekali per dataset."""
+    _df = prepare_dataset(key)[0]
+    return SpatialIndex.from_frame(_df, mask=~filter_index(key).is_obyek)
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def detail_html(key, row_id):
+    """Panel detail dirender saat diklik saja; LRU per (dataset, baris)."""
+    return render_detail(prepare_dataset(key)[0].loc[row_id], load_dataset(key).bangunan)
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def tren_harga_luas(key, posisi):
+    """Garis OLS Harga vs Luas per tahun — di-cache per himpunan baris terfilter, bukan per rerun."""
+    _df = prepare_dataset(key)[0].iloc[posisi]
+    return fit_ols_per_grup(_df["Luas_Tanah"], _df["Harga_Tanah"], _df["Tahun_Bersih"].astype(str))
+
+# Unduhan dibuat saat tombol diklik (data=callable), lalu di-cache
+def ekspor_tabel(key, posisi, kolom, fmt):
+    """
+    File Tabel Data per (dataset, baris terfilter, kolom, format): ditulis
+    bertahap ke file di disk sekali, klik berikutnya memakai file yang sama.
+    """
+    path = path_ekspor((key, hashlib.sha1(posisi.tobytes()).hexdigest(), kolom), fmt)
+    if os.path.exists(path):
+        os.utime(path)
+    else:
+        ekspor_ke_file(prepare_dataset(key)[0].iloc[posisi][list(kolom)], fmt, path)
+    with open(path, "rb") as f:
+        return f.read()
 
-def detect_outliers_iqr(series):
-    q1, q3 = series.quantile(0.25), series.quantile(0.75)
-    iqr = q3 - q1
-    return (series < (q1 - 1.5 * iqr)) | (series > (q3 + 1.5 * iqr))
+@st.cache_data(max_entries=8, show_spinner=False)
+def ekspor_excel(tbl):
+    return ke_excel_bytes(tbl)
 
-def to_excel_bytes(df):
-    buf = BytesIO()
-    with pd.ExcelWriter(buf, engine="openpyxl") as writer:
-        df.to_excel(writer, index=False, sheet_name="Data Tanah")
-    return buf.getvalue()
+@st.cache_resource(show_spinner=False)
+def pelaksana_latar():
+    """Thread latar untuk komputasi peta yang berat (permukaan harga)."""
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="pangkalan-latar")
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def permukaan_tugas(key, posisi, bounds, ref_year, pct_waktu, jangkau_km):
+    """
+    Future permukaan harga IDW per keadaan filter (dataset, posisi baris
+    pembanding, area, koreksi waktu) — dikirim ke thread latar sekali,
+    rerun berikutnya memakai future yang sama.
+    """
+    _df = prepare_dataset(key)[0].iloc[posisi]
+    harga = harga_koreksi_waktu(_df["Harga_Tanah"], _df["Tahun_Bersih"], ref_year, pct_waktu)
+    return pelaksana_latar().submit(
+        permukaan_idw,
+        pd.to_numeric(_df["Latitude"], errors="coerce").to_numpy(dtype="float64"),
+        pd.to_numeric(_df["Longitude"], errors="coerce").to_numpy(dtype="float64"),
+        harga.to_numpy(dtype="float64"), bounds, maks_km=jangkau_km,
+    )
 
-def safe_get(row, col, default="-"):
-    val = getattr(row, col, default)
-    return default if pd.isna(val) else val
+@st.fragment(run_every=PERMUKAAN_PANTAU_S)
+def pantau_permukaan(fut):
+    """Cek future permukaan harga tiap interval; begitu selesai, rerun app agar peta memuatnya."""
+    if fut.done():
+        st.rerun()
+    st.caption("⏳ Permukaan harga sedang dihitung — peta dimuat ulang otomatis setelah selesai")
+
+@st.cache_resource(show_spinner="Menyiapkan indeks pencarian...")
+def search_index(key, col):
+    """Indeks trigram kolom teks tambahan — dibangun saat pertama dipakai."""
+    _df = prepare_dataset(key)[0]
+    return NgramIndex(_df[col] if col in _df.columns else pd.Series(np.nan, index=_df.index, dtype=object))
 
 # ─── Sidebar ─────────────────────────────────────────────────────────────────
 st.sidebar.markdown("## 🏡 Pangkalan Data Tanah\n**KJPP Suwendho Rinaldy dan Rekan**")
 st.sidebar.divider()
 st.sidebar.header("🔧 Filter Data")
-file = st.sidebar.file_uploader("📂 Unggah file Excel data tanah", type=["xlsx"])
+files = st.sidebar.file_uploader("📂 Unggah file Excel data tanah", type=["xlsx"], accept_multiple_files=True)
+# Beberapa workbook sekaligus selalu digabung; satu workbook bisa dibuka sendiri atau ditambahkan
+gabung_mode = bool(files) and (len(files) > 1 or st.sidebar.checkbox(
+    f"➕ Tambahkan ke {NAMA_GABUNGAN}", key="gabung_pangkalan",
+    help="Rekaman pembanding dideduplikasi (Nomor + koordinat + Kode_Inspeksi + harga); "
+         "hanya rekaman baru/berubah yang ditambahkan",
+))
+
+saved_key = None
+if not files:
+    _saved = {m["key"]: m for m in store.list()}
+    if _saved:
+        saved_key = st.sidebar.selectbox(
+            "📚 Atau buka dataset tersimpan:",
+            [None] + list(_saved),
+            format_func=lambda k: "— pilih dataset —" if k is None else (
+                f"{_saved[k].get('name') or k[:10]} · {_saved[k].get('n_rows', 0):,} baris"
+                f" · {_saved[k].get('ingested_at', '')[:10]}"
+            ),
+        )
+
+dataset_key = saved_key
+if files:
+    _keys = ingest_uploads(files)
+    dataset_key = _keys[0]
+    if gabung_mode:
+        dataset_key, _ringkas = gabung_upload(_keys)
+        if not store.has(dataset_key):
+            # Pangkalan gabungan sudah ditambah sesi lain sejak hasil ini di-cache
+            gabung_upload.clear(_keys)
+            dataset_key, _ringkas = gabung_upload(_keys)
+        if _ringkas["workbook"]:
+            st.sidebar.success(
+                f"➕ {_ringkas['workbook']} workbook digabung: {_ringkas['baru']:,} rekaman baru, "
+                f"{_ringkas['berubah']:,} diperbarui, {_ringkas['duplikat']:,} duplikat dilewati"
+            )
+        else:
+            st.sidebar.info("ℹ️ Workbook ini sudah ada di pangkalan gabungan")
 
-if file and "last_file" in st.session_state and file != st.session_state["last_file"]:
+if dataset_key and "last_dataset" in st.session_state and dataset_key != st.session_state["last_dataset"]:
     st.session_state["tampilkan"] = False
     for _k in [k for k in st.session_state if k.startswith("adj_df_")]:
         del st.session_state[_k]
-st.session_state["last_file"] = file
+st.session_state["last_dataset"] = dataset_key
 
-if not file:
+if not dataset_key:
     st.markdown("""
     ## 🏡 Pangkalan Data Penilaian Tanah
     ### KJPP Suwendho Rinaldy dan Rekan
@@ -172,352 +348,14 @@ if not file:
     | 📋 Tabel Data | Filter lanjutan, deteksi outlier, ekspor Excel |
     | 🔄 Analisa Perbandingan | Koreksi waktu & luas, hitung CV, indikasi nilai |
 
-    **Mulai dengan mengunggah file Excel data tanah di sidebar kiri.**
+    **Mulai dengan mengunggah file Excel data tanah di sidebar kiri,
+    atau buka dataset yang pernah diunggah.**
     """)
     st.stop()
 
-# ─── Helpers untuk loading sheet bertranspose ────────────────────────────────
-
-def parse_indo_number(val):
-    """Konversi angka format Indonesia '1.234.567,89' → float 1234567.89"""
-    try:
-        s = str(val).strip().replace(" ", "").replace("%", "")
-        if not s or s in ("nan", "-", ""):
-            return None
-        if "," in s:
-            # Anggap koma = desimal, titik = ribuan
-            s = s.replace(".", "").replace(",", ".")
-        else:
-            # Titik saja: cek apakah itu ribuan (grup 3 angka setelah titik)
-            parts = s.split(".")
-            if len(parts) > 1 and all(len(p) == 3 for p in parts[1:]):
-                s = s.replace(".", "")
-        return float(s)
-    except Exception:
-        return None
-
-def parse_koordinat(val):
-    """Parse '0.640530, 122.907528' → (lat, lon)"""
-    try:
-        s = str(val).strip()
-        parts = s.split(",")
-        return float(parts[0].strip()), float(parts[1].strip())
-    except Exception:
-        return None, None
-
-def _transpose_sheet(file, sheet_name):
-    """Baca sheet bertranspose (baris=field, kolom=record) → DataFrame normal."""
-    df_raw = pd.read_excel(file, sheet_name=sheet_name, header=0)
-    if df_raw.empty:
-        return pd.DataFrame()
-
-    # Kolom pertama = nama field; jadikan index setelah dibersihkan duplikatnya
-    field_col = df_raw.iloc[:, 0].astype(str).str.strip()
-
-    # Deduplikasi nama field (e.g., "Foto" ke-2 → "Foto_2")
-    seen = {}
-    unique_fields = []
-    for name in field_col:
-        if name in seen:
-            seen[name] += 1
-            unique_fields.append(f"{name}_{seen[name]}")
-        else:
-            seen[name] = 0
-            unique_fields.append(name)
-
-    df_raw = df_raw.iloc[:, 1:]          # Buang kolom field-name
-    df_raw.index = unique_fields         # Pasang sebagai index unik
-    df = df_raw.T.reset_index(drop=True) # Transpose: record = baris
-    df.columns = [str(c).strip() for c in df.columns]
-    return df
-
-RENAME_PEMBANDING = {
-    "Nomor Data":                       "Nomor",
-    "Harga":                            "Harga_Total",
-    "Jenis Data":                       "Jenis_Data",
-    "Tanggal Perolehan Data":           "Tanggal_Data",
-    "Penjual":                          "Kontak",
-    "Sumber Data":                      "Sumber_Data",
-    "Nomor Telepon Pembanding":         "Telp",
-    "Nomor Telepon untuk Konfirmasi":   "Telp_Konfirmasi",
-    "Jenis Properti":                   "Jenis_Properti",
-    "Alamat":                           "Alamat",
-    "Kompleks/Dusun":                   "Kompleks",
-    "Desa/Kelurahan":                   "Kelurahan",
-    "Kecamatan":                        "Kecamatan",
-    "Kabupaten/Kota":                   "Kota",
-    "Propinsi":                         "Propinsi",
-    "Koordinat":                        "_Koordinat",
-    "Luas Tanah":                       "Luas_Tanah",
-    "Luas Bangunan":                    "Luas_Bangunan",
-    "Kondisi Bangunan":                 "Kondisi_Bangunan",
-    "Kelas Bangunan":                   "Kelas_Bangunan",
-    "Peruntukan Tata Kota":             "Peruntukan",
-    "Bentuk kepemilikan":               "Kepemilikan",
-    "Penggunaan Tanah":                 "Penggunaan",
-    "Foto Depan Data":                  "Foto",
-    "Foto Jalan":                       "Foto_Jalan",
-    "Nama Surveyor":                    "Surveyor",
-    "Kode Inspeksi":                    "Kode_Inspeksi",
-    "Catatan":                          "Catatan",
-    "Timestamp":                        "Timestamp",
-}
-
-RENAME_PROPERTI = {
-    "Timestamp":                        "Timestamp",
-    "Kode Inspeksi":                    "Kode_Inspeksi",
-    "Nama Surveyor":                    "Surveyor",
-    "Tanggal Inspeksi":                 "Tanggal_Inspeksi",
-    "Pemberi Tugas":                    "Pemberi_Tugas",
-    "Pemilik Properti":                 "Pemilik",
-    "Jenis Properti":                   "Jenis_Properti",
-    "Alamat":                           "Alamat",
-    "Kompleks/Dusun":                   "Kompleks",
-    "Desa/Kelurahan":                   "Kelurahan",
-    "Kecamatan":                        "Kecamatan",
-    "Kabupaten/Kota":                   "Kota",
-    "Propinsi":                         "Propinsi",
-    "Latitude":                         "Latitude",
-    "Longitude":                        "Longitude",
-    "Koordinat":                        "_Koordinat",
-    "Luas Tanah":                       "Luas_Tanah",
-    "Luas Bangunan":                    "Luas_Bangunan",
-    "Peruntukan Tata Kota":             "Peruntukan",
-    "Bentuk kepemilikan":               "Kepemilikan",
-    "Penggunaan Tanah":                 "Penggunaan",
-    "Foto Depan Properti":              "Foto",
-    "Foto Bagian Dalam":                "Foto_Dalam",
-    "Foto Jalan dari Samping Kanan":    "Foto_Samping_Kanan",
-    "Foto Jalan dari Samping Kiri":     "Foto_Samping_Kiri",
-    "Gambar Situasi dan Plot ATR BPN":  "Gambar_Situasi",
-    "Reviewer":                         "Reviewer",
-}
-
-RENAME_BANGUNAN = {
-    "Kode Inspeksi":    "Kode_Inspeksi",
-    "Tanggal Inspeksi": "Tanggal_Inspeksi",
-    "Jenis Bangunan":   "Jenis_Bangunan",
-    "Luas Bangunan":    "Luas_Bangunan",
-    "Nomor Bangunan":   "Nomor_Bangunan",
-}
-
-@st.cache_data(show_spinner=False)
-def load_bangunan_sheet(uploaded_file):
-    try:
-        df = _transpose_sheet(uploaded_file, "Data Bangunan")
-    except Exception:
-        return pd.DataFrame()
-    if df.empty:
-        return pd.DataFrame()
-    df = df.rename(columns={k: v for k, v in RENAME_BANGUNAN.items() if k in df.columns})
-    if "Luas_Bangunan" in df.columns:
-        df["Luas_Bangunan"] = df["Luas_Bangunan"].apply(parse_indo_number)
-    return df
-
-@st.cache_data(show_spinner=False)
-def load_btb_sheet(uploaded_file):
-    """Baca sheet Data BTB sebagai tabel flat; return dict {Kelas_Bangunan: Biaya_BTB}."""
-    try:
-        xl = pd.ExcelFile(uploaded_file)
-        if "Data BTB" not in xl.sheet_names:
-            return pd.DataFrame()
-        df = pd.read_excel(uploaded_file, sheet_name="Data BTB")
-    except Exception:
-        return pd.DataFrame()
-    if df.empty:
-        return pd.DataFrame()
-    # Normalkan nama kolom
-    df.columns = [str(c).strip() for c in df.columns]
-    # Deteksi kolom: "Kelas Bangunan" prioritas, fallback ke "Elemen Bangunan"
-    kelas_col = next(
-        (c for c in df.columns if "kelas" in c.lower() and "bangunan" in c.lower()), None
-    ) or next(
-        (c for c in df.columns if "elemen" in c.lower()), None
-    )
-    biaya_col = next(
-        (c for c in df.columns if "pembulatan" in c.lower()), None
-    )
-    rename_btb = {}
-    if kelas_col:
-        rename_btb[kelas_col] = "Kelas_Bangunan"
-    if biaya_col:
-        rename_btb[biaya_col] = "Biaya_BTB"
-    df = df.rename(columns=rename_btb)
-    if "Biaya_BTB" in df.columns:
-        df["Biaya_BTB"] = df["Biaya_BTB"].apply(parse_indo_number)
-    return df
-
-def load_pembanding_sheet(file):
-    try:
-        df = _transpose_sheet(file, "Data Pembanding")
-    except Exception:
-        return pd.DataFrame()
-    if df.empty:
-        return pd.DataFrame()
-
-    df = df.rename(columns={k: v for k, v in RENAME_PEMBANDING.items() if k in df.columns})
-
-    # Koordinat → Latitude, Longitude
-    if "_Koordinat" in df.columns:
-        coords = df["_Koordinat"].apply(
-            lambda x: pd.Series(parse_koordinat(x), index=["Latitude", "Longitude"])
-        )
-        df["Latitude"]  = coords["Latitude"]
-        df["Longitude"] = coords["Longitude"]
-
-    # Numerik
-    for col in ["Harga_Total", "Luas_Tanah", "Luas_Bangunan", "Kondisi_Bangunan"]:
-        if col in df.columns:
-            df[col] = df[col].apply(parse_indo_number)
-
-    # Harga per m² — sementara pakai rumus sederhana; akan dikoreksi BTB setelah load
-    if "Harga_Total" in df.columns and "Luas_Tanah" in df.columns:
-        df["Harga_Tanah"] = (df["Harga_Total"] / df["Luas_Tanah"]).round(0)
-
-    # Tahun dari Tanggal_Data atau Timestamp
-    for dcol in ["Tanggal_Data", "Timestamp"]:
-        if dcol in df.columns:
-            df["Tahun"] = pd.to_datetime(
-                df[dcol].astype(str), errors="coerce", dayfirst=True
-            ).dt.year
-            break
-
-    # Pastikan Nomor ada
-    if "Nomor" not in df.columns:
-        df["Nomor"] = range(1, len(df) + 1)
-
-    df["_sumber"] = "Data Pembanding"
-    return df
-
-def load_properti_sheet(file):
-    try:
-        df = _transpose_sheet(file, "Data Properti")
-    except Exception:
-        return pd.DataFrame()
-    if df.empty:
-        return pd.DataFrame()
-
-    df = df.rename(columns={k: v for k, v in RENAME_PROPERTI.items() if k in df.columns})
-
-    # Koordinat fallback
-    if ("Latitude" not in df.columns or df["Latitude"].isna().all()) and "_Koordinat" in df.columns:
-        coords = df["_Koordinat"].apply(
-            lambda x: pd.Series(parse_koordinat(x), index=["Latitude", "Longitude"])
-        )
-        df["Latitude"]  = coords["Latitude"]
-        df["Longitude"] = coords["Longitude"]
-
-    for col in ["Latitude", "Longitude"]:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
-    for col in ["Luas_Tanah", "Luas_Bangunan"]:
-        if col in df.columns:
-            df[col] = df[col].apply(parse_indo_number)
-
-    # Tahun dari Tanggal_Inspeksi atau Timestamp
-    for dcol in ["Tanggal_Inspeksi", "Timestamp"]:
-        if dcol in df.columns:
-            df["Tahun"] = pd.to_datetime(
-                df[dcol].astype(str), errors="coerce", dayfirst=True
-            ).dt.year
-            break
-
-    df["Nomor"]      = "Obyek Penilaian"
-    df["Harga_Tanah"] = np.nan
-    df["Harga_Total"] = np.nan
-    df["_sumber"]    = "Data Properti"
-    return df
-
-@st.cache_data(show_spinner="Memuat data...")
-def load_data(uploaded_file):
-    xl = pd.ExcelFile(uploaded_file)
-    sheets = xl.sheet_names
-
-    has_pembanding = "Data Pembanding" in sheets
-    has_properti   = "Data Properti"   in sheets
-
-    if has_pembanding or has_properti:
-        frames = []
-        if has_properti:
-            dp = load_properti_sheet(uploaded_file)
-            if not dp.empty:
-                frames.append(dp)
-        if has_pembanding:
-            db = load_pembanding_sheet(uploaded_file)
-            if not db.empty:
-                frames.append(db)
-        if frames:
-            df = pd.concat(frames, ignore_index=True)
-            if "Latitude"  in df.columns:
-                df["Latitude"]  = pd.to_numeric(df["Latitude"],  errors="coerce")
-            if "Longitude" in df.columns:
-                df["Longitude"] = pd.to_numeric(df["Longitude"], errors="coerce")
-            df["_format"]   = "multi-sheet"
-            return df
-
-    # Fallback: format lama (flat sheet pertama)
-    df = pd.read_excel(uploaded_file)
-    df["Latitude"]  = pd.to_numeric(df["Latitude"],  errors="coerce")
-    df["Longitude"] = pd.to_numeric(df["Longitude"], errors="coerce")
-    df["_format"]   = "flat"
-    return df
-
-df = load_data(file)
-df_bangunan = load_bangunan_sheet(file)
-df_btb      = load_btb_sheet(file)
-df["Tahun_Bersih"] = df["Tahun"].apply(bersihkan_tahun) if "Tahun" in df.columns else pd.Series(dtype=float)
-
-# ── Koreksi Harga_Tanah dengan ekstraksi nilai bangunan (BTB) ──────────────
-# Rumus: (Harga_Total − Luas_Bangunan × (Kondisi/100) × Biaya_BTB) / Luas_Tanah
-_btb_msg = ""
-if df_btb.empty:
-    _btb_msg = "⚠️ Sheet 'Data BTB' tidak ditemukan — harga/m² pakai Harga_Total / Luas_Tanah"
-elif "Kelas_Bangunan" not in df_btb.columns:
-    _btb_msg = f"⚠️ Kolom kelas bangunan tidak dikenali di BTB (kolom: {', '.join(df_btb.columns.tolist()[:6])})"
-elif "Biaya_BTB" not in df_btb.columns:
-    _btb_msg = f"⚠️ Kolom 'Pembulatan' tidak ditemukan di BTB (kolom: {', '.join(df_btb.columns.tolist()[:6])})"
-else:
-    # Normalisasi key ke lowercase+strip agar pencocokan tidak case-sensitive
-    btb_map = (
-        df_btb
-        .dropna(subset=["Kelas_Bangunan", "Biaya_BTB"])
-        .assign(Kelas_Bangunan=lambda x: x["Kelas_Bangunan"].astype(str).str.strip().str.lower())
-        .set_index("Kelas_Bangunan")["Biaya_BTB"]
-        .to_dict()
-    )
-    has_sumber = "_sumber" in df.columns
-    mask_comp  = (df["_sumber"] == "Data Pembanding") if has_sumber else pd.Series(True, index=df.index)
-
-    if mask_comp.any() and "Kelas_Bangunan" in df.columns:
-        df_c = df[mask_comp].copy()
-        df_c["_Kelas_norm"] = df_c["Kelas_Bangunan"].astype(str).str.strip().str.lower()
-        df_c["_Biaya_BTB"]  = df_c["_Kelas_norm"].map(btb_map)
-
-        need     = ["Harga_Total", "Luas_Bangunan", "Kondisi_Bangunan", "Luas_Tanah", "_Biaya_BTB"]
-        miss_col = [c for c in need[:-1] if c not in df_c.columns]
-        if miss_col:
-            _btb_msg = f"⚠️ Kolom tidak ada di data: {', '.join(miss_col)}"
-        else:
-            has_all   = df_c[need].notna().all(axis=1) & (df_c["Luas_Tanah"] > 0)
-            n_nomatch = int((df_c["_Biaya_BTB"].isna() &
-                             df_c[["Harga_Total","Luas_Bangunan","Kondisi_Bangunan","Luas_Tanah"]].notna().all(axis=1)).sum())
-            if has_all.any():
-                sub       = df_c[has_all]
-                nilai_bgn = sub["Luas_Bangunan"] * (sub["Kondisi_Bangunan"] / 100) * sub["_Biaya_BTB"]
-                harga_baru = ((sub["Harga_Total"] - nilai_bgn) / sub["Luas_Tanah"]).round(0)
-                df.loc[harga_baru.index, "Harga_Tanah"] = harga_baru
-                _btb_msg = f"✅ BTB koreksi diterapkan pada {int(has_all.sum())} data pembanding"
-                if n_nomatch:
-                    unmatched = df_c.loc[df_c["_Biaya_BTB"].isna(), "Kelas_Bangunan"].dropna().unique().tolist()
-                    _btb_msg += f" | ⚠️ {n_nomatch} kelas tidak cocok: {unmatched}"
-            else:
-                unmatched = df_c.loc[df_c["_Biaya_BTB"].isna(), "Kelas_Bangunan"].dropna().unique().tolist()
-                btb_keys  = list(btb_map.keys())
-                _btb_msg  = (f"⚠️ BTB dimuat ({len(btb_map)} kelas) tapi tidak ada yang cocok.\n"
-                             f"Kelas di data: {unmatched[:4]}\n"
-                             f"Kelas di BTB : {btb_keys[:4]}")
-    else:
-        _btb_msg = "ℹ️ Tidak ada data pembanding atau kolom Kelas_Bangunan tidak ada"
+bundle        = load_dataset(dataset_key)
+df, _btb_msg  = prepare_dataset(dataset_key)
+df_bangunan   = bundle.bangunan
 
 # Tunjukkan format yang terdeteksi
 _fmt = df["_format"].iloc[0] if "_fmt" not in st.session_state and not df.empty and "_format" in df.columns else ""
@@ -526,6 +364,36 @@ if _fmt == "multi-sheet":
     n_pemb = int((df["_sumber"] == "Data Pembanding").sum()) if "_sumber" in df.columns else 0
     st.sidebar.success(f"✅ Format multi-sheet: {n_prop} Obyek Penilaian + {n_pemb} Data Pembanding")
 
+if "_koord_status" in df.columns:
+    _koord_ditolak = ringkas_status_koordinat(df["_koord_status"])
+    _koord_tukar   = int((df["_koord_status"] == KOORD_DITUKAR).sum())
+    if _koord_ditolak:
+        st.sidebar.warning(
+            f"⚠️ {sum(_koord_ditolak.values())} koordinat tidak dapat dipetakan: "
+            + ", ".join(f"{n} {alasan}" for alasan, n in _koord_ditolak.items())
+        )
+    if _koord_tukar:
+        st.sidebar.info(f"ℹ️ {_koord_tukar} koordinat lat/lon tertukar — diperbaiki otomatis")
+
+with st.sidebar.expander("⏱️ Waktu muat per sheet"):
+    _tm = bundle.timing_frame()
+    st.dataframe(_tm.style.format("{:.3f} s"), use_container_width=True)
+    if bundle.origin == "store" and STORE_TIMING_KEY in _tm.index:
+        _t_store = _tm.loc[STORE_TIMING_KEY, "total_s"]
+        st.caption(f"Parsing awal: {_tm['total_s'].sum() - _t_store:.2f} s (sekali saat ingesti) · "
+                   f"buka dari pangkalan data: {_t_store:.3f} s")
+    else:
+        st.caption(f"Total: {_tm['total_s'].sum():.2f} s — workbook dibuka sekali untuk semua sheet")
+
+with st.sidebar.expander("🧮 Memori dataset"):
+    if st.button("Hitung laporan memori", key="hitung_memori"):
+        _mem = memori_dataset(dataset_key)
+        _tot = _mem.loc["TOTAL"]
+        st.caption(f"{_tot['byte_awal'] / 2**20:.2f} MB → {_tot['byte'] / 2**20:.2f} MB "
+                   f"(hemat {_tot['hemat_%']:.0f}%) per salinan dataset")
+        st.dataframe(_mem.style.format({"byte_awal": "{:,.0f}", "byte": "{:,.0f}", "hemat_%": "{:.1f}"}),
+                     use_container_width=True)
+
 if _btb_msg:
     if _btb_msg.startswith("✅"):
         st.sidebar.success(_btb_msg)
@@ -535,31 +403,77 @@ if _btb_msg:
         st.sidebar.warning(_btb_msg)
 
 # ─── Filter controls ──────────────────────────────────────────────────────────
+fidx = filter_index(dataset_key)
 city_input = st.sidebar.text_input("🔍 Cari Kota/Kabupaten (sebagian nama OK):")
+cari_luas  = st.sidebar.checkbox("Cakup juga Kecamatan/Kelurahan/Alamat", value=False)
 
-available_years = sorted([int(y) for y in df["Tahun_Bersih"].dropna().unique()], reverse=True)
+# Pencarian lewat indeks trigram atas nama unik — biaya tergantung jumlah nama, bukan baris
+_text_mask = None
+if city_input.strip():
+    _hasil_kota = fidx.kota.cari(city_input)
+    if cari_luas:
+        _text_mask = fidx.kota.row_mask(_hasil_kota)
+        for _col in ("Kecamatan", "Kelurahan", "Alamat"):
+            _si = search_index(dataset_key, _col)
+            _text_mask |= _si.row_mask(_si.cari(city_input, fuzzy=False))
+    if _hasil_kota.fuzzy and _hasil_kota.names:
+        st.sidebar.caption("🔎 Tidak ada nama yang persis — memakai kota mirip: "
+                           + " · ".join(_hasil_kota.names[:5]))
+    elif not _hasil_kota.names:
+        st.sidebar.caption("🔎 Tidak ada kota yang cocok" + (" — mencari di kolom lain" if cari_luas else ""))
+    else:
+        st.sidebar.caption("🔎 Saran: " + " · ".join(fidx.kota.saran(city_input)))
+
+available_years = fidx.years()
 selected_year = st.sidebar.selectbox("📅 Pilih Tahun Data:", ["Semua Tahun"] + [str(y) for y in available_years])
 
-kec_options = ["Semua Kecamatan"] + sorted(df["Kecamatan"].dropna().astype(str).unique().tolist())
+kec_options = ["Semua Kecamatan"] + fidx.kecamatan_options()
 selected_kecamatan = st.sidebar.selectbox("🏘️ Pilih Kecamatan:", kec_options)
 
-harga_col = df["Harga_Tanah"].dropna()
-if not harga_col.empty:
-    h_min, h_max = float(harga_col.min()), float(harga_col.max())
+_h_bounds = fidx.harga_bounds()
+if _h_bounds:
+    h_min, h_max = _h_bounds
     price_range = st.sidebar.slider("💰 Rentang Harga (Rp/m²):", h_min, h_max, (h_min, h_max), format="%.0f")
 else:
     price_range = None
 
-luas_col = df["Luas_Tanah"].dropna()
-if not luas_col.empty:
-    l_min, l_max = float(luas_col.min()), float(luas_col.max())
+_l_bounds = fidx.luas_bounds()
+if _l_bounds:
+    l_min, l_max = _l_bounds
     luas_range = st.sidebar.slider("📐 Rentang Luas Tanah (m²):", l_min, l_max, (l_min, l_max), format="%.0f")
 else:
     luas_range = None
 
+_j_max = fidx.jarak_max()
+if _j_max:
+    max_jarak = st.sidebar.number_input("📏 Jarak maks. dari Obyek (km, 0 = bebas):",
+                                        value=0.0, min_value=0.0, max_value=float(np.ceil(_j_max)), step=0.5)
+else:
+    max_jarak = None
+
 st.sidebar.divider()
 st.sidebar.markdown("**Opsi Peta:**")
 show_heatmap  = st.sidebar.checkbox("🌡️ Heatmap Harga", value=False)
+heat_sel_km = (
+    st.sidebar.number_input("Ukuran sel heatmap (km, 0 = otomatis)", value=0.0, min_value=0.0, step=0.1,
+                            help="Pembanding dikelompokkan per sel; warna = median harga/m² sel")
+    if show_heatmap else 0.0
+)
+show_permukaan = st.sidebar.checkbox("🗺️ Permukaan Harga (IDW)", value=False,
+                                     help="Estimasi Rp/m² per sel grid dari pembanding terdekat, disesuaikan ke tahun referensi")
+if show_permukaan:
+    with st.sidebar.expander("⚙️ Permukaan harga", expanded=True):
+        perm_radius = st.number_input("Radius area & jangkauan pembanding (km)", value=PERMUKAAN_RADIUS_KM,
+                                      min_value=0.5, step=0.5,
+                                      help="Area di sekitar Obyek; sel tanpa pembanding dalam jarak ini dikosongkan")
+        perm_ref = st.number_input("Tahun referensi", value=(fidx.years() or [2025])[0],
+                                   min_value=2000, max_value=2100, step=1)
+        perm_pct = st.number_input("Koreksi waktu (%/tahun)", value=5.0, min_value=0.0, max_value=50.0, step=0.5)
+with st.sidebar.expander("⚙️ Mode peta skala besar"):
+    peta_ambang = st.number_input("Mode ringan di atas (titik)", value=PETA_RINGAN_MIN, min_value=20, step=50,
+                                  help="Di atas jumlah ini pembanding digambar sebagai titik ringan tanpa popup")
+    peta_cluster = st.checkbox("Kelompokkan titik (cluster)", value=True)
+    peta_label_zoom = st.slider("Label harga tampil mulai zoom", 10, 18, PETA_LABEL_ZOOM)
 
 if "tampilkan" not in st.session_state:
     st.session_state["tampilkan"] = False
@@ -571,1168 +485,768 @@ if not st.session_state["tampilkan"]:
     st.stop()
 
 # ─── Apply filters ────────────────────────────────────────────────────────────
-filtered = df.copy()
-
-# Identifikasi baris Obyek Penilaian — selalu dipertahankan di semua filter
-_is_obyek = filtered["Nomor"].astype(str).str.strip().str.lower().str.contains("obyek", na=False)
-
-if city_input.strip():
-    _city_ok = filtered["Kota"].astype(str).str.strip().str.lower().str.contains(
-        city_input.strip().lower(), na=False
-    )
-    filtered = filtered[_city_ok | _is_obyek]
-    _is_obyek = filtered["Nomor"].astype(str).str.strip().str.lower().str.contains("obyek", na=False)
-
-if selected_year != "Semua Tahun":
-    _year_ok = filtered["Tahun_Bersih"] == int(selected_year)
-    filtered = filtered[_year_ok | _is_obyek]
-    _is_obyek = filtered["Nomor"].astype(str).str.strip().str.lower().str.contains("obyek", na=False)
-
-if selected_kecamatan != "Semua Kecamatan":
-    _kec_ok = filtered["Kecamatan"].astype(str) == selected_kecamatan
-    filtered = filtered[_kec_ok | _is_obyek]
-    _is_obyek = filtered["Nomor"].astype(str).str.strip().str.lower().str.contains("obyek", na=False)
-
-if price_range:
-    # Obyek Penilaian sering tidak punya Harga_Tanah — jangan dibuang
-    _price_ok = (
-        filtered["Harga_Tanah"].isna() |
-        ((filtered["Harga_Tanah"] >= price_range[0]) &
-         (filtered["Harga_Tanah"] <= price_range[1]))
-    )
-    filtered = filtered[_price_ok | _is_obyek]
-    _is_obyek = filtered["Nomor"].astype(str).str.strip().str.lower().str.contains("obyek", na=False)
-
-if luas_range:
-    _luas_ok = (
-        filtered["Luas_Tanah"].isna() |
-        ((filtered["Luas_Tanah"] >= luas_range[0]) &
-         (filtered["Luas_Tanah"] <= luas_range[1]))
-    )
-    filtered = filtered[_luas_ok | _is_obyek]
+# Semua filter dievaluasi sekaligus dari indeks — satu mask, satu seleksi.
+# Baris Obyek Penilaian selalu dipertahankan di semua filter.
+_mask = fidx.mask(
+    city=city_input,
+    year=None if selected_year == "Semua Tahun" else selected_year,
+    kecamatan=None if selected_kecamatan == "Semua Kecamatan" else selected_kecamatan,
+    price_range=price_range,
+    luas_range=luas_range,
+    text_mask=_text_mask,
+    max_jarak=max_jarak,
+)
+filtered = Tampilan.dari_mask(df, _mask, _is_obyek=fidx.is_obyek)
 
 # Outlier flag
 valid_harga = filtered["Harga_Tanah"].dropna()
+_outlier = pd.Series(False, index=filtered.index)
 if len(valid_harga) >= 4:
-    filtered = filtered.copy()
-    filtered["_outlier"] = False
-    outlier_mask = detect_outliers_iqr(filtered.loc[filtered["Harga_Tanah"].notna(), "Harga_Tanah"])
-    filtered.loc[outlier_mask.index, "_outlier"] = outlier_mask.values
-else:
-    filtered = filtered.copy()
-    filtered["_outlier"] = False
+    _outlier[valid_harga.index] = detect_outliers_iqr(valid_harga).to_numpy()
+filtered = filtered.dengan(_outlier=_outlier)
 
 city_label = city_input.strip() or "Semua Kota"
 st.markdown(f"<p style='font-size:13px;color:#555;margin:0 0 6px'>Hasil Filter: <b>{len(filtered)} data</b> — Kota: <i>{city_label}</i> | Tahun: <i>{selected_year}</i></p>", unsafe_allow_html=True)
 
 # ─── Tabs ─────────────────────────────────────────────────────────────────────
+# Tab lazy: hanya tab yang sedang dibuka yang dijalankan (tab.open), pindah tab = rerun.
 tab_dashboard, tab_peta, tab_tabel, tab_analisa = st.tabs([
     "📊 Dashboard Analitik",
     "🗺️ Peta Lokasi",
     "📋 Tabel Data",
     "🔄 Analisa Perbandingan",
-])
+], key="tab_aktif", on_change="rerun")
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # TAB 1 — DASHBOARD
 # ═══════════════════════════════════════════════════════════════════════════════
 with tab_dashboard:
-    if filtered.empty:
-        st.warning("Tidak ada data yang sesuai dengan filter yang dipilih.")
-        st.stop()
-
-    prices = filtered["Harga_Tanah"].dropna()
-    outlier_count = int(filtered["_outlier"].sum())
-
-    # KPI row
-    k1, k2, k3, k4, k5 = st.columns(5)
-    k1.metric("📦 Total Data",       f"{len(filtered):,}")
-    k2.metric("💰 Rata-rata",         format_currency(prices.mean()) if not prices.empty else "N/A")
-    k3.metric("📉 Minimum",           format_currency(prices.min())  if not prices.empty else "N/A")
-    k4.metric("📈 Maksimum",          format_currency(prices.max())  if not prices.empty else "N/A")
-    k5.metric("📊 Median",            format_currency(prices.median()) if not prices.empty else "N/A")
-
-    if outlier_count:
-        st.warning(
-            f"⚠️ **{outlier_count} data outlier** terdeteksi (metode IQR 1.5×). "
-            "Detail tersedia di tab **Tabel Data**."
-        )
-
-    st.divider()
-    col_l, col_r = st.columns(2)
-
-    with col_l:
-        # Distribusi harga
-        if not prices.empty:
-            fig_hist = px.histogram(
-                filtered[filtered["Harga_Tanah"].notna()],
-                x="Harga_Tanah", nbins=25,
-                title="Distribusi Harga Tanah (Rp/m²)",
-                labels={"Harga_Tanah": "Harga (Rp/m²)", "count": "Jumlah"},
-                color_discrete_sequence=["#667eea"],
-            )
-            fig_hist.update_layout(showlegend=False, margin=dict(t=40, b=20))
-            st.plotly_chart(fig_hist, use_container_width=True)
-
-        # Scatter harga vs luas
-        scatter_df = filtered[filtered["Harga_Tanah"].notna() & filtered["Luas_Tanah"].notna()].copy()
-        scatter_df["Tahun_Label"] = scatter_df["Tahun_Bersih"].astype(str)
-        if not scatter_df.empty:
-            fig_scatter = px.scatter(
-                scatter_df, x="Luas_Tanah", y="Harga_Tanah",
-                color="Tahun_Label",
-                hover_data=["Nomor", "Alamat", "Kecamatan"],
-                title="Harga vs Luas Tanah",
-                labels={"Luas_Tanah": "Luas Tanah (m²)", "Harga_Tanah": "Harga (Rp/m²)", "Tahun_Label": "Tahun"},
-                trendline="ols",
-            )
-            fig_scatter.update_layout(margin=dict(t=40, b=20))
-            st.plotly_chart(fig_scatter, use_container_width=True)
-
-    with col_r:
-        # Tren harga per tahun
-        by_year = (
-            filtered.groupby("Tahun_Bersih")["Harga_Tanah"]
-            .agg(rata_rata="mean", minimum="min", maksimum="max", jumlah="count")
-            .reset_index()
-            .rename(columns={"Tahun_Bersih": "Tahun"})
-            .dropna(subset=["Tahun"])
-            .sort_values("Tahun")
-        )
-        if not by_year.empty:
-            fig_trend = go.Figure()
-            fig_trend.add_trace(go.Scatter(
-                x=by_year["Tahun"], y=by_year["rata_rata"],
-                mode="lines+markers", name="Rata-rata",
-                line=dict(color="#667eea", width=3), marker=dict(size=8),
-            ))
-            fig_trend.add_trace(go.Scatter(
-                x=by_year["Tahun"], y=by_year["maksimum"],
-                mode="lines", name="Maksimum", line=dict(color="#2ecc71", dash="dash"),
-            ))
-            fig_trend.add_trace(go.Scatter(
-                x=by_year["Tahun"], y=by_year["minimum"],
-                mode="lines", name="Minimum", line=dict(color="#e74c3c", dash="dash"),
-            ))
-            fig_trend.update_layout(
-                title="Tren Harga per Tahun",
-                xaxis_title="Tahun", yaxis_title="Harga (Rp/m²)",
-                hovermode="x unified", margin=dict(t=40, b=20),
+    if tab_dashboard.open:
+        if filtered.empty:
+            st.warning("Tidak ada data yang sesuai dengan filter yang dipilih.")
+            st.stop()
+
+        prices = filtered["Harga_Tanah"].dropna()
+        outlier_count = int(filtered["_outlier"].sum())
+
+        # KPI row
+        k1, k2, k3, k4, k5 = st.columns(5)
+        k1.metric("📦 Total Data",       f"{len(filtered):,}")
+        k2.metric("💰 Rata-rata",         format_currency(prices.mean()) if not prices.empty else "N/A")
+        k3.metric("📉 Minimum",           format_currency(prices.min())  if not prices.empty else "N/A")
+        k4.metric("📈 Maksimum",          format_currency(prices.max())  if not prices.empty else "N/A")
+        k5.metric("📊 Median",            format_currency(prices.median()) if not prices.empty else "N/A")
+
+        if outlier_count:
+            st.warning(
+                f"⚠️ **{outlier_count} data outlier** terdeteksi (metode IQR 1.5×). "
+                "Detail tersedia di tab **Tabel Data**."
             )
-            st.plotly_chart(fig_trend, use_container_width=True)
-
-        # Rata-rata harga per kecamatan
-        by_kec = (
-            filtered.groupby("Kecamatan")["Harga_Tanah"]
-            .mean()
-            .dropna()
-            .sort_values(ascending=True)
-            .reset_index()
-        )
-        if not by_kec.empty:
-            fig_kec = px.bar(
-                by_kec, x="Harga_Tanah", y="Kecamatan", orientation="h",
-                title="Rata-rata Harga per Kecamatan",
-                labels={"Harga_Tanah": "Rata-rata Harga (Rp/m²)", "Kecamatan": ""},
-                color="Harga_Tanah", color_continuous_scale="Viridis",
+
+        st.divider()
+        col_l, col_r = st.columns(2)
+
+        with col_l:
+            # Distribusi harga
+            if not prices.empty:
+                fig_hist = px.histogram(
+                    prices.to_frame(),
+                    x="Harga_Tanah", nbins=25,
+                    title="Distribusi Harga Tanah (Rp/m²)",
+                    labels={"Harga_Tanah": "Harga (Rp/m²)", "count": "Jumlah"},
+                    color_discrete_sequence=["#667eea"],
+                )
+                fig_hist.update_layout(showlegend=False, margin=dict(t=40, b=20))
+                st.plotly_chart(fig_hist, use_container_width=True)
+
+            # Scatter harga vs luas
+            _sebar     = filtered.pilih(filtered["Harga_Tanah"].notna() & filtered["Luas_Tanah"].notna())
+            scatter_df = _sebar.frame(["Luas_Tanah", "Harga_Tanah", "Tahun_Bersih", "Nomor", "Alamat", "Kecamatan"])
+            scatter_df["Tahun_Label"] = scatter_df["Tahun_Bersih"].astype(str)
+            if not scatter_df.empty:
+                fig_scatter = px.scatter(
+                    scatter_df, x="Luas_Tanah", y="Harga_Tanah",
+                    color="Tahun_Label",
+                    hover_data=["Nomor", "Alamat", "Kecamatan"],
+                    title="Harga vs Luas Tanah",
+                    labels={"Luas_Tanah": "Luas Tanah (m²)", "Harga_Tanah": "Harga (Rp/m²)", "Tahun_Label": "Tahun"},
+                )
+                # Garis tren OLS per tahun dari tahap ter-cache, warna mengikuti titik tahunnya
+                tren = tren_harga_luas(dataset_key, _sebar.posisi)
+                _fit = tren.set_index("Grup")
+                for tr in list(fig_scatter.data):
+                    if tr.name not in _fit.index:
+                        continue
+                    f = _fit.loc[tr.name]
+                    fig_scatter.add_trace(go.Scatter(
+                        x=[f.x_min, f.x_max], y=[f.Intersep + f.Kemiringan * f.x_min, f.Intersep + f.Kemiringan * f.x_max],
+                        mode="lines", line=dict(color=tr.marker.color, width=2),
+                        legendgroup=tr.legendgroup, showlegend=False,
+                        hovertemplate=(f"Tahun {tr.name}<br>Harga = {f.Intersep:,.0f} {f.Kemiringan:+,.2f} × Luas"
+                                       f"<br>R² = {f.R2:.3f} (n = {f.n})<extra></extra>"),
+                    ))
+                fig_scatter.update_layout(margin=dict(t=40, b=20))
+                st.plotly_chart(fig_scatter, use_container_width=True)
+                if not tren.empty:
+                    with st.expander("📐 Garis tren OLS: Harga = Intersep + Kemiringan × Luas"):
+                        st.dataframe(
+                            tren[["Grup", "n", "Intersep", "Kemiringan", "R2"]],
+                            hide_index=True, use_container_width=True,
+                            column_config={
+                                "Grup":       "Tahun",
+                                "Intersep":   st.column_config.NumberColumn("Intersep (Rp/m²)", format="%.0f"),
+                                "Kemiringan": st.column_config.NumberColumn("Kemiringan (Rp/m² per m²)", format="%.2f"),
+                                "R2":         st.column_config.NumberColumn("R²", format="%.3f"),
+                            },
+                        )
+
+        with col_r:
+            # Tren harga per tahun
+            by_year = (
+                filtered.frame(["Tahun_Bersih", "Harga_Tanah"]).groupby("Tahun_Bersih")["Harga_Tanah"]
+                .agg(rata_rata="mean", minimum="min", maksimum="max", jumlah="count")
+                .reset_index()
+                .rename(columns={"Tahun_Bersih": "Tahun"})
+                .dropna(subset=["Tahun"])
+                .sort_values("Tahun")
             )
-            fig_kec.update_layout(
-                showlegend=False, coloraxis_showscale=False, margin=dict(t=40, b=20)
+            if not by_year.empty:
+                fig_trend = go.Figure()
+                fig_trend.add_trace(go.Scatter(
+                    x=by_year["Tahun"], y=by_year["rata_rata"],
+                    mode="lines+markers", name="Rata-rata",
+                    line=dict(color="#667eea", width=3), marker=dict(size=8),
+                ))
+                fig_trend.add_trace(go.Scatter(
+                    x=by_year["Tahun"], y=by_year["maksimum"],
+                    mode="lines", name="Maksimum", line=dict(color="#2ecc71", dash="dash"),
+                ))
+                fig_trend.add_trace(go.Scatter(
+                    x=by_year["Tahun"], y=by_year["minimum"],
+                    mode="lines", name="Minimum", line=dict(color="#e74c3c", dash="dash"),
+                ))
+                fig_trend.update_layout(
+                    title="Tren Harga per Tahun",
+                    xaxis_title="Tahun", yaxis_title="Harga (Rp/m²)",
+                    hovermode="x unified", margin=dict(t=40, b=20),
+                )
+                st.plotly_chart(fig_trend, use_container_width=True)
+
+            # Rata-rata harga per kecamatan
+            by_kec = (
+                filtered.frame(["Kecamatan", "Harga_Tanah"]).groupby("Kecamatan")["Harga_Tanah"]
+                .mean()
+                .dropna()
+                .sort_values(ascending=True)
+                .reset_index()
             )
-            st.plotly_chart(fig_kec, use_container_width=True)
+            if not by_kec.empty:
+                fig_kec = px.bar(
+                    by_kec, x="Harga_Tanah", y="Kecamatan", orientation="h",
+                    title="Rata-rata Harga per Kecamatan",
+                    labels={"Harga_Tanah": "Rata-rata Harga (Rp/m²)", "Kecamatan": ""},
+                    color="Harga_Tanah", color_continuous_scale="Viridis",
+                )
+                fig_kec.update_layout(
+                    showlegend=False, coloraxis_showscale=False, margin=dict(t=40, b=20)
+                )
+                st.plotly_chart(fig_kec, use_container_width=True)
 
-    # Ringkasan statistik
-    st.subheader("📊 Ringkasan Statistik")
-    num_cols = [c for c in ["Harga_Tanah", "Luas_Tanah", "Luas_Bangunan"] if c in filtered.columns]
-    if num_cols:
-        stats = filtered[num_cols].describe()
-        stats.index = ["Jumlah", "Rata-rata", "Std Deviasi", "Minimum",
-                       "Kuartil-1", "Median", "Kuartil-3", "Maksimum"]
-        st.dataframe(stats.style.format("{:,.2f}"), use_container_width=True)
+        # Ringkasan statistik
+        st.subheader("📊 Ringkasan Statistik")
+        num_cols = [c for c in ["Harga_Tanah", "Luas_Tanah", "Luas_Bangunan"] if c in filtered.columns]
+        if num_cols:
+            stats = filtered.frame(num_cols).describe()
+            stats.index = ["Jumlah", "Rata-rata", "Std Deviasi", "Minimum",
+                           "Kuartil-1", "Median", "Kuartil-3", "Maksimum"]
+            st.dataframe(stats.style.format("{:,.2f}"), use_container_width=True)
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # TAB 2 — PETA
 # ═══════════════════════════════════════════════════════════════════════════════
 with tab_peta:
-    if filtered.empty:
-        st.warning("Tidak ada data untuk ditampilkan di peta.")
-    else:
-        map_df = filtered[filtered["Latitude"].notna() & filtered["Longitude"].notna()].copy()
-        map_df = map_df[
-            map_df["Latitude"].between(-90, 90) &
-            map_df["Longitude"].between(-180, 180)
-        ]
-
-        subj_mask   = map_df["Nomor"].astype(str).str.lower().str.contains("obyek", na=False)
-        subj_df     = map_df[subj_mask]
-        comp_map_df = map_df[~subj_mask]
-
-        # Pusatkan peta ke obyek penilaian jika ada, atau rata-rata semua
-        if not subj_df.empty:
-            lat0, lon0 = float(subj_df.iloc[0]["Latitude"]), float(subj_df.iloc[0]["Longitude"])
-        elif not map_df.empty:
-            lat0, lon0 = map_df["Latitude"].mean(), map_df["Longitude"].mean()
+    if tab_peta.open:
+        if filtered.empty:
+            st.warning("Tidak ada data untuk ditampilkan di peta.")
         else:
-            lat0, lon0 = -2.548926, 118.0148634
-
-        m = folium.Map(
-            location=[lat0, lon0],
-            zoom_start=14 if len(map_df) <= 20 else 12,
-            min_zoom=5, max_zoom=18,
-            prefer_canvas=True, control_scale=True,
-        )
-
-        folium.TileLayer(
-            tiles="https://{s}.basemaps.cartocdn.com/rastertiles/voyager/{z}/{x}/{y}{r}.png",
-            name="Voyager", attr="©OpenStreetMap ©CartoDB",
-        ).add_to(m)
-        folium.TileLayer(
-            tiles="https://server.arcgisonline.com/ArcGIS/rest/services/World_Imagery/MapServer/tile/{z}/{y}/{x}",
-            name="Satellite", attr="Tiles © Esri",
-        ).add_to(m)
-
-        if show_heatmap and not comp_map_df.empty:
-            heat = [
-                [r.Latitude, r.Longitude, float(r.Harga_Tanah)]
-                for r in comp_map_df.itertuples()
-                if pd.notna(getattr(r, "Harga_Tanah", None))
+            map_df = filtered.pilih(filtered["Latitude"].notna() & filtered["Longitude"].notna()).frame()
+            map_df = map_df[
+                map_df["Latitude"].between(-90, 90) &
+                map_df["Longitude"].between(-180, 180)
             ]
-            if heat:
-                HeatMap(heat, name="Heatmap Harga", radius=30, blur=20, min_opacity=0.4).add_to(m)
-
-        # ── Garis jarak dari Obyek Penilaian ke setiap Data Pembanding ──────
-        if not subj_df.empty and not comp_map_df.empty:
-            s = subj_df.iloc[0]
-            lines_fg = folium.FeatureGroup(name="📏 Garis Jarak", show=True).add_to(m)
-
-            for r in comp_map_df.itertuples():
-                nomor_r = str(safe_get(r, "Nomor")).strip()
-                dist_km = haversine_km(s.Latitude, s.Longitude, r.Latitude, r.Longitude)
-                dist_label = f"{dist_km:.2f} km" if dist_km >= 1 else f"{dist_km*1000:.0f} m"
-
-                folium.PolyLine(
-                    locations=[[s.Latitude, s.Longitude], [r.Latitude, r.Longitude]],
-                    color="#e74c3c",
-                    weight=2,
-                    dash_array="6 4",
-                    opacity=0.8,
-                    tooltip=f"Obyek → Data {nomor_r}: {dist_label}",
-                ).add_to(lines_fg)
-
-                # Label jarak di tengah garis
-                mid_lat = (s.Latitude + r.Latitude) / 2
-                mid_lon = (s.Longitude + r.Longitude) / 2
-                folium.Marker(
-                    [mid_lat, mid_lon],
-                    icon=folium.DivIcon(
-                        html=f"""
-                        <div style="font-size:10px;font-weight:bold;color:#c0392b;
-                                    background:rgba(255,255,255,0.9);padding:2px 6px;
-                                    border-radius:10px;border:1px solid #e74c3c;
-                                    white-space:nowrap;pointer-events:none;
-                                    box-shadow:1px 1px 3px rgba(0,0,0,0.2)">
-                            📏 {dist_label}
-                        </div>""",
-                        icon_size=(90, 22),
-                        icon_anchor=(45, 11),
-                    ),
-                ).add_to(lines_fg)
-
-        # ── Layer marker data pembanding — selalu individual pin ────────────
-        marker_layer = folium.FeatureGroup(name="Data Pembanding").add_to(m)
-
-        # ── Layer Obyek Penilaian — selalu terpisah, tidak masuk cluster ────
-        subj_layer = folium.FeatureGroup(name="🏠 Obyek Penilaian", show=True).add_to(m)
-
-        def _foto_mini(url, label_txt):
-            """Thumbnail kecil dengan label dan link buka tab baru."""
-            lh3, thumb = gdrive_thumbnail(url, width=130)
-            if not lh3:
-                return ""
-            return f"""
-            <div style="display:inline-block;text-align:center;margin:3px 3px 0 0;vertical-align:top">
-              <img src="{lh3}"
-                   style="width:130px;height:90px;object-fit:cover;border-radius:4px;
-                          border:1px solid #ddd"
-                   referrerpolicy="no-referrer"
-                   onerror="this.src='{thumb}';this.onerror=null;">
-              <br>
-              <a href="{url}" target="_blank"
-                 style="font-size:10px;color:#2980b9">&#8599; {label_txt}</a>
-            </div>"""
-
-        # ── CSS constants untuk popup ─────────────────────────────────────
-        SEC  = ("background:#f0faf5;color:#1a7a4a;font-size:10px;font-weight:bold;"
-                "text-transform:uppercase;letter-spacing:0.6px;padding:3px 7px;"
-                "border-radius:3px;margin:8px 0 3px 0;display:block")
-        TD_L = ("color:#777;white-space:nowrap;padding:3px 6px 3px 0;"
-                "vertical-align:top;font-size:11.5px")
-        TD_V = "padding:3px 10px 3px 0;vertical-align:top;font-size:12px"
-        TR_A = "background:#f8fafb"   # alternating row background
-
-        def build_popup(r, is_subj, tahun, harga_fmt, luas_t, luas_b, foto):
-            nomor_str = str(safe_get(r, "Nomor")).strip()
-
-            # ── row helpers ───────────────────────────────────────────────
-            def r2(l1, v1, l2, v2, stripe=False):
-                bg = f' style="background:#f8fafb"' if stripe else ""
-                return (
-                    f'<tr{bg}>'
-                    f'<td style="{TD_L}">{l1}</td>'
-                    f'<td style="{TD_V}">{v1}</td>'
-                    f'<td style="{TD_L}">{l2}</td>'
-                    f'<td style="{TD_V}">{v2}</td>'
-                    f'</tr>'
-                )
-            def r1(lbl, val, stripe=False):
-                bg = f' style="background:#f8fafb"' if stripe else ""
-                return (
-                    f'<tr{bg}>'
-                    f'<td style="{TD_L}">{lbl}</td>'
-                    f'<td colspan="3" style="{TD_V}">{val}</td>'
-                    f'</tr>'
-                )
-            def sec(icon, title):
-                return f'<tr><td colspan="4"><span style="{SEC}">{icon} {title}</span></td></tr>'
-
-            tbl_open  = '<table style="width:100%;border-collapse:collapse">'
-            tbl_close = '</table>'
-
-            if is_subj:
-                # ── Galeri foto ───────────────────────────────────────────
-                foto_pairs = [
-                    (safe_get(r, "Foto",              "#"), "Depan"),
-                    (safe_get(r, "Foto_Dalam",         "#"), "Dalam"),
-                    (safe_get(r, "Foto_Samping_Kanan", "#"), "Kanan"),
-                    (safe_get(r, "Foto_Samping_Kiri",  "#"), "Kiri"),
-                    (safe_get(r, "Gambar_Situasi",     "#"), "Situasi"),
-                ]
-                thumbs = "".join(_foto_mini(u, lb) for u, lb in foto_pairs
-                                 if u not in ("#", "-", "nan", "None", ""))
-                galeri = (
-                    f'<div style="margin:6px 0 10px;overflow-x:auto;white-space:nowrap">{thumbs}</div>'
-                    if thumbs else ""
-                )
-                sv_url = generate_streetview_url(r.Latitude, r.Longitude)
-                body = f"""
-                {galeri}
-                {tbl_open}
-                  {sec('📋','Identitas')}
-                  {r2('Pemilik', safe_get(r,'Pemilik'), 'Jenis', safe_get(r,'Jenis_Properti'))}
-                  {r2('Kode Inspeksi', safe_get(r,'Kode_Inspeksi'), 'Reviewer', safe_get(r,'Reviewer'), True)}
-                  {r1('Pemberi Tugas', safe_get(r,'Pemberi_Tugas'))}
-                  {sec('📍','Lokasi')}
-                  {r1('Alamat', safe_get(r,'Alamat'))}
-                  {r2('Kelurahan', safe_get(r,'Kelurahan'), 'Kecamatan', safe_get(r,'Kecamatan'), True)}
-                  {r2('Kota', safe_get(r,'Kota'), 'Propinsi', safe_get(r,'Propinsi'))}
-                  {sec('📐','Fisik')}
-                  {r2('Luas Tanah', f'{luas_t} m²', 'Luas Bangunan', f'{luas_b} m²')}
-                  {r2('Peruntukan', safe_get(r,'Peruntukan'), 'Kepemilikan', safe_get(r,'Kepemilikan'), True)}
-                  {r1('Penggunaan', safe_get(r,'Penggunaan'))}
-                {tbl_close}
-                <div style="margin-top:8px;font-size:11px;display:flex;gap:14px">
-                  <a href="{sv_url}" target="_blank"
-                     style="color:#2980b9;text-decoration:none">
-                    &#128269; Street View &#8599;
-                  </a>
-                </div>"""
-
-                return f"""
-                <div style="font-family:'Segoe UI',Arial,sans-serif;
-                            min-width:320px;max-width:380px">
-                  <div style="background:#fdecea;border-left:4px solid #c0392b;
-                              padding:7px 10px;margin-bottom:4px;
-                              border-radius:0 5px 5px 0">
-                    <b style="font-size:14px;color:#c0392b">🏠 Obyek Penilaian</b>
-                  </div>
-                  {body}
-                </div>"""
 
+            subj_mask   = map_df["_is_obyek"]
+            subj_df     = map_df[subj_mask]
+            comp_map_df = map_df[~subj_mask]
+            # Mode ringan untuk peta besar: titik canvas/cluster, label per zoom, detail saat diklik
+            ringan = len(map_df) > peta_ambang
+
+            # Pusatkan peta ke obyek penilaian jika ada, atau rata-rata semua
+            if not subj_df.empty:
+                lat0, lon0 = float(subj_df.iloc[0]["Latitude"]), float(subj_df.iloc[0]["Longitude"])
+            elif not map_df.empty:
+                lat0, lon0 = map_df["Latitude"].mean(), map_df["Longitude"].mean()
             else:
-                # ── Data Pembanding ───────────────────────────────────────
-                foto_jalan_url = str(safe_get(r, "Foto_Jalan", "#"))
-                foto_jalan_ok  = foto_jalan_url not in ("#", "-", "nan", "None", "")
-                sv_url         = generate_streetview_url(r.Latitude, r.Longitude)
-                lh3, thumb_url = gdrive_thumbnail(foto, width=440)
-
-                # ── foto + semua link dalam SATU baris ────────────────────
-                links = []
-                if lh3 and foto not in ("#", "-", "nan", "None", ""):
-                    links.append(
-                        f'<a href="{foto}" target="_blank"'
-                        f' style="color:#2980b9;text-decoration:none">&#128247; Foto Depan &#8599;</a>'
-                    )
-                if foto_jalan_ok:
-                    links.append(
-                        f'<a href="{foto_jalan_url}" target="_blank"'
-                        f' style="color:#2980b9;text-decoration:none">&#128247; Foto Jalan &#8599;</a>'
-                    )
-                links.append(
-                    f'<a href="{sv_url}" target="_blank"'
-                    f' style="color:#2980b9;text-decoration:none">&#128269; Street View &#8599;</a>'
-                )
-                link_bar = (
-                    f'<div style="display:flex;gap:12px;margin:5px 0 10px;'
-                    f'font-size:11px;flex-wrap:wrap">'
-                    + " ".join(links) +
-                    f'</div>'
-                )
+                lat0, lon0 = -2.548926, 118.0148634
 
-                foto_img = ""
-                if lh3:
-                    foto_img = f"""
-                    <img src="{lh3}"
-                         style="width:100%;border-radius:7px;display:block;
-                                border:1px solid #e0e0e0;
-                                box-shadow:0 2px 8px rgba(0,0,0,0.12)"
-                         referrerpolicy="no-referrer"
-                         onerror="this.src='{thumb_url}';this.onerror=null;">"""
-
-                # Harga
-                ht  = getattr(r, "Harga_Total", None)
-                ht_str = format_currency(ht) if (ht and not pd.isna(ht)) else None
-
-                harga_card = f"""
-                <div style="background:linear-gradient(135deg,#eafaf1,#d5f5e3);
-                            border-radius:7px;padding:8px 12px;margin:6px 0;
-                            border:1px solid #a9dfbf">
-                  {"<div style='font-size:11px;color:#555;margin-bottom:2px'>Harga Total: " + ht_str + "</div>" if ht_str else ""}
-                  <div style="font-size:22px;font-weight:bold;color:#1a7a4a;line-height:1.1">
-                    {harga_fmt}
-                    <span style="font-size:12px;color:#555;font-weight:normal">/m²</span>
-                  </div>
-                </div>"""
-
-                # Badge header
-                jenis_data = safe_get(r, "Jenis_Data")
-                badge_col  = "#e67e22" if "penawaran" in str(jenis_data).lower() else "#2980b9"
-                header = f"""
-                <div style="background:#eafaf1;border-left:4px solid #27ae60;
-                            padding:7px 10px;margin-bottom:6px;border-radius:0 5px 5px 0;
-                            display:flex;align-items:center;gap:8px">
-                  <b style="font-size:15px;color:#1a7a4a">Data {nomor_str}</b>
-                  <span style="background:{badge_col};color:white;border-radius:10px;
-                               padding:1px 8px;font-size:10.5px;font-weight:600">
-                    {jenis_data}
-                  </span>
-                  <span style="color:#888;font-size:11px;margin-left:auto">{int(tahun) if tahun else ''}</span>
-                </div>"""
-
-                body = f"""
-                {foto_img}
-                {link_bar}
-                {harga_card}
-                {tbl_open}
-                  {sec('📍','Lokasi & Properti')}
-                  {r2('Jenis', safe_get(r,'Jenis_Properti'), 'Tahun', int(tahun) if tahun else '-')}
-                  {r1('Alamat', safe_get(r,'Alamat'), True)}
-                  {r1('Kompleks', safe_get(r,'Kompleks'))}
-                  {r2('Kelurahan', safe_get(r,'Kelurahan'), 'Kecamatan', safe_get(r,'Kecamatan'), True)}
-                  {r2('Kota', safe_get(r,'Kota'), 'Propinsi', safe_get(r,'Propinsi'))}
-                  {sec('🏗️','Fisik Bangunan')}
-                  {r2('Luas Tanah', f'{luas_t} m²', 'Luas Bangunan', f'{luas_b} m²')}
-                  {r2('Kondisi Bgn', safe_get(r,'Kondisi_Bangunan'), 'Kelas Bgn', safe_get(r,'Kelas_Bangunan'), True)}
-                  {sec('📞','Kontak')}
-                  {r2('Nama', safe_get(r,'Kontak'), 'Telp', safe_get(r,'Telp'))}
-                {tbl_close}"""
-
-                return f"""
-                <div style="font-family:'Segoe UI',Arial,sans-serif;
-                            min-width:440px;max-width:500px">
-                  {header}
-                  {body}
-                </div>"""
-
-        for r in map_df.itertuples():
-            nomor     = str(safe_get(r, "Nomor")).strip()
-            tahun     = getattr(r, "Tahun_Bersih", 0) or 0
-            is_subj   = "obyek" in nomor.lower()
-            foto      = str(safe_get(r, "Foto", "#"))
-            harga_fmt = format_currency(getattr(r, "Harga_Tanah", 0))
-            def _fmt_luas(col):
-                v = getattr(r, col, None)
-                if v is None or (isinstance(v, float) and pd.isna(v)):
-                    return "-"
-                try:
-                    return f"{float(v):,.0f}".replace(",", ".")
-                except Exception:
-                    return str(v)
-            luas_t = _fmt_luas("Luas_Tanah")
-            luas_b = _fmt_luas("Luas_Bangunan")
-
-            popup_html = build_popup(r, is_subj, tahun, harga_fmt, luas_t, luas_b, foto)
-            target = subj_layer if is_subj else marker_layer
-
-            if is_subj:
-                folium.Marker(
-                    location=[r.Latitude, r.Longitude],
-                    tooltip="🏠 Obyek Penilaian — klik untuk detail",
-                    icon=folium.DivIcon(
-                        html="""
-                        <div style="position:relative;width:38px;height:50px">
-                          <div style="width:38px;height:38px;background:#c0392b;
-                                      border-radius:50% 50% 50% 0;
-                                      transform:rotate(-45deg);
-                                      border:3px solid white;
-                                      box-shadow:0 3px 8px rgba(0,0,0,0.5)">
-                          </div>
-                          <span style="position:absolute;top:4px;left:6px;
-                                       font-size:18px;line-height:1">🏠</span>
-                        </div>""",
-                        icon_size=(38, 50),
-                        icon_anchor=(19, 50),
-                    ),
-                ).add_to(target)
-                # Label Obyek Penilaian — lebih besar & mencolok
-                folium.Marker(
-                    [r.Latitude, r.Longitude],
-                    icon=folium.DivIcon(
-                        html="""
-                        <div style="font-size:11px;font-weight:bold;color:#c0392b;
-                                    background:rgba(255,255,255,0.45);padding:2px 6px;
-                                    border-radius:4px;white-space:nowrap;
-                                    border:1px solid rgba(192,57,43,0.5);pointer-events:none;
-                                    backdrop-filter:blur(2px);margin-top:2px">
-                            🏠 Obyek
-                        </div>""",
-                        icon_size=(175, 28),
-                        icon_anchor=(87, -4),
-                    ),
-                ).add_to(m)
-            else:
-                warna = get_color_by_year(tahun)
-                folium.Marker(
-                    location=[r.Latitude, r.Longitude],
-                    tooltip=f"Data {nomor} | {harga_fmt}/m²",
-                    icon=folium.Icon(color=warna, icon="info-sign", prefix="glyphicon"),
-                ).add_to(target)
-
-                label_color = "#922b21" if warna == "red" else "#154360"
-                folium.Marker(
-                    [r.Latitude, r.Longitude],
-                    icon=folium.DivIcon(
-                        html=f"""
-                        <div style="font-size:10px;color:{label_color};font-weight:600;
-                                    background:rgba(255,255,255,0.42);padding:1px 4px;
-                                    border-radius:3px;white-space:nowrap;
-                                    border:1px solid rgba(100,100,100,0.25);pointer-events:none;
-                                    backdrop-filter:blur(2px);line-height:1.3">
-                            {harga_fmt}/m²<br>
-                            <span style="font-size:9px;opacity:0.85">#{nomor}</span>
-                        </div>""",
-                        icon_size=(130, 32),
-                        icon_anchor=(0, 0),
-                    ),
-                ).add_to(m)
-
-        folium.LayerControl(collapsed=True).add_to(m)
-
-        legend = """
-        <div class="legend-box">
-          <b>Legenda Tahun:</b><br>
-          <span style="color:green">&#9679;</span> &ge; 2025<br>
-          <span style="color:blue">&#9679;</span> 2024<br>
-          <span style="color:orange">&#9679;</span> 2023<br>
-          <span style="color:red">&#9679;</span> &lt; 2023<br>
-          <span style="color:#c0392b;font-size:14px">🏠</span> Obyek Penilaian<br>
-          <span style="color:#e74c3c">&#9135;&#9135;</span> Garis Jarak
-        </div>
-        """
-        m.get_root().html.add_child(folium.Element(legend))
-
-        # ── Split layout: peta kiri | panel detail kanan ────────────────
-        col_map, col_detail = st.columns([7, 3], gap="medium")
-
-        with col_map:
-            n_subj = map_df["Nomor"].astype(str).str.lower().str.contains("obyek").sum()
-            n_comp = len(map_df) - n_subj
-            st.caption(
-                f"**{n_subj}** Obyek Penilaian + **{n_comp}** Data Pembanding"
-                f" — klik marker untuk detail di panel kanan"
+            m = folium.Map(
+                location=[lat0, lon0],
+                zoom_start=14 if len(map_df) <= 20 else 12,
+                min_zoom=5, max_zoom=18,
+                prefer_canvas=True, control_scale=True,
             )
-            result = st_folium(
-                m, width="100%", height=620,
-                returned_objects=["last_object_clicked"],
-                key="folium_peta",
-            )
-            if result and result.get("last_object_clicked"):
-                c = result["last_object_clicked"]
-                lat_c, lng_c = c.get("lat"), c.get("lng")
-                if lat_c is not None and lng_c is not None and not map_df.empty:
-                    dists = (
-                        (map_df["Latitude"]  - lat_c) ** 2 +
-                        (map_df["Longitude"] - lng_c) ** 2
-                    )
-                    if dists.min() < 1e-5:
-                        st.session_state["peta_sel"] = int(dists.idxmin())
-
-        # ── Panel detail ─────────────────────────────────────────────────
-        with col_detail:
-            sel_idx = st.session_state.get("peta_sel")
-            if sel_idx is None or sel_idx not in map_df.index:
-                components.html(
-                    '<div style="height:620px;display:flex;align-items:center;'
-                    'justify-content:center;border:2px dashed #e8e8e8;border-radius:8px;'
-                    'font-family:-apple-system,sans-serif;color:#ccc">'
-                    '<div style="text-align:center">'
-                    '<div style="font-size:34px">👆</div>'
-                    '<div style="font-size:11px;margin-top:8px;line-height:1.6">'
-                    'Klik marker di peta<br>untuk detail properti</div>'
-                    '</div></div>',
-                    height=625)
-            else:
-                row      = map_df.loc[sel_idx]
-                nomor_d  = str(safe_get(row, "Nomor")).strip()
-                is_s     = "obyek" in nomor_d.lower()
-                tahun_d  = row.get("Tahun_Bersih") if hasattr(row, "get") else None
-                harga_d  = format_currency(row.get("Harga_Tanah"))
-                foto_url = str(safe_get(row, "Foto", ""))
-
-                # ── Kumpulkan semua foto ──────────────────────────────────
-                all_fotos = []
-                for u_raw, lb in (
-                    [(foto_url, "Depan"),
-                     (str(safe_get(row, "Foto_Jalan", "")), "Jalan")]
-                    + ([(str(safe_get(row, c, "")), lb2)
-                        for c, lb2 in [("Foto_Dalam","Dalam"),
-                                       ("Foto_Samping_Kanan","Kanan"),
-                                       ("Foto_Samping_Kiri","Kiri"),
-                                       ("Gambar_Situasi","Situasi")]]
-                       if is_s else [])
-                ):
-                    if u_raw not in ("", "#", "-", "nan", "None"):
-                        lh, th = gdrive_thumbnail(u_raw, width=600)
-                        if lh:
-                            all_fotos.append((lh, th, u_raw, lb))
-
-                # ── Helper builders ───────────────────────────────────────
-                def _v(x):
-                    s = str(x) if x is not None else ""
-                    return s if s not in ("-", "", "None", "nan") else "—"
-                def sh(icon, title):
-                    return (f'<div style="background:#f0faf5;color:#1a7a4a;font-size:8.5px;'
-                            f'font-weight:700;text-transform:uppercase;letter-spacing:.5px;'
-                            f'padding:2px 5px;border-radius:2px;margin:5px 0 1px">'
-                            f'{icon} {title}</div>')
-                def r1(lbl, val):
-                    return (f'<div style="display:flex;border-bottom:1px solid #f5f5f5;padding:1.5px 0">'
-                            f'<span style="color:#bbb;font-size:9.5px;min-width:82px;flex-shrink:0">{lbl}</span>'
-                            f'<span style="color:#1a1a1a;font-size:10.5px;font-weight:500">{_v(val)}</span></div>')
-                def r2(l1, v1, l2, v2):
-                    return (f'<div style="display:grid;grid-template-columns:1fr 1fr;'
-                            f'gap:0 3px;border-bottom:1px solid #f5f5f5;padding:1.5px 0">'
-                            f'<div><span style="display:block;color:#bbb;font-size:9px">{l1}</span>'
-                            f'<span style="color:#1a1a1a;font-size:10.5px;font-weight:500">{_v(v1)}</span></div>'
-                            f'<div><span style="display:block;color:#bbb;font-size:9px">{l2}</span>'
-                            f'<span style="color:#1a1a1a;font-size:10.5px;font-weight:500">{_v(v2)}</span></div></div>')
-                def _luas(col):
-                    v = row.get(col)
-                    if v is None or (isinstance(v, float) and pd.isna(v)): return "—"
-                    try: return f"{float(v):,.0f} m²".replace(",", ".")
-                    except: return str(v)
-
-                # ── Build HTML ────────────────────────────────────────────
-                P = []
-                P.append('<div style="height:620px;overflow-y:auto;padding:0 5px 8px 0;'
-                         'font-family:-apple-system,\'Segoe UI\',sans-serif;'
-                         'scrollbar-width:thin;scrollbar-color:#ddd transparent">')
-
-                # Header
-                if is_s:
-                    P.append('<div style="background:#fdecea;border-left:3px solid #c0392b;'
-                             'padding:4px 8px;margin-bottom:4px;border-radius:0 4px 4px 0">'
-                             '<b style="color:#c0392b;font-size:12px">🏠 Obyek Penilaian</b></div>')
+            # Gaya label/ikon peta sebagai kelas CSS — ditulis sekali, bukan inline per marker
+            m.get_root().header.add_child(folium.Element(f"<style>{MAP_CSS}</style>"))
+
+            folium.TileLayer(
+                tiles="https://{s}.basemaps.cartocdn.com/rastertiles/voyager/{z}/{x}/{y}{r}.png",
+                name="Voyager", attr="©OpenStreetMap ©CartoDB",
+            ).add_to(m)
+            folium.TileLayer(
+                tiles="https://server.arcgisonline.com/ArcGIS/rest/services/World_Imagery/MapServer/tile/{z}/{y}/{x}",
+                name="Satellite", attr="Tiles © Esri",
+            ).add_to(m)
+
+            sel = None
+            if show_heatmap and not comp_map_df.empty and "Harga_Tanah" in comp_map_df.columns:
+                # Hanya sel grid teragregasi yang dikirim ke peta, bukan tiap titik
+                sel = grid_harga(comp_map_df["Latitude"], comp_map_df["Longitude"],
+                                 pd.to_numeric(comp_map_df["Harga_Tanah"], errors="coerce"),
+                                 sel_km=heat_sel_km or None)
+                if not sel.empty:
+                    HeatMap(sel[["Latitude", "Longitude", "Bobot"]].to_numpy().tolist(),
+                            name="Heatmap Harga", radius=30, blur=20, min_opacity=0.4).add_to(m)
+
+            # ── Permukaan harga: IDW di thread latar, di-cache per keadaan filter ──
+            perm_info = ""
+            if show_permukaan and not comp_map_df.empty and "Harga_Tanah" in comp_map_df.columns:
+                if not subj_df.empty:
+                    perm_bounds = bounds_sekitar(lat0, lon0, perm_radius)
                 else:
-                    jenis_d = safe_get(row, "Jenis_Data")
-                    badge   = "#e67e22" if "penawaran" in str(jenis_d).lower() else "#2980b9"
-                    thn_lbl = f"· {int(tahun_d)}" if tahun_d and not pd.isna(tahun_d) else ""
-                    P.append(f'<div style="background:#eafaf1;border-left:3px solid #27ae60;'
-                             f'padding:4px 8px;margin-bottom:4px;border-radius:0 4px 4px 0;'
-                             f'display:flex;align-items:center;gap:5px">'
-                             f'<b style="color:#1a7a4a;font-size:12px">Data {nomor_d}</b>'
-                             f'<span style="background:{badge};color:white;border-radius:6px;'
-                             f'padding:1px 5px;font-size:9px">{jenis_d}</span>'
-                             f'<span style="color:#bbb;font-size:10px;margin-left:auto">{thn_lbl}</span></div>')
-
-                # Carousel foto — menggunakan JavaScript (berjalan di components.html iframe)
-                if all_fotos:
-                    n_foto  = len(all_fotos)
-                    slides  = ",".join(
-                        f'{{s:"{lh}",f:"{th}",h:"{hr}",l:"{lb}"}}'
-                        for lh, th, hr, lb in all_fotos)
-                    P.append(f'''
-<div style="position:relative;margin-bottom:4px;border-radius:5px;overflow:hidden;background:#111">
-  <img id="simg" src="{all_fotos[0][0]}"
-       style="width:100%;height:auto;display:block"
-       referrerpolicy="no-referrer"
-       onerror="this.src='{all_fotos[0][1]}';this.onerror=null;">
-  <div style="position:absolute;bottom:0;left:0;right:0;
-              background:linear-gradient(transparent,rgba(0,0,0,0.6));
-              padding:5px 8px;display:flex;align-items:center;gap:6px">
-    <button id="btnP"
-            style="background:rgba(255,255,255,0.2);border:1px solid rgba(255,255,255,0.4);
-                   color:white;font-size:18px;line-height:1;width:28px;height:28px;
-                   border-radius:4px;cursor:pointer;flex-shrink:0">&#8249;</button>
-    <span id="slbl" style="color:white;font-size:10px;font-weight:600;
-                           flex:1;text-align:center">Depan 1/{n_foto}</span>
-    <button id="btnN"
-            style="background:rgba(255,255,255,0.2);border:1px solid rgba(255,255,255,0.4);
-                   color:white;font-size:18px;line-height:1;width:28px;height:28px;
-                   border-radius:4px;cursor:pointer;flex-shrink:0">&#8250;</button>
-    <a id="slnk" href="{all_fotos[0][2]}" target="_blank"
-       style="color:rgba(255,255,255,0.8);font-size:9px;
-              text-decoration:none;white-space:nowrap;flex-shrink:0">↗ buka</a>
-  </div>
-</div>
-<script>
-(function(){{
-  var D=[{slides}], i=0;
-  function go(n){{
-    i=(n+D.length)%D.length;
-    var el=document.getElementById('simg');
-    el.src=D[i].s;
-    el.onerror=function(){{el.src=D[i].f;el.onerror=null;}};
-    document.getElementById('slbl').textContent=D[i].l+' '+(i+1)+'/{n_foto}';
-    document.getElementById('slnk').href=D[i].h;
-  }}
-  document.getElementById('btnP').addEventListener('click',function(){{go(i-1);}});
-  document.getElementById('btnN').addEventListener('click',function(){{go(i+1);}});
-}})();
-</script>''')
-
-                # Link Street View
-                sv = generate_streetview_url(row.get("Latitude"), row.get("Longitude"))
-                foto_hint = f' | {len(all_fotos)} foto — geser ‹ ›' if all_fotos else ''
-                P.append(f'<div style="display:flex;gap:8px;margin:2px 0 4px;flex-wrap:wrap;'
-                         f'border-bottom:1px solid #efefef;padding-bottom:3px">'
-                         f'<a href="{sv}" target="_blank" '
-                         f'style="color:#2980b9;text-decoration:none;font-size:10px">'
-                         f'🔍 Street View ↗</a>'
-                         f'<span style="color:#bbb;font-size:9px">{foto_hint}</span></div>')
-
-                # Harga card (Data Pembanding)
-                if not is_s:
-                    ht     = row.get("Harga_Total")
-                    ht_str = format_currency(ht) if ht and not pd.isna(ht) else "—"
-                    P.append(f'<div style="display:flex;gap:4px;margin:3px 0">'
-                             f'<div style="flex:1;background:#f0fdf4;border-left:2px solid #27ae60;'
-                             f'padding:3px 6px;border-radius:0 3px 3px 0">'
-                             f'<div style="font-size:8px;color:#999;text-transform:uppercase;'
-                             f'letter-spacing:.4px">Harga Total</div>'
-                             f'<div style="font-size:11px;font-weight:700;color:#1a7a4a">{ht_str}</div></div>'
-                             f'<div style="flex:1;background:#eff6ff;border-left:2px solid #2980b9;'
-                             f'padding:3px 6px;border-radius:0 3px 3px 0">'
-                             f'<div style="font-size:8px;color:#999;text-transform:uppercase;'
-                             f'letter-spacing:.4px">Harga/m²</div>'
-                             f'<div style="font-size:11px;font-weight:700;color:#1a4a7a">{harga_d}</div></div></div>')
-
-                # Info sections
-                if is_s:
-                    P.append(sh("📋", "Identitas"))
-                    P.append(r2("Pemilik", safe_get(row,"Pemilik"),
-                                "Jenis",   safe_get(row,"Jenis_Properti")))
-                    P.append(r2("Kode Inspeksi", safe_get(row,"Kode_Inspeksi"),
-                                "Tgl Inspeksi",  safe_get(row,"Tanggal_Inspeksi")))
-                    P.append(r2("Reviewer",       safe_get(row,"Reviewer"),
-                                "Pemberi Tugas",  safe_get(row,"Pemberi_Tugas")))
+                    perm_bounds = [[comp_map_df["Latitude"].min(), comp_map_df["Longitude"].min()],
+                                   [comp_map_df["Latitude"].max(), comp_map_df["Longitude"].max()]]
+                perm_args = (dataset_key, df.index.get_indexer(comp_map_df.index), perm_bounds,
+                             int(perm_ref), float(perm_pct), float(perm_radius))
+                fut = permukaan_tugas(*perm_args)
+                try:
+                    perm = fut.result(timeout=PERMUKAAN_TUNGGU_S)
+                except FutureTimeout:
+                    perm = None
+                    perm_info = " · permukaan harga masih dihitung"
+                    pantau_permukaan(fut)
+                except Exception as e:
+                    # Future gagal jangan tertahan di cache — keadaan filter yang sama dihitung ulang nanti
+                    permukaan_tugas.clear(*perm_args)
+                    perm = None
+                    perm_info = f" · permukaan harga gagal dihitung ({e})"
+                _nilai = perm.nilai[np.isfinite(perm.nilai)] if perm is not None else np.array([])
+                if len(_nilai):
+                    vmin, vmax = (float(x) for x in np.quantile(_nilai, [0.05, 0.95]))
+                    ImageOverlay(
+                        warnai_grid(perm.nilai, vmin, vmax), bounds=perm.bounds,
+                        name="🗺️ Permukaan Harga", mercator_project=True,
+                    ).add_to(m)
+                    LinearColormap(list(WARNA_PERMUKAAN), vmin=vmin, vmax=vmax,
+                                   caption=f"Permukaan harga Rp/m² (IDW, disesuaikan ke {int(perm_ref)})").add_to(m)
+                    _est = perm.nilai_di(lat0, lon0) if not subj_df.empty else np.nan
+                    perm_info = (f" · permukaan harga dari {perm.n_titik} pembanding"
+                                 + (f", estimasi di Obyek {format_currency(_est)}/m²" if np.isfinite(_est) else ""))
+                elif perm is not None:
+                    perm_info = " · permukaan harga: tidak ada pembanding berharga di area ini"
+
+            # ── Garis jarak dari Obyek Penilaian (terdekat) ke setiap Data Pembanding ──
+            # Jarak_km & obyek acuan sudah dihitung sekali per dataset (tahap jarak)
+            if ringan and not subj_df.empty and not comp_map_df.empty:
+                # Satu multi-polyline tanpa label tengah; disembunyikan sampai diaktifkan di kontrol layer
+                _ref = comp_map_df["_obyek_ref"]
+                _ok  = comp_map_df["Jarak_km"].notna() & _ref.isin(subj_df.index)
+                _s   = subj_df.loc[_ref[_ok].tolist(), ["Latitude", "Longitude"]].to_numpy()
+                _c   = comp_map_df.loc[_ok, ["Latitude", "Longitude"]].to_numpy()
+                if len(_c):
+                    lines_fg = folium.FeatureGroup(name="📏 Garis Jarak", show=False).add_to(m)
+                    folium.PolyLine(
+                        locations=np.stack([_s, _c], axis=1).tolist(),
+                        color="#e74c3c", weight=1, opacity=0.5,
+                    ).add_to(lines_fg)
+            elif not subj_df.empty and not comp_map_df.empty:
+                lines_fg = folium.FeatureGroup(name="📏 Garis Jarak", show=True).add_to(m)
+                multi_subj = len(subj_df) > 1
+
+                # itertuples mengganti nama kolom berawalan "_", jadi acuan obyek di-zip terpisah
+                for r, ref in zip(comp_map_df.itertuples(), comp_map_df["_obyek_ref"]):
+                    if pd.isna(r.Jarak_km) or ref not in subj_df.index:
+                        continue
+                    s = subj_df.loc[ref]
+                    nomor_r = str(safe_get(r, "Nomor")).strip()
+                    dist_km = r.Jarak_km
+                    dist_label = f"{dist_km:.2f} km" if dist_km >= 1 else f"{dist_km*1000:.0f} m"
+                    asal = f"Obyek {r.Obyek_Terdekat}" if multi_subj else "Obyek"
+
+                    folium.PolyLine(
+                        locations=[[s.Latitude, s.Longitude], [r.Latitude, r.Longitude]],
+                        color="#e74c3c",
+                        weight=2,
+                        dash_array="6 4",
+                        opacity=0.8,
+                        tooltip=f"{asal} → Data {nomor_r}: {dist_label} · arah {r.Arah_deg:.0f}°",
+                    ).add_to(lines_fg)
+
+                    # Label jarak di tengah garis
+                    mid_lat = (s.Latitude + r.Latitude) / 2
+                    mid_lon = (s.Longitude + r.Longitude) / 2
+                    folium.Marker(
+                        [mid_lat, mid_lon],
+                        interactive=False,  # label saja — klik tembus ke bawahnya
+                        icon=folium.DivIcon(
+                            html=label_jarak(dist_label),
+                            icon_size=(90, 22),
+                            icon_anchor=(45, 11),
+                        ),
+                    ).add_to(lines_fg)
+
+            # ── Layer marker data pembanding — selalu individual pin ────────────
+            marker_layer = folium.FeatureGroup(name="Data Pembanding").add_to(m)
+
+            # ── Layer Obyek Penilaian — selalu terpisah, tidak masuk cluster ────
+            subj_layer = folium.FeatureGroup(name="🏠 Obyek Penilaian", show=True).add_to(m)
+
+            if ringan and not comp_map_df.empty:
+                _nomor = comp_map_df["Nomor"].astype(str).str.strip() if "Nomor" in comp_map_df.columns \
+                    else pd.Series("-", index=comp_map_df.index)
+                _harga = comp_map_df["Harga_Tanah"].map(format_currency)
+                _warna = warna_tahun_series(comp_map_df["Tahun_Bersih"]).map(WARNA_HEX)
+                _tip   = [tooltip_dengan_id(t, i) for t, i in
+                          zip(("Data " + _nomor + " | " + _harga + "/m²").tolist(), comp_map_df.index)]
+                _lat, _lon = comp_map_df["Latitude"].tolist(), comp_map_df["Longitude"].tolist()
+                if peta_cluster:
+                    FastMarkerCluster(
+                        list(zip(_lat, _lon, _warna.tolist(), _tip)),
+                        callback=CLUSTER_CALLBACK,
+                    ).add_to(marker_layer)
                 else:
-                    P.append(sh("📋", "Properti"))
-                    thn_v = int(tahun_d) if tahun_d and not pd.isna(tahun_d) else "—"
-                    P.append(r2("Jenis", safe_get(row,"Jenis_Properti"), "Tahun", thn_v))
-
-                P.append(sh("📍", "Lokasi"))
-                P.append(r1("Alamat",    safe_get(row,"Alamat")))
-                P.append(r1("Kompleks",  safe_get(row,"Kompleks")))
-                P.append(r2("Kelurahan", safe_get(row,"Kelurahan"),
-                             "Kecamatan", safe_get(row,"Kecamatan")))
-                P.append(r2("Kota",     safe_get(row,"Kota"),
-                             "Propinsi", safe_get(row,"Propinsi")))
-
-                P.append(sh("📐", "Fisik"))
-                if is_s:
-                    # Tentukan apakah ada data bangunan dari sheet terpisah
-                    kode_ins = safe_get(row, "Kode_Inspeksi")
-                    bgn_rows = (
-                        df_bangunan[df_bangunan["Kode_Inspeksi"] == kode_ins]
-                        if not df_bangunan.empty and kode_ins and kode_ins != "—"
-                           and "Kode_Inspeksi" in df_bangunan.columns
-                        else pd.DataFrame()
-                    )
-                    if not bgn_rows.empty:
-                        # Ada data dari Data Bangunan — tampilkan Luas Tanah saja di baris pertama
-                        P.append(r1("Luas Tanah", _luas("Luas_Tanah")))
-                        for _, br in bgn_rows.iterrows():
-                            jenis_bgn = str(br.get("Jenis_Bangunan", "")) if pd.notna(br.get("Jenis_Bangunan")) else "—"
-                            luas_bgn  = br.get("Luas_Bangunan")
-                            luas_bgn_fmt = f"{luas_bgn:,.0f} m²" if pd.notna(luas_bgn) else "—"
-                            P.append(r2("Jenis Bangunan", jenis_bgn, "Luas Bangunan", luas_bgn_fmt))
-                    else:
-                        P.append(r2("Luas Tanah",    _luas("Luas_Tanah"),
-                                     "Luas Bangunan", _luas("Luas_Bangunan")))
+                    folium.GeoJson(
+                        {"type": "FeatureCollection", "features": [
+                            {"type": "Feature",
+                             "geometry": {"type": "Point", "coordinates": [lo, la]},
+                             "properties": {"tip": t, "warna": w}}
+                            for la, lo, t, w in zip(_lat, _lon, _tip, _warna.tolist())
+                        ]},
+                        marker=folium.CircleMarker(radius=6, weight=1, color="white", fill=True, fill_opacity=0.9),
+                        style_function=lambda f: {"fillColor": f["properties"]["warna"]},
+                        # Tooltip diikat per titik agar teksnya (berisi id baris) ikut terkirim saat diklik
+                        on_each_feature=JsCode("function (f, layer) { layer.bindTooltip(f.properties.tip); }"),
+                    ).add_to(marker_layer)
+                _label = [label_harga(h, n, merah=(w == WARNA_HEX["red"]))
+                          for h, n, w in zip(_harga.tolist(), _nomor.tolist(), _warna.tolist())]
+                LabelZoom(list(zip(_lat, _lon, _label)), min_zoom=peta_label_zoom).add_to(m)
+
+            # Mode ringan: hanya Obyek Penilaian yang digambar sebagai marker lengkap
+            for r in (subj_df if ringan else map_df).itertuples():
+                # Marker tidak membawa HTML popup — detail dirender di panel kanan saat diklik
+                nomor     = str(safe_get(r, "Nomor")).strip()
+                tahun     = getattr(r, "Tahun_Bersih", 0)     # Int16: kosong = pd.NA → abu-abu
+                is_subj   = "obyek" in nomor.lower()
+                harga_fmt = format_currency(getattr(r, "Harga_Tanah", 0))
+                target = subj_layer if is_subj else marker_layer
+
+                if is_subj:
+                    folium.Marker(
+                        location=[r.Latitude, r.Longitude],
+                        tooltip=tooltip_dengan_id("🏠 Obyek Penilaian — klik untuk detail", r.Index),
+                        icon=folium.DivIcon(
+                            html=PIN_OBYEK,
+                            icon_size=(38, 50),
+                            icon_anchor=(19, 50),
+                        ),
+                    ).add_to(target)
+                    # Label Obyek Penilaian — lebih besar & mencolok
+                    folium.Marker(
+                        [r.Latitude, r.Longitude],
+                        interactive=False,  # label saja — klik tembus ke bawahnya
+                        icon=folium.DivIcon(
+                            html=LABEL_OBYEK,
+                            icon_size=(175, 28),
+                            icon_anchor=(87, -4),
+                        ),
+                    ).add_to(m)
                 else:
-                    P.append(r2("Luas Tanah",    _luas("Luas_Tanah"),
-                                 "Luas Bangunan", _luas("Luas_Bangunan")))
-                if not is_s:
-                    P.append(r2("Kondisi Bgn", safe_get(row,"Kondisi_Bangunan"),
-                                "Kelas Bgn",   safe_get(row,"Kelas_Bangunan")))
-                P.append(r2("Peruntukan",  safe_get(row,"Peruntukan"),
-                             "Kepemilikan", safe_get(row,"Kepemilikan")))
-                if not is_s:
-                    P.append(sh("📞", "Kontak"))
-                    P.append(r2("Nama", safe_get(row,"Kontak"),
-                                "Telp", safe_get(row,"Telp")))
-
-                P.append('</div>')  # tutup scrollable container
-
-                # Render via components.html agar JavaScript carousel berjalan
-                components.html("".join(P), height=625, scrolling=False)
+                    warna = get_color_by_year(tahun)
+                    folium.Marker(
+                        location=[r.Latitude, r.Longitude],
+                        tooltip=tooltip_dengan_id(f"Data {nomor} | {harga_fmt}/m²", r.Index),
+                        icon=folium.Icon(color=warna, icon="info-sign", prefix="glyphicon"),
+                    ).add_to(target)
+
+                    folium.Marker(
+                        [r.Latitude, r.Longitude],
+                        interactive=False,  # label saja — klik tembus ke bawahnya
+                        icon=folium.DivIcon(
+                            html=label_harga(harga_fmt, nomor, merah=(warna == "red")),
+                            icon_size=(130, 32),
+                            icon_anchor=(0, 0),
+                        ),
+                    ).add_to(m)
+
+            folium.LayerControl(collapsed=True).add_to(m)
+
+            legend = """
+            <div class="legend-box">
+              <b>Legenda Tahun:</b><br>
+              <span style="color:green">&#9679;</span> &ge; 2025<br>
+              <span style="color:blue">&#9679;</span> 2024<br>
+              <span style="color:orange">&#9679;</span> 2023<br>
+              <span style="color:red">&#9679;</span> &lt; 2023<br>
+              <span style="color:#c0392b;font-size:14px">🏠</span> Obyek Penilaian<br>
+              <span style="color:#e74c3c">&#9135;&#9135;</span> Garis Jarak
+            </div>
+            """
+            m.get_root().html.add_child(folium.Element(legend))
+
+            # ── Split layout: peta kiri | panel detail kanan ────────────────
+            col_map, col_detail = st.columns([7, 3], gap="medium")
+
+            with col_map:
+                n_subj = int(map_df["_is_obyek"].sum())
+                n_comp = len(map_df) - n_subj
+                st.caption(
+                    f"**{n_subj}** Obyek Penilaian + **{n_comp}** Data Pembanding"
+                    f" — klik marker untuk detail di panel kanan"
+                    + (f" · mode ringan (> {peta_ambang} titik): label harga tampil mulai zoom {peta_label_zoom}"
+                       if ringan else "")
+                    + (f" · heatmap: {len(sel)} sel dari {int(sel['Jumlah'].sum())} pembanding berharga"
+                       if show_heatmap and sel is not None and not sel.empty else "")
+                    + perm_info
+                )
+                result = st_folium(
+                    m, width="100%", height=620,
+                    returned_objects=["last_object_clicked", "last_object_clicked_tooltip"],
+                    key="folium_peta",
+                )
+                if result and result.get("last_object_clicked"):
+                    c = result["last_object_clicked"]
+                    lat_c, lng_c = c.get("lat"), c.get("lng")
+                    # Id baris dari tooltip marker: tepat juga untuk titik bertumpuk di koordinat sama.
+                    # Tooltip bisa sisa klik sebelumnya (mis. klik label) → cocokkan koordinatnya.
+                    rid = id_dari_tooltip(result.get("last_object_clicked_tooltip"))
+                    if (rid is not None and rid in map_df.index and lat_c is not None and lng_c is not None
+                            and abs(map_df.at[rid, "Latitude"] - lat_c) < 1e-6
+                            and abs(map_df.at[rid, "Longitude"] - lng_c) < 1e-6):
+                        st.session_state["peta_sel"] = rid
+                    elif lat_c is not None and lng_c is not None and not map_df.empty:
+                        dists = (
+                            (map_df["Latitude"]  - lat_c) ** 2 +
+                            (map_df["Longitude"] - lng_c) ** 2
+                        )
+                        if dists.min() < 1e-5:
+                            st.session_state["peta_sel"] = int(dists.idxmin())
+
+            # ── Panel detail ─────────────────────────────────────────────────
+            with col_detail:
+                sel_idx = st.session_state.get("peta_sel")
+                if sel_idx is None or sel_idx not in map_df.index:
+                    components.html(
+                        '<div style="height:620px;display:flex;align-items:center;'
+                        'justify-content:center;border:2px dashed #e8e8e8;border-radius:8px;'
+                        'font-family:-apple-system,sans-serif;color:#ccc">'
+                        '<div style="text-align:center">'
+                        '<div style="font-size:34px">👆</div>'
+                        '<div style="font-size:11px;margin-top:8px;line-height:1.6">'
+                        'Klik marker di peta<br>untuk detail properti</div>'
+                        '</div></div>',
+                        height=625)
+                else:
+                    # HTML detail hanya dirender untuk baris yang diklik (cache per dataset)
+                    components.html(detail_html(dataset_key, sel_idx), height=625, scrolling=False)
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # TAB 3 — TABEL DATA
 # ═══════════════════════════════════════════════════════════════════════════════
 with tab_tabel:
-    if filtered.empty:
-        st.warning("Tidak ada data yang sesuai dengan filter.")
-    else:
-        outliers_df = filtered[filtered["_outlier"]]
-        if not outliers_df.empty:
-            with st.expander(f"⚠️ {len(outliers_df)} Data Outlier Terdeteksi — klik untuk lihat detail"):
-                show_cols_out = [c for c in ["Nomor", "Alamat", "Kecamatan", "Kota",
-                                              "Tahun_Bersih", "Luas_Tanah", "Harga_Tanah"]
-                                 if c in outliers_df.columns]
-                st.dataframe(outliers_df[show_cols_out], use_container_width=True)
-
-        all_cols = [c for c in filtered.columns if not c.startswith("_")]
-        default_cols = [c for c in all_cols if c not in ("Latitude", "Longitude", "Tahun_Bersih")]
-        disp_cols = st.multiselect("Pilih kolom yang ditampilkan:", all_cols, default=default_cols)
-
-        if disp_cols:
-            disp_df = filtered[disp_cols].copy()
-            col_cfg = {}
-            if "Harga_Tanah" in disp_cols:
-                col_cfg["Harga_Tanah"] = st.column_config.NumberColumn(
-                    "Harga Tanah (Rp/m²)", format="Rp %.0f"
-                )
-            if "Luas_Tanah" in disp_cols:
-                col_cfg["Luas_Tanah"] = st.column_config.NumberColumn("Luas Tanah (m²)", format="%.0f m²")
-            if "Luas_Bangunan" in disp_cols:
-                col_cfg["Luas_Bangunan"] = st.column_config.NumberColumn("Luas Bangunan (m²)", format="%.0f m²")
-
-            st.dataframe(disp_df, use_container_width=True, height=500, column_config=col_cfg)
-
-            dl_col1, dl_col2 = st.columns([1, 5])
-            with dl_col1:
-                st.download_button(
-                    label="📥 Download Excel",
-                    data=to_excel_bytes(disp_df),
-                    file_name=f"data_tanah_{city_label}_{selected_year}.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                )
+    if tab_tabel.open:
+        if filtered.empty:
+            st.warning("Tidak ada data yang sesuai dengan filter.")
+        else:
+            outliers_df = filtered.pilih(filtered["_outlier"])
+            if not outliers_df.empty:
+                with st.expander(f"⚠️ {len(outliers_df)} Data Outlier Terdeteksi — klik untuk lihat detail"):
+                    show_cols_out = [c for c in ["Nomor", "Alamat", "Kecamatan", "Kota",
+                                                  "Tahun_Bersih", "Luas_Tanah", "Harga_Tanah"]
+                                     if c in outliers_df.columns]
+                    st.dataframe(outliers_df.frame(show_cols_out), use_container_width=True)
+
+            all_cols = [c for c in filtered.columns if not c.startswith("_")]
+            _hidden = {"Latitude", "Longitude", "Tahun_Bersih", "Arah_deg"}
+            if int(filtered["_is_obyek"].sum()) <= 1:
+                _hidden.add("Obyek_Terdekat")
+            default_cols = [c for c in all_cols if c not in _hidden]
+            disp_cols = st.multiselect("Pilih kolom yang ditampilkan:", all_cols, default=default_cols)
+
+            if disp_cols:
+                disp_df = filtered.frame(disp_cols)
+                col_cfg = {}
+                if "Harga_Tanah" in disp_cols:
+                    col_cfg["Harga_Tanah"] = st.column_config.NumberColumn(
+                        "Harga Tanah (Rp/m²)", format="Rp %.0f"
+                    )
+                if "Luas_Tanah" in disp_cols:
+                    col_cfg["Luas_Tanah"] = st.column_config.NumberColumn("Luas Tanah (m²)", format="%.0f m²")
+                if "Luas_Bangunan" in disp_cols:
+                    col_cfg["Luas_Bangunan"] = st.column_config.NumberColumn("Luas Bangunan (m²)", format="%.0f m²")
+                if "Jarak_km" in disp_cols:
+                    col_cfg["Jarak_km"] = st.column_config.NumberColumn("Jarak ke Obyek (km)", format="%.2f km")
+                if "Arah_deg" in disp_cols:
+                    col_cfg["Arah_deg"] = st.column_config.NumberColumn("Arah dari Obyek (°)", format="%.0f°")
+
+                st.dataframe(disp_df, use_container_width=True, height=500, column_config=col_cfg)
+
+                dl_col1, dl_col2 = st.columns([1, 5])
+                with dl_col2:
+                    fmt_ekspor = st.radio(
+                        "Format unduhan", list(FORMAT_EKSPOR), horizontal=True, label_visibility="collapsed",
+                        index=0 if len(disp_df) <= EKSPOR_BESAR else 1,
+                        help=f"Di atas {EKSPOR_BESAR:,} baris CSV/Parquet jauh lebih cepat dari Excel",
+                    )
+                _posisi, _kolom = filtered.posisi, tuple(disp_cols)
+                with dl_col1:
+                    st.download_button(
+                        label=f"📥 Download {fmt_ekspor}",
+                        data=lambda: ekspor_tabel(dataset_key, _posisi, _kolom, fmt_ekspor),
+                        file_name=f"data_tanah_{city_label}_{selected_year}.{FORMAT_EKSPOR[fmt_ekspor].ekstensi}",
+                        mime=FORMAT_EKSPOR[fmt_ekspor].mime,
+                    )
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # TAB 4 — ANALISA PERBANDINGAN
 # ═══════════════════════════════════════════════════════════════════════════════
 with tab_analisa:
-    st.subheader("🔄 Analisa Perbandingan & Indikasi Nilai")
-    st.markdown(
-        "Pilih data pembanding, masukkan parameter koreksi, lalu sistem menghitung "
-        "**harga indikasi** dan **koefisien variasi (CV)** sesuai standar penilaian."
-    )
-
-    # ── Lookup tables ─────────────────────────────────────────────────────────
-    _ROAD_SCORE = {"Arteri": 4, "Kolektor": 3, "Lokal": 2, "Lingkungan": 1}
-    _LANE_SCORE = {"Gang": 0, "1 lajur": 1, "2 lajur": 2, "4 lajur": 3, "6 lajur": 4, "8 lajur": 5}
-    _OWN_OPTS   = ["SHM", "SHSRS", "SHGB", "HGB", "SHP", "HP", "HGU", "Girik/AJB", "Lainnya"]
-    _ROAD_OPTS  = list(_ROAD_SCORE.keys())
-    _LANE_OPTS  = list(_LANE_SCORE.keys())
-
-    def _road_total(kelas, lajur):
-        return _ROAD_SCORE.get(str(kelas), 2) + _LANE_SCORE.get(str(lajur), 1)
-
-    def _peruntukan_score(val):
-        """Skor peruntukan: Komersial(5) > Perumahan(4) > Industri(3) > Pertanian(2) > Fasilitias Umum(1)."""
-        v = str(val).lower()
-        if any(k in v for k in ["komersial", "perdagangan", "jasa", "niaga", "bisnis"]):
-            return 5
-        if any(k in v for k in ["permukiman", "perumahan", "hunian", "residensial"]):
-            return 4
-        if "industri" in v:
-            return 3
-        if any(k in v for k in ["pertanian", "sawah", "kebun", "perkebunan", "ladang"]):
-            return 2
-        if any(k in v for k in ["fasilitas", "fasum", "sosial", "pendidikan", "kesehatan"]):
-            return 1
-        return None
-
-    def _detect_kep(val):
-        v = str(val).strip().upper().replace(" ", "")
-        for k in _OWN_OPTS:
-            if k.upper().replace(" ", "") in v:
-                return k
-        return "Lainnya"
-
-    if filtered.empty:
-        st.warning("Tidak ada data yang sesuai dengan filter.")
-    else:
-        is_subject_mask = filtered["Nomor"].astype(str).str.lower().str.contains("obyek", na=False)
-        subject_rows    = filtered[is_subject_mask]
-        comparable_rows = filtered[~is_subject_mask]
-
-        col_subj, col_comp = st.columns([1, 2])
-
-        with col_subj:
-            st.markdown("#### 🏠 Obyek Penilaian")
-            if not subject_rows.empty:
-                s = subject_rows.iloc[0]
-                subj_luas  = float(s.get("Luas_Tanah") or 0)
-                _h = s.get("Harga_Tanah")
-                subj_harga = float(_h) if (_h is not None and not pd.isna(_h)) else 0.0
-                harga_disp = format_currency(subj_harga) + "/m²" if subj_harga > 0 else "belum dinilai"
-                st.info(
-                    f"**Alamat:** {s.get('Alamat', '-')}  \n"
-                    f"**Kecamatan:** {s.get('Kecamatan', '-')}  \n"
-                    f"**Luas Tanah:** {subj_luas:,.0f} m²  \n"
-                    f"**Kepemilikan:** {s.get('Kepemilikan', '-')}  \n"
-                    f"**Harga Indikasi Awal:** {harga_disp}"
-                )
-                _kep_def = _detect_kep(s.get("Kepemilikan", "SHM"))
-                subj_kep = st.selectbox("Bukti Kepemilikan Obyek", _OWN_OPTS,
-                                        index=_OWN_OPTS.index(_kep_def) if _kep_def in _OWN_OPTS else 0,
-                                        key="an_subj_kep")
-                # Default tahun dari Tanggal Inspeksi
-                _tgl_ins = s.get("Tanggal_Inspeksi")
-                try:
-                    _default_ref_year = int(pd.to_datetime(str(_tgl_ins), dayfirst=True, errors="coerce").year)
-                    if pd.isna(_default_ref_year): _default_ref_year = 2025
-                except Exception:
-                    _default_ref_year = 2025
-                # Skor peruntukan obyek untuk auto-koreksi
-                _subj_perun_score = _peruntukan_score(s.get("Peruntukan", ""))
-            else:
-                st.warning("Tidak ada baris 'Obyek Penilaian' di data. Masukkan manual:")
-                subj_luas  = st.number_input("Luas Tanah Obyek (m²)", value=0.0, min_value=0.0, step=10.0)
-                subj_harga = 0.0
-                subj_kep   = st.selectbox("Bukti Kepemilikan Obyek", _OWN_OPTS, key="an_subj_kep")
-                _default_ref_year = 2025
-                _subj_perun_score = None
-
-            st.markdown("##### 🛣️ Lokasi Obyek")
-            subj_road_cls = st.selectbox("Kelas Jalan Obyek", _ROAD_OPTS, index=1, key="an_subj_road_cls")
-            subj_lajur    = st.selectbox("Jumlah Lajur Obyek", _LANE_OPTS, index=2, key="an_subj_lajur")
-
-            st.markdown("#### ⚙️ Parameter Koreksi")
-            ref_year       = st.number_input("Tahun Referensi Penilaian", value=_default_ref_year,
-                                              min_value=2000, max_value=2100, step=1)
-            diskon_pct     = st.number_input("Diskon Penawaran (%)", value=10.0,
-                                              min_value=0.0, max_value=50.0, step=0.5,
-                                              help="Diskon dari harga penawaran ke harga transaksi (berlaku untuk semua data pembanding)")
-            time_adj_pct   = st.number_input("Koreksi Waktu (%/tahun)", value=5.0,
-                                              min_value=0.0, max_value=50.0, step=0.5,
-                                              help="Kenaikan harga pasar per tahun (positif = pasar naik)")
-            size_adj_pct   = st.number_input("Koreksi Luas (%/100m²)", value=0.5,
-                                              min_value=0.0, max_value=20.0, step=0.5,
-                                              help="Penyesuaian harga akibat perbedaan luas per 100m²")
-            lokasi_ppt     = st.number_input("Koreksi Lokasi (%/poin)", value=5.0,
-                                              min_value=0.0, max_value=20.0, step=0.5,
-                                              help="Penyesuaian per poin perbedaan skor lokasi (kelas jalan + jumlah lajur)")
-
-        with col_comp:
-            st.markdown("#### 📋 Pilih Data Pembanding")
-            if comparable_rows.empty:
-                st.warning("Tidak ada data pembanding tersedia.")
-            else:
-                nomor_opts = comparable_rows["Nomor"].astype(str).tolist()
-                selected   = st.multiselect(
-                    "Pilih nomor data pembanding (disarankan 3–5 data):",
-                    options=nomor_opts,
-                    default=nomor_opts[:min(3, len(nomor_opts))],
-                )
-
-                if selected:
-                    comp = (comparable_rows[comparable_rows["Nomor"].astype(str).isin(selected)]
-                            .copy().reset_index(drop=True))
-
-                    # ── Editable per-comparable adjustment table ─────────────────
-                    st.markdown("##### ✏️ Penyesuaian Per Data Pembanding")
-                    st.caption(
-                        "Kepemilikan & Peruntukan otomatis terbaca dari data. "
-                        "Isi Kelas Jalan, Jumlah Lajur, dan koreksi bisa diubah manual."
-                    )
-
-                    # Auto-hitung Kor. Peruntukan dari kategori penggunaan tanah
-                    def _perun_adj(comp_perun_val):
-                        comp_score = _peruntukan_score(comp_perun_val)
-                        if _subj_perun_score is None or comp_score is None:
-                            return 0.0
-                        return round((_subj_perun_score - comp_score) * 2.5, 1)
-
-                    edit_init = pd.DataFrame({
-                        "No":                   comp["Nomor"].astype(str).tolist(),
-                        "Alamat":               comp["Alamat"].fillna("—").tolist() if "Alamat" in comp.columns else ["—"] * len(comp),
-                        "Kepemilikan":          [
-                            _detect_kep(comp.at[i, "Kepemilikan"])
-                            if "Kepemilikan" in comp.columns else "Lainnya"
-                            for i in range(len(comp))
-                        ],
-                        "Kelas Jalan":          ["Lokal"]   * len(comp),
-                        "Jumlah Lajur":         ["2 lajur"] * len(comp),
-                        "Kor. Peruntukan (%)":  [
-                            _perun_adj(comp.at[i, "Peruntukan"]) if "Peruntukan" in comp.columns else 0.0
-                            for i in range(len(comp))
-                        ],
-                    })
-
-                    # Simpan ke session_state agar perubahan pengguna tidak hilang saat rerun
-                    _ss_adj_key = f"adj_df_{'_'.join(sorted(str(x) for x in selected))}"
-                    if _ss_adj_key not in st.session_state:
-                        st.session_state[_ss_adj_key] = edit_init.copy()
-
-                    edited = st.data_editor(
-                        st.session_state[_ss_adj_key],
-                        use_container_width=True,
-                        column_config={
-                            "No":                  st.column_config.TextColumn("No", disabled=True, width="small"),
-                            "Alamat":              st.column_config.TextColumn("Alamat", disabled=True, width="large"),
-                            "Kepemilikan":         st.column_config.SelectboxColumn("Kepemilikan", options=_OWN_OPTS, width="medium"),
-                            "Kelas Jalan":         st.column_config.SelectboxColumn("Kelas Jalan", options=_ROAD_OPTS, width="medium"),
-                            "Jumlah Lajur":        st.column_config.SelectboxColumn("Jumlah Lajur", options=_LANE_OPTS, width="medium"),
-                            "Kor. Peruntukan (%)": st.column_config.NumberColumn("Kor. Peruntukan (%)", format="%.1f%%",
-                                                                                   min_value=-50.0, max_value=50.0, step=0.5, width="medium"),
-                        },
-                        hide_index=True,
-                    )
-                    # Simpan hasil edit kembali ke session_state
-                    st.session_state[_ss_adj_key] = edited
-
-                    # ── Compute all adjustments ──────────────────────────────────
-                    subj_loc_score = _road_total(subj_road_cls, subj_lajur)
-
-                    # Kepemilikan: SHM vs non-SHM = ±5% (flat, bukan per-ranking)
-                    def _kep_adj(comp_kep):
-                        if subj_kep == "SHM" and str(comp_kep) != "SHM":
-                            return 5.0   # pembanding lebih rendah → sesuaikan naik
-                        elif subj_kep != "SHM" and str(comp_kep) == "SHM":
-                            return -5.0  # pembanding lebih tinggi → sesuaikan turun
-                        return 0.0
-
-                    comp["Kor_Kepemilikan_%"] = edited["Kepemilikan"].apply(_kep_adj)
-                    comp["Kor_Lokasi_%"] = edited.apply(
-                        lambda r: (subj_loc_score - _road_total(r["Kelas Jalan"], r["Jumlah Lajur"])) * lokasi_ppt,
-                        axis=1,
-                    )
-                    comp["Kor_Peruntukan_%"] = pd.to_numeric(
-                        edited["Kor. Peruntukan (%)"], errors="coerce"
-                    ).fillna(0.0).values
-
-                    comp["Selisih_Tahun"]  = ref_year - comp["Tahun_Bersih"].fillna(ref_year)
-                    comp["Kor_Waktu_%"]    = comp["Selisih_Tahun"] * time_adj_pct
-                    if subj_luas > 0:
-                        comp["Selisih_Luas"] = comp["Luas_Tanah"].fillna(subj_luas) - subj_luas
-                        comp["Kor_Luas_%"]   = -(comp["Selisih_Luas"] / 100) * size_adj_pct
-                    else:
-                        comp["Kor_Luas_%"]   = 0.0
-
-                    # ── Total & bobot penyesuaian ────────────────────────────────
-                    comp["Kor_Diskon_%"] = -diskon_pct
-                    _kor_cols = ["Kor_Diskon_%", "Kor_Waktu_%", "Kor_Luas_%",
-                                 "Kor_Kepemilikan_%", "Kor_Lokasi_%", "Kor_Peruntukan_%"]
-                    comp["Total_Penyesuaian_%"] = comp[_kor_cols].sum(axis=1).round(2)
-                    comp["Total_Absolut_%"]     = comp[_kor_cols].abs().sum(axis=1).round(2)
-                    # Bobot: berbanding terbalik dengan total absolut
-                    _inv = 1.0 / (comp["Total_Absolut_%"] + 0.01)
-                    comp["Bobot_%"] = (_inv / _inv.sum() * 100).round(1)
-                    # Harga Final = Harga Awal × (1 + Total Penyesuaian) × Bobot
-                    comp["Harga_Stl_Koreksi"] = comp["Harga_Tanah"] * (1 + comp["Total_Penyesuaian_%"] / 100)
-                    comp["Harga_Final"]        = comp["Harga_Stl_Koreksi"] * comp["Bobot_%"] / 100
-
-                    # ── Summary table ────────────────────────────────────────────
-                    tbl = comp[[
-                        "Nomor", "Alamat", "Tahun_Bersih", "Luas_Tanah",
-                        "Harga_Tanah",
-                        "Kor_Diskon_%", "Kor_Waktu_%", "Kor_Luas_%",
-                        "Kor_Kepemilikan_%", "Kor_Lokasi_%", "Kor_Peruntukan_%",
-                        "Total_Penyesuaian_%", "Total_Absolut_%",
-                        "Bobot_%",
-                        "Harga_Stl_Koreksi",
-                        "Harga_Final",
-                    ]].copy()
-                    tbl.columns = [
-                        "Nomor", "Alamat", "Tahun", "Luas (m²)",
-                        "Harga Awal",
-                        "Kor. Diskon (%)", "Kor. Waktu (%)", "Kor. Luas (%)",
-                        "Kor. Kepemilikan (%)", "Kor. Lokasi (%)", "Kor. Peruntukan (%)",
-                        "Total Penyesuaian (%)", "Total Absolut (%)",
-                        "Bobot (%)",
-                        "Harga Terkoreksi",
-                        "Harga Final",
-                    ]
-                    st.markdown("##### 📊 Hasil Koreksi")
-                    st.dataframe(
-                        tbl,
-                        use_container_width=True,
-                        column_config={
-                            "Harga Awal":              st.column_config.NumberColumn("Harga Awal (Rp/m²)",      format="%.0f"),
-                            "Harga Terkoreksi":        st.column_config.NumberColumn("Harga Terkoreksi (Rp/m²)", format="%.0f"),
-                            "Harga Final":             st.column_config.NumberColumn("Harga Final (Rp/m²)",     format="%.0f"),
-                            "Kor. Diskon (%)":         st.column_config.NumberColumn(format="%.1f %%"),
-                            "Kor. Waktu (%)":          st.column_config.NumberColumn(format="%.1f %%"),
-                            "Kor. Luas (%)":           st.column_config.NumberColumn(format="%.1f %%"),
-                            "Kor. Kepemilikan (%)":    st.column_config.NumberColumn(format="%.1f %%"),
-                            "Kor. Lokasi (%)":         st.column_config.NumberColumn(format="%.1f %%"),
-                            "Kor. Peruntukan (%)":     st.column_config.NumberColumn(format="%.1f %%"),
-                            "Total Penyesuaian (%)":   st.column_config.NumberColumn(format="%.2f %%"),
-                            "Total Absolut (%)":       st.column_config.NumberColumn(format="%.2f %%"),
-                            "Bobot (%)":               st.column_config.NumberColumn(format="%.1f %%"),
-                            "Luas (m²)":               st.column_config.NumberColumn(format="%.0f m²"),
-                        },
-                    )
+    if tab_analisa.open:
+        st.subheader("🔄 Analisa Perbandingan & Indikasi Nilai")
+        st.markdown(
+            "Pilih data pembanding, masukkan parameter koreksi, lalu sistem menghitung "
+            "**harga indikasi** dan **koefisien variasi (CV)** sesuai standar penilaian."
+        )
 
-                    # ── Result metrics ───────────────────────────────────────────
-                    # Harga Final sudah menyertakan bobot, jadi indikasi = sum(Harga_Final)
-                    harga_indikasi = comp["Harga_Final"].sum()
-                    cv = (
-                        comp["Harga_Stl_Koreksi"].std() / comp["Harga_Stl_Koreksi"].mean() * 100
-                        if len(comp) > 1 and comp["Harga_Stl_Koreksi"].mean() != 0
-                        else 0.0
+        if filtered.empty:
+            st.warning("Tidak ada data yang sesuai dengan filter.")
+        else:
+            is_subject_mask = filtered["_is_obyek"]
+            subject_rows    = filtered.pilih(is_subject_mask).frame()
+            comparable_rows = filtered.pilih(~is_subject_mask).frame()
+
+            col_subj, col_comp = st.columns([1, 2])
+
+            with col_subj:
+                st.markdown("#### 🏠 Obyek Penilaian")
+                if not subject_rows.empty:
+                    s = subject_rows.iloc[0]
+                    if len(subject_rows) > 1:
+                        _subj_lbl = st.selectbox(
+                            "Pilih Obyek Penilaian", subject_rows.index.tolist(),
+                            format_func=lambda i: f"{subject_rows.at[i, 'Nomor']} — {subject_rows.at[i, 'Alamat'] if 'Alamat' in subject_rows.columns else ''}",
+                            key="an_subj_row",
+                        )
+                        s = subject_rows.loc[_subj_lbl]
+                    subj_luas  = float(s.get("Luas_Tanah") or 0)
+                    _h = s.get("Harga_Tanah")
+                    subj_harga = float(_h) if (_h is not None and not pd.isna(_h)) else 0.0
+                    harga_disp = format_currency(subj_harga) + "/m²" if subj_harga > 0 else "belum dinilai"
+                    st.info(
+                        f"**Alamat:** {s.get('Alamat', '-')}  \n"
+                        f"**Kecamatan:** {s.get('Kecamatan', '-')}  \n"
+                        f"**Luas Tanah:** {subj_luas:,.0f} m²  \n"
+                        f"**Kepemilikan:** {s.get('Kepemilikan', '-')}  \n"
+                        f"**Harga Indikasi Awal:** {harga_disp}"
                     )
-
-                    st.divider()
-                    mc1, mc2, mc3 = st.columns(3)
-                    mc1.metric("💰 Harga Indikasi",         format_currency(harga_indikasi) + "/m²")
-                    mc2.metric("📊 Koefisien Variasi (CV)", f"{cv:.1f}%")
-                    mc3.metric("📈 Jumlah Pembanding",      len(comp))
-
-                    if cv <= 20:
-                        st.success(f"✅ CV = {cv:.1f}% ≤ 20% → Homogen. Hasil dapat diandalkan.")
-                    elif cv <= 30:
-                        st.warning(f"⚠️ CV = {cv:.1f}% (20–30%) → Cukup beragam. Pertimbangkan tinjau ulang data.")
+                    _kep_def = detect_kep(s.get("Kepemilikan", "SHM"))
+                    subj_kep = st.selectbox("Bukti Kepemilikan Obyek", OWN_OPTS,
+                                            index=OWN_OPTS.index(_kep_def) if _kep_def in OWN_OPTS else 0,
+                                            key="an_subj_kep")
+                    # Default tahun dari Tanggal Inspeksi
+                    _default_ref_year = tahun_referensi(s.get("Tanggal_Inspeksi"))
+                    # Skor peruntukan obyek untuk auto-koreksi
+                    _subj_perun_score = peruntukan_score(s.get("Peruntukan", ""))
+                else:
+                    st.warning("Tidak ada baris 'Obyek Penilaian' di data. Masukkan manual:")
+                    subj_luas  = st.number_input("Luas Tanah Obyek (m²)", value=0.0, min_value=0.0, step=10.0)
+                    subj_harga = 0.0
+                    subj_kep   = st.selectbox("Bukti Kepemilikan Obyek", OWN_OPTS, key="an_subj_kep")
+                    _default_ref_year = TAHUN_REF_DEFAULT
+                    _subj_perun_score = None
+
+                st.markdown("##### 🛣️ Lokasi Obyek")
+                subj_road_cls = st.selectbox("Kelas Jalan Obyek", ROAD_OPTS, index=ROAD_OPTS.index(JALAN_OBYEK),
+                                             key="an_subj_road_cls")
+                subj_lajur    = st.selectbox("Jumlah Lajur Obyek", LANE_OPTS, index=LANE_OPTS.index(LAJUR_OBYEK),
+                                             key="an_subj_lajur")
+
+                st.markdown("#### ⚙️ Parameter Koreksi")
+                ref_year       = st.number_input("Tahun Referensi Penilaian", value=_default_ref_year,
+                                                  min_value=2000, max_value=2100, step=1)
+                diskon_pct     = st.number_input("Diskon Penawaran (%)", value=10.0,
+                                                  min_value=0.0, max_value=50.0, step=0.5,
+                                                  help="Diskon dari harga penawaran ke harga transaksi (berlaku untuk semua data pembanding)")
+                time_adj_pct   = st.number_input("Koreksi Waktu (%/tahun)", value=5.0,
+                                                  min_value=0.0, max_value=50.0, step=0.5,
+                                                  help="Kenaikan harga pasar per tahun (positif = pasar naik)")
+                size_adj_pct   = st.number_input("Koreksi Luas (%/100m²)", value=0.5,
+                                                  min_value=0.0, max_value=20.0, step=0.5,
+                                                  help="Penyesuaian harga akibat perbedaan luas per 100m²")
+                lokasi_ppt     = st.number_input("Koreksi Lokasi (%/poin)", value=5.0,
+                                                  min_value=0.0, max_value=20.0, step=0.5,
+                                                  help="Penyesuaian per poin perbedaan skor lokasi (kelas jalan + jumlah lajur)")
+
+            with col_comp:
+                st.markdown("#### 📋 Pilih Data Pembanding")
+                if comparable_rows.empty:
+                    st.warning("Tidak ada data pembanding tersedia.")
+                else:
+                    # ── Pembanding otomatis: k terdekat dari Obyek via indeks spasial ──
+                    terdekat = pd.DataFrame()
+                    if not subject_rows.empty:
+                        with st.expander("🎯 Pembanding terdekat otomatis", expanded=True):
+                            a1, a2, a3, a4 = st.columns(4)
+                            auto_k      = a1.number_input("Jumlah (k)", value=3, min_value=1, max_value=20, step=1)
+                            auto_radius = a2.number_input("Radius (km, 0 = bebas)", value=0.0, min_value=0.0, step=0.5)
+                            _thn_opts   = ["Semua"] + [str(y) for y in sorted(comparable_rows["Tahun_Bersih"].dropna().unique().astype(int))]
+                            auto_tahun  = a3.selectbox("Tahun ≥", _thn_opts)
+                            auto_jenis  = a4.checkbox("Jenis properti sama", value=False)
+                            terdekat = pembanding_terdekat(
+                                spatial_index(dataset_key), comparable_rows, s,
+                                k=int(auto_k),
+                                radius_km=auto_radius or None,
+                                jenis=s.get("Jenis_Properti") if auto_jenis else None,
+                                min_tahun=None if auto_tahun == "Semua" else int(auto_tahun),
+                            )
+                            if terdekat.empty:
+                                st.caption("Tidak ada pembanding berkoordinat yang memenuhi kriteria.")
+                            else:
+                                st.caption("Terdekat: " + " · ".join(
+                                    f"{comparable_rows.at[i, 'Nomor']} ({d:.2f} km)"
+                                    for i, d in terdekat["Jarak_km"].items()
+                                ))
+
+                    nomor_opts = comparable_rows["Nomor"].astype(str).tolist()
+                    if not terdekat.empty:
+                        # Urutkan opsi: kandidat terdekat di depan
+                        _auto = comparable_rows.loc[terdekat.index, "Nomor"].astype(str).tolist()
+                        nomor_opts = _auto + [n for n in nomor_opts if n not in set(_auto)]
+                        default_sel = _auto
                     else:
-                        st.error(f"❌ CV = {cv:.1f}% > 30% → Sangat beragam. Ganti/perbaiki data pembanding.")
-
-                    # ── Bar chart ────────────────────────────────────────────────
-                    fig = go.Figure()
-                    fig.add_trace(go.Bar(x=comp["Nomor"].astype(str), y=comp["Harga_Tanah"],
-                                         name="Harga Awal", marker_color="#a8d8ea"))
-                    fig.add_trace(go.Bar(x=comp["Nomor"].astype(str), y=comp["Harga_Stl_Koreksi"],
-                                         name="Harga Terkoreksi", marker_color="#667eea"))
-                    if subj_harga > 0:
-                        fig.add_hline(y=subj_harga, line_dash="dash", line_color="red",
-                                      annotation_text=f"Harga Obyek: {format_currency(subj_harga)}")
-                    fig.add_hline(y=harga_indikasi, line_dash="dot", line_color="green",
-                                  annotation_text=f"Indikasi: {format_currency(harga_indikasi)}")
-                    fig.update_layout(
-                        title="Perbandingan Harga Data Pembanding",
-                        barmode="group",
-                        xaxis_title="Nomor Data",
-                        yaxis_title="Harga (Rp/m²)",
-                        margin=dict(t=50, b=20),
+                        default_sel = nomor_opts[:min(3, len(nomor_opts))]
+                    selected   = st.multiselect(
+                        "Pilih nomor data pembanding (disarankan 3–5 data):",
+                        options=nomor_opts,
+                        default=default_sel,
                     )
-                    st.plotly_chart(fig, use_container_width=True)
 
-                    # ── Download ─────────────────────────────────────────────────
-                    st.download_button(
-                        label="📥 Download Hasil Perbandingan",
-                        data=to_excel_bytes(tbl),
-                        file_name=f"analisa_perbandingan_{city_label}_{selected_year}.xlsx",
-                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                    )
+                    if selected:
+                        comp = (comparable_rows[comparable_rows["Nomor"].astype(str).isin(selected)]
+                                .copy().reset_index(drop=True))
+                        # Jarak dari obyek yang sedang dianalisa (bisa berbeda dari obyek terdekat)
+                        if not subject_rows.empty:
+                            comp["Jarak_km"] = haversine_km(s.get("Latitude"), s.get("Longitude"),
+                                                            comp["Latitude"], comp["Longitude"])
+
+                        # ── Editable per-comparable adjustment table ─────────────────
+                        st.markdown("##### ✏️ Penyesuaian Per Data Pembanding")
+                        st.caption(
+                            "Kepemilikan & Peruntukan otomatis terbaca dari data. "
+                            "Isi Kelas Jalan, Jumlah Lajur, dan koreksi bisa diubah manual."
+                        )
+
+                        # Kepemilikan & Kor. Peruntukan terbaca dari data, jalan/lajur default
+                        edit_init = grid_awal(comp, _subj_perun_score)
+
+                        # Simpan ke session_state agar perubahan pengguna tidak hilang saat rerun
+                        _ss_adj_key = f"adj_df_{'_'.join(sorted(str(x) for x in selected))}"
+                        if _ss_adj_key not in st.session_state:
+                            st.session_state[_ss_adj_key] = edit_init.copy()
+
+                        edited = st.data_editor(
+                            st.session_state[_ss_adj_key],
+                            use_container_width=True,
+                            column_config={
+                                "No":                  st.column_config.TextColumn("No", disabled=True, width="small"),
+                                "Alamat":              st.column_config.TextColumn("Alamat", disabled=True, width="large"),
+                                "Kepemilikan":         st.column_config.SelectboxColumn("Kepemilikan", options=OWN_OPTS, width="medium"),
+                                "Kelas Jalan":         st.column_config.SelectboxColumn("Kelas Jalan", options=ROAD_OPTS, width="medium"),
+                                "Jumlah Lajur":        st.column_config.SelectboxColumn("Jumlah Lajur", options=LANE_OPTS, width="medium"),
+                                "Kor. Peruntukan (%)": st.column_config.NumberColumn("Kor. Peruntukan (%)", format="%.1f%%",
+                                                                                       min_value=-50.0, max_value=50.0, step=0.5, width="medium"),
+                            },
+                            hide_index=True,
+                        )
+                        # Simpan hasil edit kembali ke session_state
+                        st.session_state[_ss_adj_key] = edited
+
+                        # ── Koreksi, bobot & tabel hasil (pangkalan.analisa) ─────────
+                        comp = hitung_koreksi(
+                            comp, edited, subj_luas, subj_kep, road_total(subj_road_cls, subj_lajur),
+                            ParameterKoreksi(ref_year, diskon_pct, time_adj_pct, size_adj_pct, lokasi_ppt),
+                        )
+                        tbl = tabel_hasil(comp)
+                        st.markdown("##### 📊 Hasil Koreksi")
+                        st.dataframe(
+                            tbl,
+                            use_container_width=True,
+                            column_config={
+                                "Harga Awal":              st.column_config.NumberColumn("Harga Awal (Rp/m²)",      format="%.0f"),
+                                "Harga Terkoreksi":        st.column_config.NumberColumn("Harga Terkoreksi (Rp/m²)", format="%.0f"),
+                                "Harga Final":             st.column_config.NumberColumn("Harga Final (Rp/m²)",     format="%.0f"),
+                                "Kor. Diskon (%)":         st.column_config.NumberColumn(format="%.1f %%"),
+                                "Kor. Waktu (%)":          st.column_config.NumberColumn(format="%.1f %%"),
+                                "Kor. Luas (%)":           st.column_config.NumberColumn(format="%.1f %%"),
+                                "Kor. Kepemilikan (%)":    st.column_config.NumberColumn(format="%.1f %%"),
+                                "Kor. Lokasi (%)":         st.column_config.NumberColumn(format="%.1f %%"),
+                                "Kor. Peruntukan (%)":     st.column_config.NumberColumn(format="%.1f %%"),
+                                "Total Penyesuaian (%)":   st.column_config.NumberColumn(format="%.2f %%"),
+                                "Total Absolut (%)":       st.column_config.NumberColumn(format="%.2f %%"),
+                                "Bobot (%)":               st.column_config.NumberColumn(format="%.1f %%"),
+                                "Luas (m²)":               st.column_config.NumberColumn(format="%.0f m²"),
+                                "Jarak (km)":              st.column_config.NumberColumn(format="%.2f km"),
+                            },
+                        )
+
+                        # ── Result metrics ───────────────────────────────────────────
+                        harga_indikasi, cv = indikasi(comp)
+
+                        st.divider()
+                        mc1, mc2, mc3 = st.columns(3)
+                        mc1.metric("💰 Harga Indikasi",         format_currency(harga_indikasi) + "/m²")
+                        mc2.metric("📊 Koefisien Variasi (CV)", f"{cv:.1f}%")
+                        mc3.metric("📈 Jumlah Pembanding",      len(comp))
+
+                        if cv <= 20:
+                            st.success(f"✅ CV = {cv:.1f}% ≤ 20% → Homogen. Hasil dapat diandalkan.")
+                        elif cv <= 30:
+                            st.warning(f"⚠️ CV = {cv:.1f}% (20–30%) → Cukup beragam. Pertimbangkan tinjau ulang data.")
+                        else:
+                            st.error(f"❌ CV = {cv:.1f}% > 30% → Sangat beragam. Ganti/perbaiki data pembanding.")
+
+                        # ── Bar chart ────────────────────────────────────────────────
+                        fig = go.Figure()
+                        fig.add_trace(go.Bar(x=comp["Nomor"].astype(str), y=comp["Harga_Tanah"],
+                                             name="Harga Awal", marker_color="#a8d8ea"))
+                        fig.add_trace(go.Bar(x=comp["Nomor"].astype(str), y=comp["Harga_Stl_Koreksi"],
+                                             name="Harga Terkoreksi", marker_color="#667eea"))
+                        if subj_harga > 0:
+                            fig.add_hline(y=subj_harga, line_dash="dash", line_color="red",
+                                          annotation_text=f"Harga Obyek: {format_currency(subj_harga)}")
+                        fig.add_hline(y=harga_indikasi, line_dash="dot", line_color="green",
+                                      annotation_text=f"Indikasi: {format_currency(harga_indikasi)}")
+                        fig.update_layout(
+                            title="Perbandingan Harga Data Pembanding",
+                            barmode="group",
+                            xaxis_title="Nomor Data",
+                            yaxis_title="Harga (Rp/m²)",
+                            margin=dict(t=50, b=20),
+                        )
+                        st.plotly_chart(fig, use_container_width=True)
+
+                        # ── Download ─────────────────────────────────────────────────
+                        st.download_button(
+                            label="📥 Download Hasil Perbandingan",
+                            data=lambda: ekspor_excel(tbl),
+                            file_name=f"analisa_perbandingan_{city_label}_{selected_year}.xlsx",
+                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                        )
@@ -0,0 +1,89 @@
+"""Pipeline data Pangkalan Data Tanah KJPP SRR (tanpa ketergantungan ke Streamlit)."""
+from .analisa import (
+    ParameterKoreksi,
+    grid_awal,
+    hitung_koreksi,
+    indikasi,
+    nilai_obyek,
+    nilai_semua,
+    tabel_hasil,
+)
+from .filters import FilterIndex, Tampilan, is_obyek_series
+from .ingest import (
+    KNOWN_SHEETS,
+    WorkbookBundle,
+    load_bangunan_sheet,
+    load_btb_sheet,
+    load_pembanding_sheet,
+    load_properti_sheet,
+    read_workbook,
+)
+from .koreksi import harga_koreksi_waktu, koreksi_btb, siapkan_data, tahun_bersih_series
+from .paralel import read_workbooks
+from .parsing import (
+    parse_indo_number,
+    parse_indo_number_series,
+    parse_koordinat,
+    parse_koordinat_series,
+    ringkas_status_koordinat,
+    validasi_koordinat,
+)
+from .search import NgramIndex
+from .skema import laporan_memori, ringkas_tipe
+from .spatial import (
+    PermukaanHarga,
+    SpatialIndex,
+    bounds_sekitar,
+    grid_harga,
+    haversine_km,
+    pembanding_terdekat,
+    permukaan_idw,
+)
+from .statistik import GarisOLS, fit_ols, fit_ols_per_grup
+from .store import DatasetStore, content_hash
+
+__all__ = [
+    "KNOWN_SHEETS",
+    "DatasetStore",
+    "FilterIndex",
+    "GarisOLS",
+    "NgramIndex",
+    "ParameterKoreksi",
+    "PermukaanHarga",
+    "SpatialIndex",
+    "Tampilan",
+    "WorkbookBundle",
+    "bounds_sekitar",
+    "content_hash",
+    "fit_ols",
+    "fit_ols_per_grup",
+    "grid_awal",
+    "grid_harga",
+    "harga_koreksi_waktu",
+    "haversine_km",
+    "hitung_koreksi",
+    "indikasi",
+    "is_obyek_series",
+    "koreksi_btb",
+    "laporan_memori",
+    "load_bangunan_sheet",
+    "load_btb_sheet",
+    "load_pembanding_sheet",
+    "load_properti_sheet",
+    "nilai_obyek",
+    "nilai_semua",
+    "parse_indo_number",
+    "parse_indo_number_series",
+    "parse_koordinat",
+    "parse_koordinat_series",
+    "pembanding_terdekat",
+    "permukaan_idw",
+    "read_workbook",
+    "read_workbooks",
+    "ringkas_status_koordinat",
+    "ringkas_tipe",
+    "siapkan_data",
+    "tabel_hasil",
+    "tahun_bersih_series",
+    "validasi_koordinat",
+]
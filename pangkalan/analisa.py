@@ -0,0 +1,258 @@
+"""
+Analisa perbandingan (pendekatan data pasar): skor lokasi/peruntukan,
+grid penyesuaian per pembanding, harga indikasi & CV. Dipakai tab Analisa
+dan penilaian batch (CLI) — satu sumber rumus.
+"""
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .filters import _kolom, is_obyek_series
+from .spatial import SpatialIndex, haversine_km, pembanding_terdekat
+
+# ─── Tabel skor ──────────────────────────────────────────────────────────────
+ROAD_SCORE = {"Arteri": 4, "Kolektor": 3, "Lokal": 2, "Lingkungan": 1}
+LANE_SCORE = {"Gang": 0, "1 lajur": 1, "2 lajur": 2, "4 lajur": 3, "6 lajur": 4, "8 lajur": 5}
+OWN_OPTS   = ["SHM", "SHSRS", "SHGB", "HGB", "SHP", "HP", "HGU", "Girik/AJB", "Lainnya"]
+ROAD_OPTS  = list(ROAD_SCORE.keys())
+LANE_OPTS  = list(LANE_SCORE.keys())
+
+# Default isian grid (sama dengan default widget tab Analisa)
+JALAN_OBYEK, LAJUR_OBYEK = "Kolektor", "2 lajur"
+JALAN_PEMBANDING, LAJUR_PEMBANDING = "Lokal", "2 lajur"
+TAHUN_REF_DEFAULT = 2025
+
+KOLOM_KOREKSI = ["Kor_Diskon_%", "Kor_Waktu_%", "Kor_Luas_%",
+                 "Kor_Kepemilikan_%", "Kor_Lokasi_%", "Kor_Peruntukan_%"]
+
+# Kolom hasil koreksi → judul tabel (tampilan & ekspor)
+KOLOM_HASIL = {
+    "Nomor":               "Nomor",
+    "Alamat":              "Alamat",
+    "Jarak_km":            "Jarak (km)",
+    "Tahun_Bersih":        "Tahun",
+    "Luas_Tanah":          "Luas (m²)",
+    "Harga_Tanah":         "Harga Awal",
+    "Kor_Diskon_%":        "Kor. Diskon (%)",
+    "Kor_Waktu_%":         "Kor. Waktu (%)",
+    "Kor_Luas_%":          "Kor. Luas (%)",
+    "Kor_Kepemilikan_%":   "Kor. Kepemilikan (%)",
+    "Kor_Lokasi_%":        "Kor. Lokasi (%)",
+    "Kor_Peruntukan_%":    "Kor. Peruntukan (%)",
+    "Total_Penyesuaian_%": "Total Penyesuaian (%)",
+    "Total_Absolut_%":     "Total Absolut (%)",
+    "Bobot_%":             "Bobot (%)",
+    "Harga_Stl_Koreksi":   "Harga Terkoreksi",
+    "Harga_Final":         "Harga Final",
+}
+
+
+@dataclass
+class ParameterKoreksi:
+    """Parameter koreksi tab Analisa (persen)."""
+    ref_year:     int   = TAHUN_REF_DEFAULT
+    diskon_pct:   float = 10.0       # harga penawaran → transaksi
+    time_adj_pct: float = 5.0        # per tahun
+    size_adj_pct: float = 0.5        # per 100 m² selisih luas
+    lokasi_ppt:   float = 5.0        # per poin selisih skor lokasi
+
+
+def road_total(kelas, lajur):
+    return ROAD_SCORE.get(str(kelas), 2) + LANE_SCORE.get(str(lajur), 1)
+
+def peruntukan_score(val):
+    """Skor peruntukan: Komersial(5) > Perumahan(4) > Industri(3) > Pertanian(2) > Fasilitias Umum(1)."""
+    v = str(val).lower()
+    if any(k in v for k in ["komersial", "perdagangan", "jasa", "niaga", "bisnis"]):
+        return 5
+    if any(k in v for k in ["permukiman", "perumahan", "hunian", "residensial"]):
+        return 4
+    if "industri" in v:
+        return 3
+    if any(k in v for k in ["pertanian", "sawah", "kebun", "perkebunan", "ladang"]):
+        return 2
+    if any(k in v for k in ["fasilitas", "fasum", "sosial", "pendidikan", "kesehatan"]):
+        return 1
+    return None
+
+def detect_kep(val):
+    v = str(val).strip().upper().replace(" ", "")
+    for k in OWN_OPTS:
+        if k.upper().replace(" ", "") in v:
+            return k
+    return "Lainnya"
+
+def tahun_referensi(tgl_inspeksi, default=TAHUN_REF_DEFAULT):
+    """Tahun referensi penilaian dari Tanggal_Inspeksi obyek."""
+    try:
+        th = pd.to_datetime(str(tgl_inspeksi), dayfirst=True, errors="coerce").year
+        return default if pd.isna(th) else int(th)
+    except Exception:
+        return default
+
+
+# ─── Grid penyesuaian & hitungan ─────────────────────────────────────────────
+def grid_awal(comp, subj_perun_score):
+    """
+    Isian awal grid penyesuaian per pembanding (kolom seperti editor tab
+    Analisa): kepemilikan & koreksi peruntukan terbaca dari data, kelas
+    jalan/lajur pembanding default.
+    """
+    def perun_adj(val):
+        comp_score = peruntukan_score(val)
+        if subj_perun_score is None or comp_score is None:
+            return 0.0
+        return round((subj_perun_score - comp_score) * 2.5, 1)
+
+    n = len(comp)
+    return pd.DataFrame({
+        "No":                  comp["Nomor"].astype(str).tolist(),
+        "Alamat":              comp["Alamat"].astype(object).fillna("—").tolist() if "Alamat" in comp.columns else ["—"] * n,
+        "Kepemilikan":         [detect_kep(v) for v in comp["Kepemilikan"]] if "Kepemilikan" in comp.columns
+                               else ["Lainnya"] * n,
+        "Kelas Jalan":         [JALAN_PEMBANDING] * n,
+        "Jumlah Lajur":        [LAJUR_PEMBANDING] * n,
+        "Kor. Peruntukan (%)": [perun_adj(v) for v in comp["Peruntukan"]] if "Peruntukan" in comp.columns
+                               else [0.0] * n,
+    })
+
+def hitung_koreksi(comp, grid, subj_luas, subj_kep, subj_loc_score, param):
+    """
+    Kolom koreksi, total, bobot dan harga terkoreksi/final per pembanding.
+    `grid` = grid penyesuaian (baris sejajar `comp`). Return salinan comp.
+    """
+    comp = comp.reset_index(drop=True)
+
+    # Kepemilikan: SHM vs non-SHM = ±5% (flat, bukan per-ranking)
+    def kep_adj(comp_kep):
+        if subj_kep == "SHM" and str(comp_kep) != "SHM":
+            return 5.0   # pembanding lebih rendah → sesuaikan naik
+        elif subj_kep != "SHM" and str(comp_kep) == "SHM":
+            return -5.0  # pembanding lebih tinggi → sesuaikan turun
+        return 0.0
+
+    comp["Kor_Kepemilikan_%"] = grid["Kepemilikan"].apply(kep_adj).to_numpy()
+    comp["Kor_Lokasi_%"] = grid.apply(
+        lambda r: (subj_loc_score - road_total(r["Kelas Jalan"], r["Jumlah Lajur"])) * param.lokasi_ppt,
+        axis=1,
+    ).to_numpy(dtype="float64")
+    comp["Kor_Peruntukan_%"] = pd.to_numeric(grid["Kor. Peruntukan (%)"], errors="coerce").fillna(0.0).values
+
+    comp["Selisih_Tahun"] = param.ref_year - comp["Tahun_Bersih"].astype("float64").fillna(param.ref_year)
+    comp["Kor_Waktu_%"]   = comp["Selisih_Tahun"] * param.time_adj_pct
+    if subj_luas > 0:
+        comp["Selisih_Luas"] = comp["Luas_Tanah"].fillna(subj_luas) - subj_luas
+        comp["Kor_Luas_%"]   = -(comp["Selisih_Luas"] / 100) * param.size_adj_pct
+    else:
+        comp["Kor_Luas_%"]   = 0.0
+
+    # ── Total & bobot penyesuaian ──
+    comp["Kor_Diskon_%"] = -param.diskon_pct
+    comp["Total_Penyesuaian_%"] = comp[KOLOM_KOREKSI].sum(axis=1).round(2)
+    comp["Total_Absolut_%"]     = comp[KOLOM_KOREKSI].abs().sum(axis=1).round(2)
+    # Bobot: berbanding terbalik dengan total absolut
+    inv = 1.0 / (comp["Total_Absolut_%"] + 0.01)
+    comp["Bobot_%"] = (inv / inv.sum() * 100).round(1)
+    # Harga Final = Harga Awal × (1 + Total Penyesuaian) × Bobot
+    comp["Harga_Stl_Koreksi"] = comp["Harga_Tanah"] * (1 + comp["Total_Penyesuaian_%"] / 100)
+    comp["Harga_Final"]       = comp["Harga_Stl_Koreksi"] * comp["Bobot_%"] / 100
+    return comp
+
+def tabel_hasil(comp):
+    """Tabel hasil koreksi dengan judul kolom tampilan."""
+    return comp[list(KOLOM_HASIL)].rename(columns=KOLOM_HASIL)
+
+def indikasi(comp):
+    """(harga_indikasi, cv_%) — Harga_Final sudah berbobot, jadi indikasi = jumlahnya."""
+    harga = comp["Harga_Final"].sum()
+    mean = comp["Harga_Stl_Koreksi"].mean()
+    cv = comp["Harga_Stl_Koreksi"].std() / mean * 100 if len(comp) > 1 and mean != 0 else 0.0
+    return harga, cv
+
+
+# ─── Penilaian batch ─────────────────────────────────────────────────────────
+def nilai_obyek(df, sidx, subj, param=None, k=3, radius_km=None):
+    """
+    Analisa satu Obyek Penilaian dengan isian default tab Analisa: k
+    pembanding terdekat (SpatialIndex `sidx`), grid awal, koreksi.
+    `param.ref_year` None → dari Tanggal_Inspeksi obyek.
+    Return (ringkasan dict, tabel_hasil) — tabel kosong jika tanpa pembanding.
+    """
+    param = param or ParameterKoreksi(ref_year=None)
+    if param.ref_year is None:
+        param = ParameterKoreksi(**{**vars(param), "ref_year": tahun_referensi(subj.get("Tanggal_Inspeksi"))})
+    _h = subj.get("Harga_Tanah")
+    ring = {
+        "Nomor":       subj.get("Nomor"),
+        "Alamat":      subj.get("Alamat"),
+        "Kecamatan":   subj.get("Kecamatan"),
+        "Kota":        subj.get("Kota"),
+        "Kode_Inspeksi": subj.get("Kode_Inspeksi"),
+        "Berkas":      subj.get("_berkas"),
+        "Luas_Tanah":  subj.get("Luas_Tanah"),
+        "Harga_Awal":  float(_h) if (_h is not None and not pd.isna(_h)) else np.nan,
+        "Tahun_Referensi": param.ref_year,
+    }
+    terdekat = pembanding_terdekat(sidx, df, subj, k=k, radius_km=radius_km)
+    if terdekat.empty:
+        return {**ring, "Jumlah_Pembanding": 0, "Harga_Indikasi": np.nan, "CV_%": np.nan}, pd.DataFrame()
+
+    comp = df.loc[terdekat.index].reset_index(drop=True)
+    comp["Jarak_km"] = haversine_km(subj.get("Latitude"), subj.get("Longitude"), comp["Latitude"], comp["Longitude"])
+    subj_luas = float(subj.get("Luas_Tanah") or 0)
+    if pd.isna(subj_luas):
+        subj_luas = 0.0
+    comp = hitung_koreksi(
+        comp, grid_awal(comp, peruntukan_score(subj.get("Peruntukan", ""))),
+        subj_luas, detect_kep(subj.get("Kepemilikan", "SHM")), road_total(JALAN_OBYEK, LAJUR_OBYEK), param,
+    )
+    harga, cv = indikasi(comp)
+    return ({**ring, "Jumlah_Pembanding": len(comp), "Harga_Indikasi": harga, "CV_%": cv},
+            tabel_hasil(comp))
+
+# Dataset untuk worker (diwarisi lewat fork, tidak di-pickle per tugas)
+_KERJA = {}
+
+def _nilai_posisi(posisi):
+    df, sidx, param, k, radius_km = (_KERJA[x] for x in ("df", "sidx", "param", "k", "radius_km"))
+    return [nilai_obyek(df, sidx, df.iloc[p], param, k, radius_km) for p in posisi]
+
+def nilai_semua(df, param=None, k=3, radius_km=None, workers=None, progres=None):
+    """
+    Harga indikasi untuk setiap Obyek Penilaian di `df` (hasil siapkan_data).
+    Obyek dibagi ke proses (fork) per potongan; urutan hasil = urutan obyek.
+    Return (ringkasan, rincian) — rincian = tabel_hasil semua obyek + kolom
+    "Obyek" (Nomor obyek) dan "Obyek_Baris" (label baris obyek).
+    """
+    from .paralel import BISA_FORK, pool_fork
+
+    obyek = is_obyek_series(_kolom(df, "Nomor")).to_numpy(dtype=bool)
+    sidx = SpatialIndex.from_frame(df, mask=~obyek)
+    posisi = np.flatnonzero(obyek)
+    workers = workers or os.cpu_count() or 1
+    potongan = [p for p in np.array_split(posisi, min(len(posisi), workers * 4)) if len(p)] if len(posisi) else []
+
+    _KERJA.update(df=df, sidx=sidx, param=param, k=k, radius_km=radius_km)
+    try:
+        hasil = []
+        if workers > 1 and BISA_FORK and len(potongan) > 1:
+            with pool_fork(min(workers, len(potongan))) as pool:
+                for i, h in enumerate(pool.map(_nilai_posisi, potongan), 1):
+                    hasil += h
+                    if progres:
+                        progres(i, len(potongan))
+        else:
+            for i, p in enumerate(potongan, 1):
+                hasil += _nilai_posisi(p)
+                if progres:
+                    progres(i, len(potongan))
+    finally:
+        _KERJA.clear()
+
+    ringkasan = pd.DataFrame([r for r, _ in hasil], index=df.index[posisi])
+    rincian = [t.assign(Obyek=r["Nomor"], Obyek_Baris=lbl)
+               for (r, t), lbl in zip(hasil, df.index[posisi]) if not t.empty]
+    rincian = pd.concat(rincian, ignore_index=True) if rincian else pd.DataFrame(columns=list(KOLOM_HASIL.values()))
+    return ringkasan, rincian
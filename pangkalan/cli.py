@@ -0,0 +1,131 @@
+"""
+CLI batch tanpa Streamlit — ingesti folder workbook dan penilaian ulang
+massal (mis. job malam):
+
+    python -m pangkalan ingest <folder|xlsx>... [--gabung]
+    python -m pangkalan nilai  <folder|xlsx>... | --dataset KEY | --gabungan  --out <folder>
+"""
+import argparse
+import os
+import sys
+import time
+
+from .analisa import ParameterKoreksi, nilai_semua
+from .ekspor import FORMAT_EKSPOR
+from .koreksi import siapkan_data
+from .store import DEFAULT_STORE_DIR, NAMA_GABUNGAN, DatasetStore
+
+
+def _log(msg):
+    print(msg, file=sys.stderr, flush=True)
+
+def _progres(label):
+    def cetak(selesai, total):
+        _log(f"  {label}: {selesai}/{total}")
+    return cetak
+
+def _daftar_xlsx(sumber):
+    """Path xlsx dari argumen (file atau folder, tidak rekursif), urut nama."""
+    paths = []
+    for s in sumber:
+        if os.path.isdir(s):
+            paths += sorted(os.path.join(s, f) for f in os.listdir(s)
+                            if f.lower().endswith(".xlsx") and not f.startswith("~$"))
+        else:
+            paths.append(s)
+    return paths
+
+def _ingest(store, sumber, workers, gabung):
+    """Ingesti sumber → key dataset; lebih dari satu workbook (atau --gabung) → pangkalan gabungan."""
+    paths = _daftar_xlsx(sumber)
+    if not paths:
+        raise SystemExit("Tidak ada file .xlsx di sumber yang diberikan")
+    datas = []
+    for p in paths:
+        with open(p, "rb") as f:
+            datas.append(f.read())
+    t = time.perf_counter()
+    keys = store.ingest_banyak(datas, [os.path.basename(p) for p in paths],
+                               progres=_progres("parsing"), workers=workers)
+    _log(f"{len(paths)} workbook diingesti dalam {time.perf_counter() - t:.1f} s")
+    if len(keys) == 1 and not gabung:
+        return keys[0]
+    nama = gabung or NAMA_GABUNGAN
+    key, r = store.gabung(keys, nama=nama)
+    _log(f"{nama}: {r['workbook']} workbook baru, {r['baru']:,} rekaman baru, "
+         f"{r['berubah']:,} diperbarui, {r['duplikat']:,} duplikat dilewati")
+    return key
+
+
+def cmd_ingest(args, store):
+    key = _ingest(store, args.sumber, args.workers, args.gabung)
+    print(key)
+
+def cmd_nilai(args, store):
+    if args.dataset:
+        key = args.dataset
+    elif args.gabungan:
+        meta = store.gabungan(args.gabungan)
+        if meta is None:
+            raise SystemExit(f"Pangkalan gabungan '{args.gabungan}' belum ada")
+        key = meta["key"]
+    elif args.sumber:
+        key = _ingest(store, args.sumber, args.workers, args.gabung)
+    else:
+        raise SystemExit("Beri sumber workbook, --dataset atau --gabungan")
+    if not store.terkini(key):
+        _log(f"Peringatan: dataset {key[:10]} tersimpan dengan format lama — ingesti ulang workbook-nya")
+
+    df, msg = siapkan_data(store.load(key))
+    _log(msg)
+    param = ParameterKoreksi(ref_year=args.tahun, diskon_pct=args.diskon, time_adj_pct=args.waktu,
+                             size_adj_pct=args.luas, lokasi_ppt=args.lokasi)
+    t = time.perf_counter()
+    ringkasan, rincian = nilai_semua(df, param, k=args.k, radius_km=args.radius or None,
+                                     workers=args.workers, progres=_progres("penilaian"))
+    _log(f"{len(ringkasan)} obyek dinilai dalam {time.perf_counter() - t:.1f} s")
+
+    os.makedirs(args.out, exist_ok=True)
+    fmt = FORMAT_EKSPOR[args.format]
+    for nama, tabel in (("ringkasan", ringkasan), ("rincian", rincian)):
+        path = os.path.join(args.out, f"{nama}.{fmt.ekstensi}")
+        with open(path, "wb") as f:
+            fmt.tulis(tabel, f)
+        print(path)
+
+
+def buat_parser():
+    p = argparse.ArgumentParser(prog="python -m pangkalan", description="Pangkalan Data Tanah — batch")
+    p.add_argument("--store", default=DEFAULT_STORE_DIR, help="folder pangkalan data (default: %(default)s)")
+    p.add_argument("--workers", type=int, default=None, help="jumlah proses (default: jumlah core)")
+    sub = p.add_subparsers(dest="perintah", required=True)
+
+    def sumber(sp):
+        sp.add_argument("sumber", nargs="*", help="file .xlsx atau folder berisi .xlsx")
+        sp.add_argument("--gabung", nargs="?", const=NAMA_GABUNGAN, default=None, metavar="NAMA",
+                        help="gabungkan ke pangkalan gabungan (otomatis jika lebih dari satu workbook)")
+
+    sp = sub.add_parser("ingest", help="ingesti workbook ke pangkalan data")
+    sumber(sp)
+    sp.set_defaults(fungsi=cmd_ingest)
+
+    sp = sub.add_parser("nilai", help="harga indikasi untuk setiap Obyek Penilaian")
+    sumber(sp)
+    sp.add_argument("--dataset", help="key dataset tersimpan")
+    sp.add_argument("--gabungan", nargs="?", const=NAMA_GABUNGAN, default=None, metavar="NAMA",
+                    help="nilai pangkalan gabungan terbaru")
+    sp.add_argument("--out", required=True, help="folder keluaran (ringkasan.* dan rincian.*)")
+    sp.add_argument("--format", choices=list(FORMAT_EKSPOR), default="Excel")
+    sp.add_argument("-k", type=int, default=3, help="jumlah pembanding terdekat (default: %(default)s)")
+    sp.add_argument("--radius", type=float, default=0.0, help="radius pembanding km, 0 = bebas")
+    sp.add_argument("--tahun", type=int, default=None, help="tahun referensi (default: dari Tanggal_Inspeksi obyek)")
+    sp.add_argument("--diskon", type=float, default=10.0, help="diskon penawaran %% (default: %(default)s)")
+    sp.add_argument("--waktu", type=float, default=5.0, help="koreksi waktu %%/tahun (default: %(default)s)")
+    sp.add_argument("--luas", type=float, default=0.5, help="koreksi luas %%/100 m² (default: %(default)s)")
+    sp.add_argument("--lokasi", type=float, default=5.0, help="koreksi lokasi %%/poin (default: %(default)s)")
+    sp.set_defaults(fungsi=cmd_nilai)
+    return p
+
+def main(argv=None):
+    args = buat_parser().parse_args(argv)
+    args.fungsi(args, DatasetStore(args.store))
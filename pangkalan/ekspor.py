@@ -0,0 +1,191 @@
+"""
+Ekspor tabel ke Excel / CSV / Parquet. Excel ditulis bertahap per potongan
+baris lewat workbook write-only ke file (temp), bukan model openpyxl penuh
+di memori; format angka Rp/m² dan m² diterapkan sebagai format sel Excel.
+"""
+import hashlib
+import importlib.util
+import os
+import tempfile
+from collections import namedtuple
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+
+# xlsxwriter (opsional) menulis baris demi baris dalam mode constant_memory —
+# lebih cepat dari openpyxl. Tanpa xlsxwriter pakai openpyxl write-only.
+ADA_XLSXWRITER = importlib.util.find_spec("xlsxwriter") is not None
+
+# Di atas jumlah baris ini UI menyarankan CSV/Parquet
+EKSPOR_BESAR = 20_000
+EKSPOR_CHUNK = 5_000
+EKSPOR_DIR   = os.path.join(tempfile.gettempdir(), "pangkalan-ekspor")
+EKSPOR_SIMPAN = 16             # file ekspor terakhir yang dipertahankan di EKSPOR_DIR
+
+# Format angka native Excel per kolom (nilai tetap angka, bisa dihitung di Excel)
+FORMAT_ANGKA = {
+    "Harga_Tanah":       '"Rp" #,##0',
+    "Harga_Total":       '"Rp" #,##0',
+    "Harga_Stl_Koreksi": '"Rp" #,##0',
+    "Luas_Tanah":        '#,##0 "m²"',
+    "Luas_Bangunan":     '#,##0 "m²"',
+    "Jarak_km":          '0.00 "km"',
+}
+
+
+def _kolom_nilai(s):
+    """Kolom → list nilai Python untuk sel Excel (NaN/NA → None)."""
+    if pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+        v = s.to_numpy(dtype="float64", na_value=np.nan)
+        return [None if x != x else x for x in v.tolist()]
+    return s.astype(object).where(s.notna(), None).tolist()
+
+def _excel_openpyxl(df, tujuan, sheet_name, chunk):
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_name)
+    ws.append([str(c) for c in df.columns])
+    fmt = [FORMAT_ANGKA.get(c) for c in df.columns]
+
+    def sel(v, f):
+        c = WriteOnlyCell(ws, value=v)
+        c.number_format = f
+        return c
+
+    for mulai in range(0, len(df), chunk):
+        blok = df.iloc[mulai:mulai + chunk]
+        kolom = [_kolom_nilai(blok[c]) if f is None else [None if v is None else sel(v, f) for v in _kolom_nilai(blok[c])]
+                 for c, f in zip(blok.columns, fmt)]
+        for baris in zip(*kolom):
+            ws.append(baris)
+    wb.save(tujuan)
+
+def _excel_xlsxwriter(df, tujuan, sheet_name, chunk):
+    # constant_memory hanya menyimpan satu baris: sel harus ditulis baris
+    # demi baris (df.to_excel menulis per kolom → sel baris lama hilang)
+    import xlsxwriter
+
+    wb = xlsxwriter.Workbook(tujuan, {"constant_memory": True, "strings_to_formulas": False,
+                                      "strings_to_urls": False, "default_date_format": "yyyy-mm-dd"})
+    ws = wb.add_worksheet(sheet_name)
+    for j, c in enumerate(df.columns):
+        if c in FORMAT_ANGKA:
+            # Format kolom berlaku untuk sel tanpa format sendiri
+            ws.set_column(j, j, 16, wb.add_format({"num_format": FORMAT_ANGKA[c]}))
+    ws.write_row(0, 0, [str(c) for c in df.columns])
+    for mulai in range(0, len(df), chunk):
+        blok = df.iloc[mulai:mulai + chunk]
+        for i, baris in enumerate(zip(*(_kolom_nilai(blok[c]) for c in blok.columns)), mulai + 1):
+            ws.write_row(i, 0, baris)
+    wb.close()
+
+def tulis_excel(df, tujuan, sheet_name="Data Tanah", chunk=EKSPOR_CHUNK):
+    """Tulis df ke `tujuan` (path atau file biner) secara bertahap."""
+    if ADA_XLSXWRITER:
+        _excel_xlsxwriter(df, tujuan, sheet_name, chunk)
+    else:
+        _excel_openpyxl(df, tujuan, sheet_name, chunk)
+
+def tulis_csv(df, tujuan):
+    # BOM UTF-8 agar Excel membuka huruf non-ASCII dengan benar
+    df.to_csv(tujuan, index=False, encoding="utf-8-sig")
+
+def tulis_parquet(df, tujuan):
+    df.to_parquet(tujuan, index=False)
+
+def ke_excel_bytes(df, sheet_name="Data Tanah"):
+    buf = BytesIO()
+    tulis_excel(df, buf, sheet_name=sheet_name)
+    return buf.getvalue()
+
+
+FormatEkspor = namedtuple("FormatEkspor", "tulis ekstensi mime")
+
+FORMAT_EKSPOR = {
+    "Excel":   FormatEkspor(tulis_excel, "xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "CSV":     FormatEkspor(tulis_csv, "csv", "text/csv"),
+    "Parquet": FormatEkspor(tulis_parquet, "parquet", "application/vnd.apache.parquet"),
+}
+
+
+def path_ekspor(nama, fmt):
+    """Path file ekspor di EKSPOR_DIR dari hash `nama` (mis. dataset + baris + kolom)."""
+    h = hashlib.sha1(repr(nama).encode()).hexdigest()[:16]
+    return os.path.join(EKSPOR_DIR, f"{h}.{FORMAT_EKSPOR[fmt].ekstensi}")
+
+def ekspor_ke_file(df, fmt, path):
+    """
+    Tulis df dalam format `fmt` ke `path`. Ditulis ke file sementara lalu
+    di-rename, jadi pembaca tidak pernah melihat file setengah jadi; file
+    ekspor lama di folder yang sama dipangkas.
+    """
+    folder = os.path.dirname(path)
+    os.makedirs(folder, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=folder, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            FORMAT_EKSPOR[fmt].tulis(df, f)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    _pangkas(folder, EKSPOR_SIMPAN)
+    return path
+
+def _pangkas(folder, simpan):
+    files = sorted((e for e in os.scandir(folder) if e.is_file() and not e.name.endswith(".tmp")),
+                   key=lambda e: e.stat().st_mtime, reverse=True)
+    for e in files[simpan:]:
+        try:
+            os.unlink(e.path)
+        except OSError:
+            pass
+
+
+def _bench(n=None):
+    """Puncak memori (tracemalloc) & waktu: ekspor lama (DataFrame → BytesIO) vs streaming ke file."""
+    import sys
+    import time
+    import tracemalloc
+
+    n = n or (int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "Nomor":         np.arange(n).astype(str),
+        "Alamat":        pd.Series([f"Jl. Contoh No. {i % 500}" for i in range(n)], dtype=object),
+        "Kecamatan":     rng.choice(["Kota Tengah", "Kota Utara", "Kota Selatan"], n),
+        "Kota":          "Kota Contoh",
+        "Tahun_Bersih":  rng.integers(2019, 2026, n),
+        "Luas_Tanah":    rng.uniform(60, 5000, n).round(0),
+        "Luas_Bangunan": rng.uniform(0, 800, n).round(0),
+        "Harga_Tanah":   rng.lognormal(14, 0.6, n).round(0),
+        "Jarak_km":      rng.uniform(0, 15, n),
+        "Latitude":      rng.uniform(-6.4, -6.1, n),
+        "Longitude":     rng.uniform(106.7, 107.0, n),
+    })
+
+    def lama():
+        buf = BytesIO()
+        with pd.ExcelWriter(buf, engine="openpyxl") as w:
+            df.to_excel(w, index=False, sheet_name="Data Tanah")
+        return len(buf.getvalue())
+
+    def stream():
+        with tempfile.TemporaryFile() as f:
+            _excel_openpyxl(df, f, "Data Tanah", EKSPOR_CHUNK)
+            return f.tell()
+
+    print(f"{n:,} baris × {df.shape[1]} kolom")
+    for nama, fn in (("lama (BytesIO)", lama), ("streaming", stream)):
+        tracemalloc.start()
+        t = time.perf_counter()
+        size = fn()
+        _, puncak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{nama:15}: {time.perf_counter() - t:6.1f} s  puncak {puncak / 2**20:7.1f} MiB  file {size / 2**20:5.1f} MiB")
+
+
+if __name__ == "__main__":
+    _bench()
@@ -0,0 +1,176 @@
+"""Indeks filter sidebar: dihitung sekali per dataset, dievaluasi sebagai satu mask boolean."""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .search import NgramIndex
+
+
+def is_obyek_series(nomor):
+    """Baris Obyek Penilaian (kolom Nomor mengandung 'obyek')."""
+    return pd.Series(nomor).astype(str).str.strip().str.lower().str.contains("obyek", na=False, regex=False)
+
+def _kolom(df, col):
+    return df[col] if col in df.columns else pd.Series(np.nan, index=df.index, dtype=object)
+
+def _sorted_range(values):
+    """(order, nilai_terurut, mask_nan) — order hanya berisi posisi non-NaN."""
+    v = pd.to_numeric(values, errors="coerce").to_numpy(dtype="float64")
+    nan = np.isnan(v)
+    pos = np.flatnonzero(~nan)
+    order = pos[np.argsort(v[pos], kind="stable")]
+    return order, v[order], nan
+
+
+@dataclass
+class FilterIndex:
+    """
+    Kode kategori Kota/Kecamatan, array Tahun, flag is_obyek dan array
+    terurut harga/luas untuk seluruh baris dataset. Semua filter sidebar
+    dievaluasi lewat `mask()` tanpa menyalin DataFrame.
+    """
+    n:             int
+    is_obyek:      np.ndarray
+    kota:          NgramIndex        # indeks trigram atas nama kota unik
+    kec_codes:     np.ndarray
+    kec_names:     np.ndarray        # nama kecamatan unik (apa adanya, sebagai teks)
+    tahun:         np.ndarray        # Tahun_Bersih (float, NaN = kosong)
+    harga_order:   np.ndarray
+    harga_sorted:  np.ndarray
+    harga_nan:     np.ndarray
+    luas_order:    np.ndarray
+    luas_sorted:   np.ndarray
+    luas_nan:      np.ndarray
+    jarak_order:   np.ndarray        # Jarak_km ke Obyek Penilaian terdekat
+    jarak_sorted:  np.ndarray
+    jarak_nan:     np.ndarray
+
+    @classmethod
+    def build(cls, df):
+        kec = _kolom(df, "Kecamatan")
+        kec_codes, kec_names = pd.factorize(kec.where(kec.isna(), kec.astype(str)))
+        harga_order, harga_sorted, harga_nan = _sorted_range(_kolom(df, "Harga_Tanah"))
+        luas_order,  luas_sorted,  luas_nan  = _sorted_range(_kolom(df, "Luas_Tanah"))
+        jarak_order, jarak_sorted, jarak_nan = _sorted_range(_kolom(df, "Jarak_km"))
+        return cls(
+            n=len(df),
+            is_obyek=is_obyek_series(_kolom(df, "Nomor")).to_numpy(dtype=bool),
+            kota=NgramIndex(_kolom(df, "Kota")),
+            kec_codes=np.asarray(kec_codes),   kec_names=np.asarray(kec_names, dtype=object),
+            tahun=pd.to_numeric(_kolom(df, "Tahun_Bersih"), errors="coerce").to_numpy(dtype="float64"),
+            harga_order=harga_order, harga_sorted=harga_sorted, harga_nan=harga_nan,
+            luas_order=luas_order,   luas_sorted=luas_sorted,   luas_nan=luas_nan,
+            jarak_order=jarak_order, jarak_sorted=jarak_sorted, jarak_nan=jarak_nan,
+        )
+
+    # ── Opsi untuk widget sidebar ──────────────────────────────────────────
+    def years(self):
+        return sorted({int(y) for y in self.tahun[~np.isnan(self.tahun)]}, reverse=True)
+
+    def kecamatan_options(self):
+        return sorted(str(k) for k in self.kec_names)
+
+    def harga_bounds(self):
+        return (float(self.harga_sorted[0]), float(self.harga_sorted[-1])) if len(self.harga_sorted) else None
+
+    def luas_bounds(self):
+        return (float(self.luas_sorted[0]), float(self.luas_sorted[-1])) if len(self.luas_sorted) else None
+
+    def jarak_max(self):
+        return float(self.jarak_sorted[-1]) if len(self.jarak_sorted) else None
+
+    # ── Evaluasi filter ────────────────────────────────────────────────────
+    def kota_mask(self, query):
+        """Baris yang Kota-nya cocok dengan `query` (toleran salah ketik) — dicek per nama unik."""
+        if not str(query).strip():
+            return np.ones(self.n, dtype=bool)
+        return self.kota.row_mask(self.kota.cari(query))
+
+    @staticmethod
+    def _range_mask(order, sorted_vals, nan, lo, hi, keep_nan=True):
+        # Nilai kosong tidak dibuang (Obyek Penilaian sering tanpa harga)
+        i, j = np.searchsorted(sorted_vals, lo, side="left"), np.searchsorted(sorted_vals, hi, side="right")
+        m = nan.copy() if keep_nan else np.zeros_like(nan)
+        m[order[i:j]] = True
+        return m
+
+    def mask(self, city="", year=None, kecamatan=None, price_range=None, luas_range=None, text_mask=None,
+             max_jarak=None):
+        """
+        Gabungan semua filter sidebar dalam satu mask boolean.
+        `text_mask` (opsional) menggantikan pencarian kota, mis. saat
+        pencarian mencakup Kecamatan/Kelurahan/Alamat juga.
+        `max_jarak` (km) membuang pembanding yang lebih jauh atau tanpa jarak.
+        Baris Obyek Penilaian selalu dipertahankan.
+        """
+        ok = self.kota_mask(city) if text_mask is None else np.array(text_mask, dtype=bool)
+        if year is not None:
+            ok &= self.tahun == int(year)
+        if kecamatan is not None:
+            code = np.flatnonzero(self.kec_names == kecamatan)
+            ok &= self.kec_codes == (code[0] if len(code) else -2)
+        if price_range:
+            ok &= self._range_mask(self.harga_order, self.harga_sorted, self.harga_nan, *price_range)
+        if luas_range:
+            ok &= self._range_mask(self.luas_order, self.luas_sorted, self.luas_nan, *luas_range)
+        if max_jarak:
+            ok &= self._range_mask(self.jarak_order, self.jarak_sorted, self.jarak_nan, 0.0, max_jarak, keep_nan=False)
+        return ok | self.is_obyek
+
+
+class Tampilan:
+    """
+    Tampilan satu sesi atas dataset bersama (read-only): posisi baris yang
+    lolos filter + kolom turunan milik sesi (mis. `_is_obyek`, `_outlier`).
+    Kolom dataset diambil saat diminta; frame penuh tidak disalin per sesi.
+    """
+
+    def __init__(self, data, posisi, **kolom_sesi):
+        self.data = data
+        self.posisi = np.asarray(posisi, dtype=np.intp)
+        self.sesi = {k: np.asarray(v) for k, v in kolom_sesi.items()}
+
+    @classmethod
+    def dari_mask(cls, data, mask, **kolom_sesi):
+        """Tampilan dari mask boolean sepanjang dataset; kolom sesi juga sepanjang dataset."""
+        mask = np.asarray(mask, dtype=bool)
+        return cls(data, np.flatnonzero(mask), **{k: np.asarray(v)[mask] for k, v in kolom_sesi.items()})
+
+    def __len__(self):
+        return len(self.posisi)
+
+    @property
+    def empty(self):
+        return len(self.posisi) == 0
+
+    @property
+    def index(self):
+        return self.data.index[self.posisi]
+
+    @property
+    def columns(self):
+        return list(self.data.columns) + [k for k in self.sesi if k not in self.data.columns]
+
+    def __getitem__(self, col):
+        if col in self.sesi:
+            return pd.Series(self.sesi[col], index=self.index, name=col)
+        return self.data[col].iloc[self.posisi]
+
+    def dengan(self, **kolom_sesi):
+        """Tampilan yang sama + kolom sesi baru (sepanjang tampilan)."""
+        return Tampilan(self.data, self.posisi, **self.sesi, **kolom_sesi)
+
+    def pilih(self, mask):
+        """Sub-tampilan dari mask boolean sepanjang tampilan ini."""
+        mask = np.asarray(mask, dtype=bool)
+        return Tampilan(self.data, self.posisi[mask], **{k: v[mask] for k, v in self.sesi.items()})
+
+    def frame(self, kolom=None):
+        """DataFrame baris tampilan untuk `kolom` saja (default: semua) — satu-satunya titik salin."""
+        kolom = self.columns if kolom is None else list(kolom)
+        out = self.data[[c for c in kolom if c not in self.sesi]].iloc[self.posisi]
+        for k in kolom:
+            if k in self.sesi:
+                out[k] = self.sesi[k]
+        return out[kolom]
@@ -0,0 +1,90 @@
+"""
+Penggabungan banyak workbook ke satu pangkalan data: rekaman dideduplikasi
+lintas file dan hanya rekaman baru/berubah yang ditambahkan.
+"""
+import numpy as np
+import pandas as pd
+
+# Identitas rekaman: Nomor + koordinat + Kode_Inspeksi (penugasan)
+KUNCI_REKAMAN = ("Nomor", "Latitude", "Longitude", "Kode_Inspeksi")
+# Sidik harga: rekaman dengan kunci sama tapi harga beda = rekaman berubah
+KOLOM_HARGA   = ("Harga_Total", "Harga_Tanah")
+KOORD_DESIMAL = 6              # ±0,1 m — beda pembulatan koordinat antar-file tidak dianggap beda
+
+_PRIMA = np.uint64(1_000_003)
+
+
+def _nilai_hash(s, col):
+    """Kolom → array yang di-hash stabil (teks dinormalisasi, angka dibulatkan, kosong seragam)."""
+    if col in ("Latitude", "Longitude") or col in KOLOM_HARGA:
+        v = pd.to_numeric(s, errors="coerce").to_numpy(dtype="float64")
+        v = np.round(v, KOORD_DESIMAL if col in ("Latitude", "Longitude") else 0) + 0.0   # -0.0 → 0.0
+        v[np.isnan(v)] = np.nan      # NaN kanonik: hash_array meng-hash bit, payload NaN bisa beda
+        return v
+    return np.asarray(s.astype(object).where(s.notna(), "").map(lambda x: str(x).strip()), dtype=object)
+
+def hash_rekaman(df, kolom):
+    """Hash uint64 per baris dari `kolom` (kolom yang tidak ada dianggap kosong)."""
+    h = np.zeros(len(df), dtype=np.uint64)
+    for col in kolom:
+        s = df[col] if col in df.columns else pd.Series(np.nan, index=df.index, dtype=object)
+        h = (h * _PRIMA) ^ pd.util.hash_array(_nilai_hash(s, col))
+    return h
+
+def tandai_rekaman(df):
+    """df + kolom `_kunci` (identitas) dan `_sidik` (identitas + harga)."""
+    return df.assign(_kunci=hash_rekaman(df, KUNCI_REKAMAN),
+                     _sidik=hash_rekaman(df, KUNCI_REKAMAN + KOLOM_HARGA))
+
+def _terakhir_per_kunci(df):
+    """Di dalam satu workbook rekaman dengan kunci sama: yang terakhir menang."""
+    return df.drop_duplicates("_kunci", keep="last")
+
+def ringkas_tambahan(lama, baru):
+    """
+    Dampak menambahkan rekaman `baru` (sudah ditandai) ke `lama` (hasil
+    susun_rekaman, cukup kolom _kunci/_sidik; boleh None). Kunci sama +
+    sidik sama → duplikat; kunci sama + harga beda → berubah; kunci belum
+    ada → baru. Return {"baru", "berubah", "duplikat"}.
+    """
+    n_masuk = len(baru)
+    baru = _terakhir_per_kunci(baru)
+    if lama is None or lama.empty:
+        return {"baru": len(baru), "berubah": 0, "duplikat": n_masuk - len(baru)}
+    sidik_lama = pd.Series(lama["_sidik"].to_numpy(), index=lama["_kunci"].to_numpy())
+    ada  = baru["_kunci"].isin(sidik_lama.index).to_numpy()
+    sama = ada & (sidik_lama.reindex(baru["_kunci"].to_numpy()).to_numpy() == baru["_sidik"].to_numpy())
+    return {"baru": int((~ada).sum()), "berubah": int((ada & ~sama).sum()), "duplikat": n_masuk - int((~sama).sum())}
+
+def susun_rekaman(partisi):
+    """
+    Tabel data pangkalan gabungan dari partisi per workbook (sudah
+    ditandai, urut waktu digabung). Per kunci berlaku versi harga terakhir;
+    rekaman duplikat (sidik sama dengan versi sebelumnya) tidak menggantikan
+    yang lama. Rekaman pengganti menempati posisi partisinya.
+    """
+    semua = pd.concat([_terakhir_per_kunci(p) for p in partisi], ignore_index=True)
+    if semua.empty:
+        return semua
+    kunci, sidik = semua["_kunci"].to_numpy(), semua["_sidik"].to_numpy()
+    urut = np.lexsort((np.arange(len(semua)), kunci))          # per kunci, urut partisi
+    k, s = kunci[urut], sidik[urut]
+    awal_kunci = np.r_[True, k[1:] != k[:-1]]
+    awal_versi = awal_kunci | np.r_[True, s[1:] != s[:-1]]      # harga berubah = versi baru
+    pos = np.flatnonzero(awal_versi)
+    terakhir = np.r_[awal_kunci[pos[1:]], True]                # versi terakhir tiap kunci
+    return semua.iloc[np.sort(urut[pos[terakhir]])].reset_index(drop=True)
+
+def ganti_per_kunci(lama, baru, kolom):
+    """
+    Tabel pendukung (Data Bangunan per Kode_Inspeksi, BTB per kelas): baris
+    `lama` dengan nilai `kolom` yang muncul di `baru` diganti versi `baru`.
+    """
+    if lama is None or lama.empty:
+        return baru.reset_index(drop=True)
+    if baru.empty:
+        return lama
+    if kolom in lama.columns and kolom in baru.columns:
+        lama = lama[~lama[kolom].astype(str).isin(baru[kolom].astype(str))]
+        return pd.concat([lama, baru], ignore_index=True)
+    return pd.concat([lama, baru], ignore_index=True).drop_duplicates(ignore_index=True)
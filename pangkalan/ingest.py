@@ -0,0 +1,373 @@
+"""Mesin ingesti workbook survei: buka file sekali, baca semua sheet dikenal sekaligus."""
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from openpyxl.cell.cell import ERROR_CODES
+
+from .parsing import parse_indo_number_series, parse_koordinat_series, validasi_koordinat
+
+SHEET_PROPERTI  = "Data Properti"
+SHEET_PEMBANDING = "Data Pembanding"
+SHEET_BANGUNAN  = "Data Bangunan"
+SHEET_BTB       = "Data BTB"
+KNOWN_SHEETS    = (SHEET_PROPERTI, SHEET_PEMBANDING, SHEET_BANGUNAN, SHEET_BTB)
+
+RENAME_PEMBANDING = {
+    "Nomor Data":                       "Nomor",
+    "Harga":                            "Harga_Total",
+    "Jenis Data":                       "Jenis_Data",
+    "Tanggal Perolehan Data":           "Tanggal_Data",
+    "Penjual":                          "Kontak",
+    "Sumber Data":                      "Sumber_Data",
+    "Nomor Telepon Pembanding":         "Telp",
+    "Nomor Telepon untuk Konfirmasi":   "Telp_Konfirmasi",
+    "Jenis Properti":                   "Jenis_Properti",
+    "Alamat":                           "Alamat",
+    "Kompleks/Dusun":                   "Kompleks",
+    "Desa/Kelurahan":                   "Kelurahan",
+    "Kecamatan":                        "Kecamatan",
+    "Kabupaten/Kota":                   "Kota",
+    "Propinsi":                         "Propinsi",
+    "Koordinat":                        "_Koordinat",
+    "Luas Tanah":                       "Luas_Tanah",
+    "Luas Bangunan":                    "Luas_Bangunan",
+    "Kondisi Bangunan":                 "Kondisi_Bangunan",
+    "Kelas Bangunan":                   "Kelas_Bangunan",
+    "Peruntukan Tata Kota":             "Peruntukan",
+    "Bentuk kepemilikan":               "Kepemilikan",
+    "Penggunaan Tanah":                 "Penggunaan",
+    "Foto Depan Data":                  "Foto",
+    "Foto Jalan":                       "Foto_Jalan",
+    "Nama Surveyor":                    "Surveyor",
+    "Kode Inspeksi":                    "Kode_Inspeksi",
+    "Catatan":                          "Catatan",
+    "Timestamp":                        "Timestamp",
+}
+
+RENAME_PROPERTI = {
+    "Timestamp":                        "Timestamp",
+    "Kode Inspeksi":                    "Kode_Inspeksi",
+    "Nama Surveyor":                    "Surveyor",
+    "Tanggal Inspeksi":                 "Tanggal_Inspeksi",
+    "Pemberi Tugas":                    "Pemberi_Tugas",
+    "Pemilik Properti":                 "Pemilik",
+    "Jenis Properti":                   "Jenis_Properti",
+    "Alamat":                           "Alamat",
+    "Kompleks/Dusun":                   "Kompleks",
+    "Desa/Kelurahan":                   "Kelurahan",
+    "Kecamatan":                        "Kecamatan",
+    "Kabupaten/Kota":                   "Kota",
+    "Propinsi":                         "Propinsi",
+    "Latitude":                         "Latitude",
+    "Longitude":                        "Longitude",
+    "Koordinat":                        "_Koordinat",
+    "Luas Tanah":                       "Luas_Tanah",
+    "Luas Bangunan":                    "Luas_Bangunan",
+    "Peruntukan Tata Kota":             "Peruntukan",
+    "Bentuk kepemilikan":               "Kepemilikan",
+    "Penggunaan Tanah":                 "Penggunaan",
+    "Foto Depan Properti":              "Foto",
+    "Foto Bagian Dalam":                "Foto_Dalam",
+    "Foto Jalan dari Samping Kanan":    "Foto_Samping_Kanan",
+    "Foto Jalan dari Samping Kiri":     "Foto_Samping_Kiri",
+    "Gambar Situasi dan Plot ATR BPN":  "Gambar_Situasi",
+    "Reviewer":                         "Reviewer",
+}
+
+RENAME_BANGUNAN = {
+    "Kode Inspeksi":    "Kode_Inspeksi",
+    "Tanggal Inspeksi": "Tanggal_Inspeksi",
+    "Jenis Bangunan":   "Jenis_Bangunan",
+    "Luas Bangunan":    "Luas_Bangunan",
+    "Nomor Bangunan":   "Nomor_Bangunan",
+}
+
+
+@dataclass
+class WorkbookBundle:
+    """Hasil satu kali baca workbook — dikonsumsi seluruh aplikasi."""
+    data:        pd.DataFrame                     # Obyek Penilaian + Data Pembanding (atau format flat)
+    bangunan:    pd.DataFrame                     # sheet Data Bangunan
+    btb:         pd.DataFrame                     # sheet Data BTB
+    fmt:         str                              # "multi-sheet" / "flat"
+    sheet_names: list = field(default_factory=list)
+    timings:     dict = field(default_factory=dict)  # {sheet: {"baca_s": .., "olah_s": ..}}
+    origin:      str  = "xlsx"                    # "xlsx" = hasil parsing, "store" = dari Parquet
+
+    def timing_frame(self):
+        """Waktu baca & olah per sheet sebagai DataFrame (untuk ditampilkan di UI)."""
+        if not self.timings:
+            return pd.DataFrame(columns=["baca_s", "olah_s", "total_s"])
+        t = pd.DataFrame(self.timings).T.fillna(0.0)
+        t["total_s"] = t.sum(axis=1)
+        return t
+
+
+# ─── Helpers untuk sheet bertranspose ────────────────────────────────────────
+# Sheet dengan baris=field, kolom=record
+TRANSPOSED_SHEETS = (SHEET_PROPERTI, SHEET_PEMBANDING, SHEET_BANGUNAN)
+
+# Teks yang dibaca sebagai kosong — sama dengan default pd.read_excel
+_NA_TEKS = frozenset({
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+}) | frozenset(ERROR_CODES)
+
+def _sel(v):
+    """Nilai sel openpyxl → nilai Python seperti pd.read_excel (kosong → NaN, float bulat → int)."""
+    if v is None or (isinstance(v, str) and v in _NA_TEKS):
+        return np.nan
+    if type(v) is float and v.is_integer():
+        return int(v)
+    return v
+
+def _dedup_fields(names):
+    """Deduplikasi nama field (e.g., "Foto" ke-2 → "Foto_2")."""
+    seen = {}
+    unique_fields = []
+    for name in names:
+        if name in seen:
+            seen[name] += 1
+            unique_fields.append(f"{name}_{seen[name]}")
+        else:
+            seen[name] = 0
+            unique_fields.append(name)
+    return unique_fields
+
+def _baca_transpose(ws):
+    """
+    Baca worksheet bertranspose secara streaming (openpyxl read-only): tiap
+    baris sheet langsung menjadi satu kolom hasil, jadi frame lebar yang
+    belum ditranspose tidak pernah dibentuk. Baris pertama = header dan
+    baris kosong di akhir dibuang, sama seperti pd.read_excel(header=0).
+    """
+    if getattr(ws, "read_only", False):
+        ws.reset_dimensions()
+    names, cols, lebar, n_isi = [], [], 0, 0
+    for i, row in enumerate(ws.iter_rows(values_only=True)):
+        vals = [_sel(v) for v in row]
+        while vals and vals[-1] is np.nan:
+            vals.pop()
+        lebar = max(lebar, len(vals) - 1)
+        if i == 0:
+            continue
+        names.append("nan" if not vals or vals[0] is np.nan else str(vals[0]).strip())
+        cols.append(vals[1:])
+        if vals:
+            n_isi = len(cols)
+    names, cols = names[:n_isi], cols[:n_isi]
+
+    df = pd.DataFrame({
+        name: pd.Series(v + [np.nan] * (lebar - len(v)), dtype=object).infer_objects()
+        for name, v in zip(_dedup_fields(names), cols)
+    }) if cols and lebar else pd.DataFrame()
+    df.columns = [str(c).strip() for c in df.columns]
+    df.attrs["rekaman"] = True
+    return df
+
+def _transpose_sheet(df_raw):
+    """Sheet bertranspose (baris=field, kolom=record) → DataFrame normal."""
+    if df_raw is None or df_raw.empty:
+        return pd.DataFrame()
+    if df_raw.attrs.pop("rekaman", False):     # hasil _baca_transpose, sudah berorientasi record
+        return df_raw
+
+    # Kolom pertama = nama field; jadikan index setelah dibersihkan duplikatnya
+    unique_fields = _dedup_fields(df_raw.iloc[:, 0].astype(str).str.strip())
+
+    df_raw = df_raw.iloc[:, 1:]          # Buang kolom field-name
+    df_raw.index = unique_fields         # Pasang sebagai index unik
+    df = df_raw.T.reset_index(drop=True) # Transpose: record = baris
+    df.columns = [str(c).strip() for c in df.columns]
+    return df
+
+def load_bangunan_sheet(df_raw):
+    df = _transpose_sheet(df_raw)
+    if df.empty:
+        return pd.DataFrame()
+    df = df.rename(columns={k: v for k, v in RENAME_BANGUNAN.items() if k in df.columns})
+    if "Luas_Bangunan" in df.columns:
+        df["Luas_Bangunan"] = parse_indo_number_series(df["Luas_Bangunan"])
+    return df
+
+def load_btb_sheet(df_raw):
+    """Sheet Data BTB (tabel flat) → kolom Kelas_Bangunan & Biaya_BTB."""
+    if df_raw is None or df_raw.empty:
+        return pd.DataFrame()
+    df = df_raw.copy()
+    # Normalkan nama kolom
+    df.columns = [str(c).strip() for c in df.columns]
+    # Deteksi kolom: "Kelas Bangunan" prioritas, fallback ke "Elemen Bangunan"
+    kelas_col = next(
+        (c for c in df.columns if "kelas" in c.lower() and "bangunan" in c.lower()), None
+    ) or next(
+        (c for c in df.columns if "elemen" in c.lower()), None
+    )
+    biaya_col = next(
+        (c for c in df.columns if "pembulatan" in c.lower()), None
+    )
+    rename_btb = {}
+    if kelas_col:
+        rename_btb[kelas_col] = "Kelas_Bangunan"
+    if biaya_col:
+        rename_btb[biaya_col] = "Biaya_BTB"
+    df = df.rename(columns=rename_btb)
+    if "Biaya_BTB" in df.columns:
+        df["Biaya_BTB"] = parse_indo_number_series(df["Biaya_BTB"])
+    return df
+
+def load_pembanding_sheet(df_raw):
+    df = _transpose_sheet(df_raw)
+    if df.empty:
+        return pd.DataFrame()
+
+    df = df.rename(columns={k: v for k, v in RENAME_PEMBANDING.items() if k in df.columns})
+
+    # Koordinat → Latitude, Longitude (+ status per baris di _koord_status)
+    if "_Koordinat" in df.columns:
+        coords, df["_koord_status"] = parse_koordinat_series(df["_Koordinat"])
+        df["Latitude"]  = coords["Latitude"]
+        df["Longitude"] = coords["Longitude"]
+
+    # Numerik
+    for col in ["Harga_Total", "Luas_Tanah", "Luas_Bangunan", "Kondisi_Bangunan"]:
+        if col in df.columns:
+            df[col] = parse_indo_number_series(df[col])
+
+    # Harga per m² — sementara pakai rumus sederhana; akan dikoreksi BTB setelah load
+    if "Harga_Total" in df.columns and "Luas_Tanah" in df.columns:
+        df["Harga_Tanah"] = (df["Harga_Total"] / df["Luas_Tanah"]).round(0)
+
+    # Tahun dari Tanggal_Data atau Timestamp
+    for dcol in ["Tanggal_Data", "Timestamp"]:
+        if dcol in df.columns:
+            df["Tahun"] = pd.to_datetime(
+                df[dcol].astype(str), errors="coerce", dayfirst=True
+            ).dt.year
+            break
+
+    # Pastikan Nomor ada
+    if "Nomor" not in df.columns:
+        df["Nomor"] = range(1, len(df) + 1)
+
+    df["_sumber"] = SHEET_PEMBANDING
+    return df
+
+def load_properti_sheet(df_raw):
+    df = _transpose_sheet(df_raw)
+    if df.empty:
+        return pd.DataFrame()
+
+    df = df.rename(columns={k: v for k, v in RENAME_PROPERTI.items() if k in df.columns})
+
+    # Koordinat fallback
+    if ("Latitude" not in df.columns or df["Latitude"].isna().all()) and "_Koordinat" in df.columns:
+        coords, df["_koord_status"] = parse_koordinat_series(df["_Koordinat"])
+        df["Latitude"]  = coords["Latitude"]
+        df["Longitude"] = coords["Longitude"]
+    elif "Latitude" in df.columns and "Longitude" in df.columns:
+        df["Latitude"], df["Longitude"], df["_koord_status"] = validasi_koordinat(
+            df["Latitude"], df["Longitude"]
+        )
+
+    for col in ["Latitude", "Longitude"]:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    for col in ["Luas_Tanah", "Luas_Bangunan"]:
+        if col in df.columns:
+            df[col] = parse_indo_number_series(df[col])
+
+    # Tahun dari Tanggal_Inspeksi atau Timestamp
+    for dcol in ["Tanggal_Inspeksi", "Timestamp"]:
+        if dcol in df.columns:
+            df["Tahun"] = pd.to_datetime(
+                df[dcol].astype(str), errors="coerce", dayfirst=True
+            ).dt.year
+            break
+
+    df["Nomor"]      = "Obyek Penilaian"
+    df["Harga_Tanah"] = np.nan
+    df["Harga_Total"] = np.nan
+    df["_sumber"]    = SHEET_PROPERTI
+    return df
+
+_SHEET_LOADERS = {
+    SHEET_PROPERTI:   load_properti_sheet,
+    SHEET_PEMBANDING: load_pembanding_sheet,
+    SHEET_BANGUNAN:   load_bangunan_sheet,
+    SHEET_BTB:        load_btb_sheet,
+}
+
+
+# ─── Ingesti satu-lintasan ───────────────────────────────────────────────────
+
+def _parse_sheet(xl, sheet_name):
+    """
+    Baca satu sheet dari ExcelFile yang sudah terbuka; None jika gagal.
+    Sheet bertranspose dibaca streaming langsung ke bentuk record.
+    """
+    try:
+        if sheet_name in TRANSPOSED_SHEETS and xl.engine == "openpyxl":
+            return _baca_transpose(xl.book[sheet_name])
+        return xl.parse(sheet_name, header=0)
+    except Exception:
+        return None
+
+def read_workbook(source):
+    """
+    Buka workbook SEKALI dan baca semua sheet dikenal dalam satu lintasan.
+
+    `source` boleh path atau file-like (mis. UploadedFile Streamlit).
+    Waktu baca (unzip + parse XML) dan waktu olah (transpose + normalisasi)
+    dicatat per sheet di `WorkbookBundle.timings`.
+    """
+    timings = {}
+    t0 = time.perf_counter()
+    with pd.ExcelFile(source) as xl:
+        timings["(buka workbook)"] = {"baca_s": time.perf_counter() - t0, "olah_s": 0.0}
+        sheets = list(xl.sheet_names)
+
+        frames = {}
+        for name in KNOWN_SHEETS:
+            if name not in sheets:
+                continue
+            t = time.perf_counter()
+            raw = _parse_sheet(xl, name)
+            t_baca = time.perf_counter() - t
+            t = time.perf_counter()
+            try:
+                frames[name] = _SHEET_LOADERS[name](raw)
+            except Exception:
+                frames[name] = pd.DataFrame()
+            timings[name] = {"baca_s": t_baca, "olah_s": time.perf_counter() - t}
+
+        data_frames = [frames[n] for n in (SHEET_PROPERTI, SHEET_PEMBANDING)
+                       if n in frames and not frames[n].empty]
+        if data_frames:
+            df = pd.concat(data_frames, ignore_index=True)
+            if "Latitude"  in df.columns:
+                df["Latitude"]  = pd.to_numeric(df["Latitude"],  errors="coerce")
+            if "Longitude" in df.columns:
+                df["Longitude"] = pd.to_numeric(df["Longitude"], errors="coerce")
+            fmt = "multi-sheet"
+        else:
+            # Fallback: format lama (flat sheet pertama)
+            t = time.perf_counter()
+            df = xl.parse(sheets[0])
+            timings[sheets[0]] = {"baca_s": time.perf_counter() - t, "olah_s": 0.0}
+            df["Latitude"]  = pd.to_numeric(df["Latitude"],  errors="coerce")
+            df["Longitude"] = pd.to_numeric(df["Longitude"], errors="coerce")
+            fmt = "flat"
+
+    df["_format"] = fmt
+    return WorkbookBundle(
+        data=df,
+        bangunan=frames.get(SHEET_BANGUNAN, pd.DataFrame()),
+        btb=frames.get(SHEET_BTB, pd.DataFrame()),
+        fmt=fmt,
+        sheet_names=sheets,
+        timings=timings,
+    )
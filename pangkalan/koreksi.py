@@ -0,0 +1,97 @@
+"""Tahap derivasi setelah load: tahun bersih, koreksi harga tanah dengan nilai bangunan (BTB) & jarak ke obyek."""
+import pandas as pd
+
+from .filters import _kolom, is_obyek_series
+from .ingest import SHEET_PEMBANDING
+from .skema import ringkas_tipe
+from .spatial import jarak_ke_obyek
+
+
+def tahun_bersih_series(tahun):
+    """Bersihkan kolom Tahun sekaligus: '2,024' / ' 2024 ' / 2024.0 → 2024 (NaN jika gagal)."""
+    s = pd.Series(tahun).astype(str).str.replace(",", "", regex=False).str.strip()
+    return pd.to_numeric(s, errors="coerce", downcast="integer")
+
+def harga_koreksi_waktu(harga, tahun, ref_year, pct_per_tahun):
+    """Harga disesuaikan ke tahun referensi: linear pct_per_tahun per selisih tahun (tahun kosong = tanpa koreksi)."""
+    harga = pd.to_numeric(pd.Series(harga), errors="coerce")
+    tahun = pd.to_numeric(pd.Series(tahun), errors="coerce").set_axis(harga.index)
+    selisih = ref_year - tahun.fillna(ref_year)
+    return harga * (1 + selisih * pct_per_tahun / 100)
+
+def koreksi_btb(df, df_btb):
+    """
+    Koreksi Harga_Tanah data pembanding dengan ekstraksi nilai bangunan (BTB).
+    Rumus: (Harga_Total − Luas_Bangunan × (Kondisi/100) × Biaya_BTB) / Luas_Tanah
+    Pangkalan gabungan (kolom `_berkas` di data & BTB): biaya BTB dicocokkan
+    per workbook sumber — BTB satu wilayah/survei tidak berlaku untuk yang lain.
+
+    Fungsi murni: `df` tidak diubah. Return (df_terkoreksi, pesan_status).
+    """
+    df = df.copy()
+    if df_btb.empty:
+        return df, "⚠️ Sheet 'Data BTB' tidak ditemukan — harga/m² pakai Harga_Total / Luas_Tanah"
+    if "Kelas_Bangunan" not in df_btb.columns:
+        return df, f"⚠️ Kolom kelas bangunan tidak dikenali di BTB (kolom: {', '.join(df_btb.columns.tolist()[:6])})"
+    if "Biaya_BTB" not in df_btb.columns:
+        return df, f"⚠️ Kolom 'Pembulatan' tidak ditemukan di BTB (kolom: {', '.join(df_btb.columns.tolist()[:6])})"
+
+    per_berkas = "_berkas" in df_btb.columns and "_berkas" in df.columns
+
+    def kunci_btb(x):
+        # Normalisasi key ke lowercase+strip agar pencocokan tidak case-sensitive
+        kelas = x["Kelas_Bangunan"].astype(str).str.strip().str.lower()
+        return x["_berkas"].astype(str) + "\x1f" + kelas if per_berkas else kelas
+
+    btb_valid = df_btb.dropna(subset=["Kelas_Bangunan", "Biaya_BTB"])
+    btb_map = dict(zip(kunci_btb(btb_valid), btb_valid["Biaya_BTB"]))
+    has_sumber = "_sumber" in df.columns
+    mask_comp  = (df["_sumber"] == SHEET_PEMBANDING) if has_sumber else pd.Series(True, index=df.index)
+
+    if not (mask_comp.any() and "Kelas_Bangunan" in df.columns):
+        return df, "ℹ️ Tidak ada data pembanding atau kolom Kelas_Bangunan tidak ada"
+
+    df_c = df[mask_comp].copy()
+    df_c["_Kelas_norm"] = kunci_btb(df_c)
+    df_c["_Biaya_BTB"]  = df_c["_Kelas_norm"].map(btb_map)
+
+    need     = ["Harga_Total", "Luas_Bangunan", "Kondisi_Bangunan", "Luas_Tanah", "_Biaya_BTB"]
+    miss_col = [c for c in need[:-1] if c not in df_c.columns]
+    if miss_col:
+        return df, f"⚠️ Kolom tidak ada di data: {', '.join(miss_col)}"
+
+    has_all   = df_c[need].notna().all(axis=1) & (df_c["Luas_Tanah"] > 0)
+    n_nomatch = int((df_c["_Biaya_BTB"].isna() &
+                     df_c[["Harga_Total","Luas_Bangunan","Kondisi_Bangunan","Luas_Tanah"]].notna().all(axis=1)).sum())
+    unmatched = df_c.loc[df_c["_Biaya_BTB"].isna(), "Kelas_Bangunan"].dropna().unique().tolist()
+    if not has_all.any():
+        btb_keys = list(dict.fromkeys(k.split("\x1f")[-1] for k in btb_map))
+        return df, (f"⚠️ BTB dimuat ({len(btb_map)} kelas) tapi tidak ada yang cocok.\n"
+                    f"Kelas di data: {unmatched[:4]}\n"
+                    f"Kelas di BTB : {btb_keys[:4]}")
+
+    sub        = df_c[has_all]
+    nilai_bgn  = sub["Luas_Bangunan"] * (sub["Kondisi_Bangunan"] / 100) * sub["_Biaya_BTB"]
+    harga_baru = ((sub["Harga_Total"] - nilai_bgn) / sub["Luas_Tanah"]).round(0)
+    df.loc[harga_baru.index, "Harga_Tanah"] = harga_baru
+    msg = f"✅ BTB koreksi diterapkan pada {int(has_all.sum())} data pembanding"
+    if n_nomatch:
+        msg += f" | ⚠️ {n_nomatch} kelas tidak cocok: {unmatched}"
+    return df, msg
+
+def siapkan_data(bundle, ringkas=True):
+    """
+    Tahap derivasi lengkap dari WorkbookBundle: Tahun_Bersih + koreksi BTB
+    + jarak/arah dari Obyek Penilaian terdekat (Jarak_km, Arah_deg), lalu
+    tahap skema dtype ringkas (`ringkas=False` untuk melewatinya).
+    Return (df, pesan_btb) — aman di-memoize per dataset karena murni.
+    """
+    df = bundle.data
+    df = df.assign(
+        Tahun_Bersih=tahun_bersih_series(df["Tahun"]) if "Tahun" in df.columns
+        else pd.Series(dtype=float)
+    )
+    df, msg = koreksi_btb(df, bundle.btb)
+    # Obyek selalu lolos filter sidebar, jadi jarak cukup dihitung sekali per dataset
+    df = df.join(jarak_ke_obyek(df, is_obyek_series(_kolom(df, "Nomor"))))
+    return (ringkas_tipe(df) if ringkas else df), msg
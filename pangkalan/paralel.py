@@ -0,0 +1,105 @@
+"""
+Ingesti paralel: parsing xlsx (openpyxl) terikat CPU dan satu-thread, jadi
+berkas dibagi ke ProcessPoolExecutor — satu tugas per berkas, workbook
+dibuka sekali di worker-nya. Hasil dirakit menurut urutan masukan, bukan
+urutan selesai — keluaran sama persis dengan read_workbook.
+"""
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from .pekerja import tugas_berkas
+
+# fork dari server Streamlit (banyak thread) bisa mewarisi lock yang sedang
+# dipegang thread lain → worker macet. Pool ingesti memakai forkserver/spawn;
+# fork hanya untuk proses batch satu-thread (CLI, lihat pool_fork).
+BISA_FORK = "fork" in mp.get_all_start_methods()
+METODE_START = "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+
+def pool_ingest(workers=None):
+    """ProcessPoolExecutor (forkserver/spawn) untuk read_workbooks — boleh dipakai ulang antar-panggilan."""
+    ctx = mp.get_context(METODE_START)
+    if METODE_START == "forkserver":
+        # Modul entri worker dimuat sekali di server forkserver — lihat pekerja.py
+        ctx.set_forkserver_preload([tugas_berkas.__module__])
+    return ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1, mp_context=ctx)
+
+def pool_fork(workers=None):
+    """Pool fork — worker mewarisi memori induk; hanya untuk proses satu-thread (CLI)."""
+    return ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1, mp_context=mp.get_context("fork"))
+
+def _berurutan(sources, progres):
+    out = []
+    for i, src in enumerate(sources):
+        out.append(tugas_berkas(src))
+        if progres:
+            progres(i + 1, len(sources))
+    return out
+
+def read_workbooks(sources, workers=None, progres=None, pool=None):
+    """
+    Baca banyak workbook (path atau bytes) secara paralel → list
+    WorkbookBundle sesuai urutan `sources`.
+
+    Satu tugas per berkas (workbook dibuka sekali); worker tidak lebih dari
+    jumlah berkas. `progres(selesai, total)` dipanggil tiap berkas selesai.
+    `pool` (opsional) dipakai ulang; tanpa pool dan 1 worker → berurutan.
+    Pool milik sendiri yang rusak (BrokenProcessPool) → ulang berurutan;
+    `pool` dari pemanggil yang rusak diteruskan agar pemanggil menggantinya.
+    """
+    sources = list(sources)
+    workers = workers or os.cpu_count() or 1
+    if pool is None and (workers <= 1 or not sources):
+        return _berurutan(sources, progres)
+
+    milik = pool is None
+    pool = pool or pool_ingest(min(workers, len(sources)))
+    try:
+        fut = {pool.submit(tugas_berkas, src): i for i, src in enumerate(sources)}
+        hasil = {}
+        for k, f in enumerate(as_completed(fut), 1):
+            hasil[fut[f]] = f.result()
+            if progres:
+                progres(k, len(sources))
+    except BrokenProcessPool:
+        if not milik:
+            raise
+        return _berurutan(sources, progres)
+    finally:
+        if milik:
+            pool.shutdown(cancel_futures=True)
+    return [hasil[i] for i in range(len(sources))]
+
+
+def _bench(folder=None):
+    """Waktu read_workbooks atas semua *.xlsx di `folder` untuk 1, 2, 4, … worker."""
+    import sys
+
+    folder = folder or (sys.argv[1] if len(sys.argv) > 1 else None)
+    if not folder:
+        print("Pemakaian: python -m pangkalan.paralel <folder-berisi-xlsx> [maks_worker]")
+        return
+    maks = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    paths = sorted(os.path.join(folder, f) for f in os.listdir(folder) if f.lower().endswith(".xlsx"))
+    print(f"{len(paths)} workbook, {os.cpu_count()} core")
+
+    acuan, t1 = None, None
+    w = 1
+    while w <= maks:
+        t = time.perf_counter()
+        hasil = read_workbooks(paths, workers=w)
+        dt = time.perf_counter() - t
+        t1 = t1 or dt
+        if acuan is None:
+            acuan = hasil
+        sama = all(a.data.equals(b.data) and a.bangunan.equals(b.bangunan) and a.btb.equals(b.btb)
+                   for a, b in zip(acuan, hasil))
+        print(f"{w:3d} worker: {dt:7.2f} s  speedup {t1 / dt:4.2f}×  "
+              f"{sum(len(b.data) for b in hasil):,} baris  {'identik' if sama else 'BEDA'}")
+        w *= 2
+
+
+if __name__ == "__main__":
+    _bench()
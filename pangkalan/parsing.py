@@ -0,0 +1,208 @@
+"""Parser nilai mentah dari workbook survei (angka format Indonesia, koordinat)."""
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+
+
+def parse_indo_number(val):
+    """Konversi angka format Indonesia '1.234.567,89' → float 1234567.89"""
+    try:
+        s = str(val).strip().replace(" ", "").replace("%", "")
+        if not s or s in ("nan", "-", ""):
+            return None
+        if "," in s:
+            # Anggap koma = desimal, titik = ribuan
+            s = s.replace(".", "").replace(",", ".")
+        else:
+            # Titik saja: cek apakah itu ribuan (grup 3 angka setelah titik)
+            parts = s.split(".")
+            if len(parts) > 1 and all(len(p) == 3 for p in parts[1:]):
+                s = s.replace(".", "")
+        return float(s)
+    except Exception:
+        return None
+
+def parse_koordinat(val):
+    """Parse '0.640530, 122.907528' → (lat, lon)"""
+    try:
+        s = str(val).strip()
+        parts = s.split(",")
+        return float(parts[0].strip()), float(parts[1].strip())
+    except Exception:
+        return None, None
+
+# ─── Versi vektor (seluruh kolom sekaligus) ──────────────────────────────────
+
+# Titik sebagai pemisah ribuan: setiap grup setelah titik tepat 3 karakter
+_RIBUAN_TITIK = r"^[^.]*(?:\.[^.]{3})+$"
+# Bentuk desimal standar yang aman dikonversi langsung tanpa try/except
+_ANGKA_POLOS  = r"^[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?$"
+
+def _parse_numeric_fast(values):
+    """
+    Jalur cepat kolom yang sudah numerik (openpyxl mengembalikan float/int).
+    Meniru parse_indo_number persis: str(1500.125) = '1500.125' dianggap
+    ribuan → 1500125.0, jadi float dengan tepat 3 digit desimal dikali 1000.
+    """
+    v = np.asarray(values, dtype=np.float64)
+    with np.errstate(invalid="ignore", over="ignore"):
+        dec3 = np.rint(v * 1000) / 1000 == v
+        dec2 = np.rint(v * 100) / 100 == v
+    tiga_desimal = np.isfinite(v) & dec3 & ~dec2
+    out = np.where(tiga_desimal, np.rint(v * 1000), v)
+    # Di atas batas ini v * 1000 tidak lagi presisi (≥ 2**53) sehingga uji
+    # 3 desimal salah tebak — nilai sebesar ini (jarang) lewat str() seperti aslinya
+    besar = np.abs(v) >= _BATAS_CEPAT
+    if besar.any():
+        out[besar] = [_float_or_nan(parse_indo_number(x)) for x in v[besar]]
+    return out
+
+# |v| maksimum jalur cepat: 2**53 / 1000 dibulatkan ke bawah
+_BATAS_CEPAT = 1e12
+
+# Tipe sel numerik dari openpyxl yang str()-nya bisa ditiru tanpa konversi teks
+_TIPE_ANGKA = {int, float, np.int64, np.float64}
+
+def parse_indo_number_series(series):
+    """
+    Versi vektor parse_indo_number untuk satu kolom → Series float64
+    (NaN untuk nilai yang tidak bisa dibaca). Hasil identik dengan
+    `series.apply(parse_indo_number)`.
+    """
+    series = pd.Series(series)
+    if is_numeric_dtype(series.dtype) and not is_bool_dtype(series.dtype):
+        return pd.Series(_parse_numeric_fast(series), index=series.index, dtype="float64")
+
+    out  = pd.Series(np.nan, index=series.index, dtype="float64")
+    vals = series.to_numpy(dtype=object)
+    # Kolom object campuran: sel yang sudah angka lewat jalur cepat, sisanya jalur teks
+    angka = np.fromiter((type(v) in _TIPE_ANGKA for v in vals), dtype=bool, count=len(vals))
+    if angka.any():
+        out[angka] = _parse_numeric_fast(vals[angka].astype(np.float64))
+    if not angka.all():
+        teks = ~angka
+        out[teks] = _parse_indo_strings(series[teks]).to_numpy()
+    return out
+
+def _parse_indo_strings(series):
+    s = (series.astype(str)
+               .str.strip()
+               .str.replace(" ", "", regex=False)
+               .str.replace("%", "", regex=False))
+    kosong = series.isna() | s.isna() | s.isin(["", "nan", "-"])
+
+    ada_koma = s.str.contains(",", regex=False, na=False)
+    # Koma = desimal, titik = ribuan
+    s = s.where(~ada_koma, s.str.replace(".", "", regex=False).str.replace(",", ".", regex=False))
+    # Titik saja dengan grup 3 angka → pemisah ribuan
+    ribuan = ~ada_koma & s.str.match(_RIBUAN_TITIK, na=False)
+    s = s.where(~ribuan, s.str.replace(".", "", regex=False))
+
+    out = pd.Series(np.nan, index=series.index, dtype="float64")
+    polos = ~kosong & s.str.match(_ANGKA_POLOS, na=False)
+    if polos.any():
+        out[polos] = np.asarray(s[polos], dtype=object).astype(np.float64)
+    # Sisa (mis. 'inf', '1_000', teks) — jarang; lewat float() agar tetap identik
+    sisa = ~kosong & ~polos
+    if sisa.any():
+        out[sisa] = s[sisa].map(_float_or_nan).astype("float64")
+    return out
+
+def _float_or_nan(s):
+    try:
+        return float(s) if s is not None else np.nan
+    except Exception:
+        return np.nan
+
+# ─── Koordinat versi vektor ──────────────────────────────────────────────────
+
+KOORD_OK       = "ok"
+KOORD_DITUKAR  = "ok (lat/lon ditukar)"
+KOORD_KOSONG   = "kosong"
+KOORD_FORMAT   = "format tidak dikenal"
+KOORD_JANGKAUAN = "di luar jangkauan"
+KOORD_DITERIMA = (KOORD_OK, KOORD_DITUKAR)
+
+_NUM = r"[+-]?(?:\d+(?:\.\d*)?|\.\d+)"
+# '0.640530, 122.907528' / '0.64;122.9' / '0.64 122.9' / '(0.64, 122.9)' — bagian ke-3 dst. diabaikan
+_KOORD_DESIMAL = rf"^[(\[]?\s*({_NUM})\s*(?:[,;]|\s)\s*({_NUM})\s*(?:,.*)?[)\]]?$"
+# DMS: 0°38'25.9"N 122°54'27.1"E — juga U/S/T/B dan LU/LS/BT/BB
+_DMS_SATU = (r"(\d+(?:\.\d+)?)\s*°\s*(?:(\d+(?:\.\d+)?)\s*['′]\s*)?"
+             r"(?:(\d+(?:\.\d+)?)\s*(?:\"|″|'')\s*)?(LU|LS|BT|BB|[NSEWUTB])")
+_KOORD_DMS = rf"^\s*{_DMS_SATU}\s*[,;]?\s*{_DMS_SATU}\s*$"
+_HEMI_LINTANG = {"N": 1, "U": 1, "LU": 1, "S": -1, "LS": -1}
+_HEMI_BUJUR   = {"E": 1, "T": 1, "BT": 1, "W": -1, "B": -1, "BB": -1}
+
+def _dms_ke_desimal(deg, mnt, dtk):
+    return (deg.astype(float)
+            + mnt.astype(float).fillna(0) / 60
+            + dtk.astype(float).fillna(0) / 3600)
+
+def validasi_koordinat(lat, lon):
+    """
+    Cek jangkauan lat/lon sekaligus untuk seluruh kolom. Jika lintang di
+    luar ±90 tetapi bujur masih muat sebagai lintang, keduanya dianggap
+    tertukar. Return (lat, lon, status) — koordinat yang ditolak jadi NaN.
+    """
+    lat = pd.to_numeric(pd.Series(lat), errors="coerce").astype("float64")
+    lon = pd.to_numeric(pd.Series(lon, index=lat.index), errors="coerce").astype("float64")
+    valid  = lat.between(-90, 90) & lon.between(-180, 180)
+    tukar  = ~valid & lon.between(-90, 90) & lat.between(-180, 180)
+    lat, lon = lat.where(~tukar, lon), lon.where(~tukar, lat)
+
+    status = pd.Series(KOORD_OK, index=lat.index, dtype=object)
+    status[tukar] = KOORD_DITUKAR
+    kosong = lat.isna() & lon.isna()
+    status[kosong] = KOORD_KOSONG
+    luar = ~kosong & ~(valid | tukar)
+    status[luar] = KOORD_JANGKAUAN
+    return lat.where(~luar), lon.where(~luar), status
+
+def parse_koordinat_series(series):
+    """
+    Versi vektor parse_koordinat untuk satu kolom teks koordinat.
+    Mendukung 'lat, lon' desimal dan DMS (0°38'25.9"N 122°54'27.1"E),
+    mendeteksi lat/lon tertukar dan menolak nilai di luar jangkauan.
+    Return (DataFrame[Latitude, Longitude], Series status per baris).
+    """
+    series = pd.Series(series)
+    s = series.astype(str).str.strip().str.upper().str.replace("−", "-", regex=False)
+    kosong = series.isna() | s.isna() | s.isin(["", "NAN", "NONE", "-"])
+
+    lat = pd.Series(np.nan, index=series.index, dtype="float64")
+    lon = pd.Series(np.nan, index=series.index, dtype="float64")
+
+    dec = s.str.extract(_KOORD_DESIMAL)
+    ok_dec = dec[0].notna() & ~kosong
+    lat[ok_dec] = dec.loc[ok_dec, 0].astype(float)
+    lon[ok_dec] = dec.loc[ok_dec, 1].astype(float)
+
+    sisa = ~ok_dec & ~kosong
+    ok_dms = pd.Series(False, index=series.index)
+    if sisa.any():
+        dms = s[sisa].str.extract(_KOORD_DMS)
+        ok = dms[0].notna()
+        if ok.any():
+            dms = dms[ok]
+            a = _dms_ke_desimal(dms[0], dms[1], dms[2])
+            b = _dms_ke_desimal(dms[4], dms[5], dms[6])
+            # Hemisfer menentukan mana lintang/bujur — urutan terbalik ikut tertangani
+            a_lintang = dms[3].isin(list(_HEMI_LINTANG))
+            b_bujur   = dms[7].isin(list(_HEMI_BUJUR))
+            tanda = {**_HEMI_LINTANG, **_HEMI_BUJUR}
+            a = a * dms[3].map(tanda)
+            b = b * dms[7].map(tanda)
+            pasangan = a_lintang == b_bujur
+            lat[dms.index[pasangan]] = a.where(a_lintang, b)[pasangan]
+            lon[dms.index[pasangan]] = b.where(a_lintang, a)[pasangan]
+            ok_dms[dms.index[pasangan]] = True
+
+    lat, lon, status = validasi_koordinat(lat, lon)
+    status[kosong] = KOORD_KOSONG
+    status[~kosong & ~ok_dec & ~ok_dms] = KOORD_FORMAT
+    return pd.DataFrame({"Latitude": lat, "Longitude": lon}), status
+
+def ringkas_status_koordinat(status):
+    """Hitung koordinat ditolak per alasan → dict {alasan: jumlah} (tanpa 'ok')."""
+    vc = pd.Series(status).value_counts()
+    return {k: int(v) for k, v in vc.items() if k not in KOORD_DITERIMA}
@@ -0,0 +1,21 @@
+"""
+Modul entri proses worker ingesti (forkserver/spawn).
+
+Server forkserver memuat modul ini lebih dulu (set_forkserver_preload);
+tugas di sini fungsi level modul, di-pickle per referensi, jadi worker
+tidak butuh apa pun dari skrip __main__ induk. Skrip yang tidak aman
+dijalankan ulang — aplikasi Streamlit — menetapkan `__spec__` ke entri
+paket (pangkalan.__main__), yang oleh multiprocessing tidak dieksekusi
+ulang di worker.
+"""
+from io import BytesIO
+
+from .ingest import read_workbook
+
+
+def buka_sumber(source):
+    """bytes → BytesIO; path/file-like diteruskan apa adanya."""
+    return BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+
+def tugas_berkas(source):
+    return read_workbook(buka_sumber(source))
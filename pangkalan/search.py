@@ -0,0 +1,115 @@
+"""Indeks trigram atas nilai unik sebuah kolom (Kota, Kecamatan, ...) untuk pencarian teks."""
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+# Ambang kemiripan untuk pencarian toleran salah ketik:
+# porsi trigram query yang juga ada di nama kandidat.
+FUZZY_MIN = 0.5
+FUZZY_RELATIF = 0.85
+
+
+def normalisasi_teks(values):
+    return pd.Series(values).astype(str).str.strip().str.lower()
+
+def _trigram(s, pad=False):
+    if pad:
+        s = f"  {s} "
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+
+@dataclass
+class HasilCari:
+    """Nama unik yang cocok dengan query (id ke NgramIndex.names)."""
+    ids:   np.ndarray
+    fuzzy: bool = False                      # True = tidak ada yang persis, pakai nama mirip
+    names: list = field(default_factory=list)
+
+
+class NgramIndex:
+    """
+    Trigram → id nama unik, plus kode per baris ke nama unik tersebut.
+    Biaya pencarian bergantung pada jumlah nama unik, bukan jumlah baris.
+    """
+
+    def __init__(self, values):
+        values = pd.Series(values)
+        norm = normalisasi_teks(values).where(values.notna())
+        codes, uniques = pd.factorize(norm)
+        self.codes = np.asarray(codes)
+        self.keys  = [str(u) for u in uniques]              # nama ter-normalisasi
+        # Nama tampilan = ejaan pertama yang muncul di data
+        valid = self.codes >= 0
+        _, first = np.unique(self.codes[valid], return_index=True)
+        raw = values.astype(str).str.strip().to_numpy()
+        self.names  = [raw[i] for i in np.flatnonzero(valid)[first]]
+        self.counts = np.bincount(self.codes[valid], minlength=len(self.keys))
+
+        grams = defaultdict(list)
+        padded = defaultdict(list)
+        for i, key in enumerate(self.keys):
+            for g in _trigram(key):
+                grams[g].append(i)
+            for g in _trigram(key, pad=True):
+                padded[g].append(i)
+        self._grams  = {g: np.asarray(ids) for g, ids in grams.items()}
+        self._padded = {g: np.asarray(ids) for g, ids in padded.items()}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _substring(self, q):
+        if len(q) < 3:
+            cand = range(len(self.keys))
+        else:
+            # Kandidat = irisan posting list semua trigram query, lalu verifikasi
+            posting = [self._grams.get(g) for g in _trigram(q)]
+            if any(p is None for p in posting):
+                return np.array([], dtype=int)
+            cand = posting[0]
+            for p in posting[1:]:
+                cand = np.intersect1d(cand, p, assume_unique=True)
+        return np.array([i for i in cand if q in self.keys[i]], dtype=int)
+
+    def _fuzzy(self, q):
+        qg = _trigram(q, pad=True)
+        posting = [self._padded[g] for g in qg if g in self._padded]
+        if not qg or not posting:
+            return np.array([], dtype=int)
+        shared = np.bincount(np.concatenate(posting), minlength=len(self.keys))
+        score = shared / len(qg)
+        # Hanya nama yang hampir sebaik kandidat terbaik (hindari bagian umum seperti 'kabupaten')
+        ids = np.flatnonzero(score >= max(FUZZY_MIN, FUZZY_RELATIF * score.max()))
+        return ids[np.argsort(-score[ids], kind="stable")]
+
+    def cari(self, query, fuzzy=True):
+        """Cari nama unik yang mengandung query; jika kosong dan fuzzy=True, pakai nama mirip."""
+        q = str(query).strip().lower()
+        if not q:
+            return HasilCari(ids=np.arange(len(self.keys)))
+        ids = self._substring(q)
+        is_fuzzy = False
+        if not len(ids) and fuzzy:
+            ids, is_fuzzy = self._fuzzy(q), True
+        return HasilCari(ids=ids, fuzzy=is_fuzzy, names=[self.names[i] for i in ids])
+
+    def row_mask(self, hasil):
+        """Mask boolean per baris dari hasil pencarian."""
+        return np.isin(self.codes, hasil.ids)
+
+    def saran(self, query, k=6):
+        """
+        Saran autocomplete: nama berawalan query lebih dulu, lalu yang
+        mengandung query, lalu nama mirip — masing-masing urut jumlah data.
+        """
+        q = str(query).strip().lower()
+        if not q:
+            return []
+        hasil = self.cari(q)
+        ids = hasil.ids
+        if not hasil.fuzzy and len(ids):
+            prefix = np.array([self.keys[i].startswith(q) for i in ids])
+            ids = ids[np.lexsort((-self.counts[ids], ~prefix))]
+        return [self.names[i] for i in ids[:k]]
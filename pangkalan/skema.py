@@ -0,0 +1,88 @@
+"""
+Tahap skema: dtype ringkas untuk dataset hasil derivasi — kategori untuk
+kolom berulang, integer nullable untuk tahun, float32 untuk ukuran yang
+presisinya cukup, string arrow untuk teks bebas. Satu dataset dipakai
+banyak sesi reviewer sekaligus, jadi setiap byte per baris terasa.
+"""
+import numpy as np
+import pandas as pd
+
+# Kolom berulang (nilai unik sedikit) → category. Hanya daftar ini: teks bebas
+# yang kebetulan berulang (mis. Alamat) tetap str — category menolak fillna("—").
+KATEGORI = (
+    "Kota", "Kecamatan", "Kelurahan", "Propinsi", "Kompleks",
+    "Jenis_Properti", "Jenis_Data", "Kelas_Bangunan", "Peruntukan", "Kepemilikan", "Penggunaan",
+    "Surveyor", "Reviewer", "Pemberi_Tugas", "Sumber_Data", "Kode_Inspeksi",
+    "Obyek_Terdekat", "_sumber", "_format", "_koord_status", "_berkas",
+)
+# Tahun → integer nullable
+TAHUN = ("Tahun", "Tahun_Bersih")
+# float32 (~7 digit) hanya untuk kolom tampilan/filter. Koordinat, rupiah dan
+# Luas_Tanah tetap float64: ikut aritmetika koreksi, float32 menggeser pembulatan.
+FLOAT32 = ("Luas_Bangunan", "Kondisi_Bangunan", "Jarak_km", "Arah_deg")
+
+
+def _teks(s):
+    return pd.api.types.infer_dtype(s, skipna=True) in ("string", "empty")
+
+def ringkas_tipe(df):
+    """Return salinan df dengan dtype ringkas; nilai tidak berubah (kecuali presisi float32)."""
+    out = {}
+    for col in df.columns:
+        s = df[col]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            out[col] = s
+        elif col in TAHUN:
+            out[col] = pd.to_numeric(s, errors="coerce").round().astype("Int16")
+        elif col in FLOAT32 and pd.api.types.is_numeric_dtype(s):
+            out[col] = s.astype("float32")
+        elif s.dtype == object or pd.api.types.is_string_dtype(s):
+            if not _teks(s):
+                # Mis. label baris acuan (_obyek_ref): angka bulat + kosong → Int64
+                out[col] = s.astype("Int64") if pd.api.types.infer_dtype(s, skipna=True) == "integer" else s
+            elif col in KATEGORI:
+                out[col] = s.astype("category")
+            else:
+                out[col] = s.astype("str")
+        else:
+            out[col] = s
+    return pd.DataFrame(out, index=df.index)
+
+def laporan_memori(sebelum, sesudah):
+    """
+    Memori per kolom (byte, deep) sebelum & sesudah tahap skema, urut
+    penghematan terbesar; baris "TOTAL" di akhir.
+    """
+    a = sebelum.memory_usage(deep=True, index=False)
+    b = sesudah.memory_usage(deep=True, index=False).reindex(a.index)
+    rep = pd.DataFrame({
+        "dtype_awal":  sebelum.dtypes.astype(str),
+        "dtype":       sesudah.dtypes.reindex(a.index).astype(str),
+        "byte_awal":   a,
+        "byte":        b,
+    })
+    rep["hemat_%"] = (1 - rep["byte"] / rep["byte_awal"].replace(0, np.nan)) * 100
+    rep = rep.loc[(rep["byte_awal"] - rep["byte"]).sort_values(ascending=False).index]
+    total = pd.DataFrame({"dtype_awal": [""], "dtype": [""], "byte_awal": [a.sum()], "byte": [b.sum()],
+                          "hemat_%": [(1 - b.sum() / a.sum()) * 100 if a.sum() else np.nan]}, index=["TOTAL"])
+    return pd.concat([rep, total])
+
+
+def _bench(path=None):
+    import sys
+
+    from .ingest import read_workbook
+    from .koreksi import siapkan_data
+
+    path = path or (sys.argv[1] if len(sys.argv) > 1 else None)
+    if not path:
+        print("Pemakaian: python -m pangkalan.skema <workbook.xlsx>")
+        return
+    df, _ = siapkan_data(read_workbook(path), ringkas=False)
+    rep = laporan_memori(df, ringkas_tipe(df))
+    with pd.option_context("display.width", 140, "display.max_rows", 200):
+        print(rep.to_string(float_format=lambda x: f"{x:.1f}"))
+
+
+if __name__ == "__main__":
+    _bench()
@@ -0,0 +1,281 @@
+"""Indeks spasial data pembanding, pencarian pembanding terdekat & permukaan harga (IDW)."""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+R_BUMI_KM = 6371.0
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    R = R_BUMI_KM
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    dphi = np.radians(lat2 - lat1)
+    dlam = np.radians(lon2 - lon1)
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlam / 2) ** 2
+    return R * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+def bearing_deg(lat1, lon1, lat2, lon2):
+    """Arah awal (derajat dari utara, 0–360) dari titik 1 ke titik 2."""
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    dlam = np.radians(lon2 - lon1)
+    y = np.sin(dlam) * np.cos(phi2)
+    x = np.cos(phi1) * np.sin(phi2) - np.sin(phi1) * np.cos(phi2) * np.cos(dlam)
+    return np.degrees(np.arctan2(y, x)) % 360
+
+def jarak_ke_obyek(df, is_obyek):
+    """
+    Tahap jarak: untuk tiap baris pembanding, jarak & arah dari Obyek
+    Penilaian terdekat (mendukung beberapa obyek sekaligus, lewat KD-tree).
+    Return DataFrame berindeks sama dengan df: Jarak_km, Arah_deg,
+    Obyek_Terdekat (Nomor obyek) dan _obyek_ref (label baris obyek).
+    Baris obyek sendiri dan baris tanpa koordinat bernilai kosong.
+    """
+    is_obyek = np.asarray(is_obyek, dtype=bool)
+    lat = pd.to_numeric(df["Latitude"], errors="coerce").to_numpy(dtype="float64") if "Latitude" in df.columns else np.full(len(df), np.nan)
+    lon = pd.to_numeric(df["Longitude"], errors="coerce").to_numpy(dtype="float64") if "Longitude" in df.columns else np.full(len(df), np.nan)
+    ada = np.isfinite(lat) & np.isfinite(lon)
+    subj = np.flatnonzero(is_obyek & ada)
+    comp = np.flatnonzero(~is_obyek & ada)
+
+    jarak = np.full(len(df), np.nan)
+    arah  = np.full(len(df), np.nan)
+    ref   = np.full(len(df), -1)
+    if len(subj) and len(comp):
+        # KD-tree atas obyek (bukan matriks obyek × pembanding): memori O(n + m).
+        # Koordinat obyek kembar → yang pertama, sama seperti argmin.
+        xyz, pertama = np.unique(_xyz(lat[subj], lon[subj]), axis=0, return_index=True)
+        _, i = cKDTree(xyz).query(_xyz(lat[comp], lon[comp]), k=1)
+        best = subj[pertama[i]]
+        jarak[comp] = haversine_km(lat[best], lon[best], lat[comp], lon[comp])
+        arah[comp]  = bearing_deg(lat[best], lon[best], lat[comp], lon[comp])
+        ref[comp]   = best
+
+    has_ref = ref >= 0
+    nomor = df["Nomor"].astype(str).str.strip().to_numpy() if "Nomor" in df.columns else np.full(len(df), "", dtype=object)
+    out = pd.DataFrame({"Jarak_km": jarak, "Arah_deg": arah}, index=df.index)
+    out["Obyek_Terdekat"] = pd.Series(np.where(has_ref, nomor[np.maximum(ref, 0)], None), index=df.index, dtype=object)
+    out["_obyek_ref"] = pd.Series(np.where(has_ref, df.index.to_numpy()[np.maximum(ref, 0)], None), index=df.index, dtype=object)
+    return out
+
+
+
+# ─── Grid heatmap harga ──────────────────────────────────────────────────────
+KM_PER_DERAJAT = 111.32
+GRID_SEL_TARGET = 120          # sel otomatis ≈ bentang data / target
+GRID_SEL_MIN_KM = 0.05
+BOBOT_MIN = 0.15
+
+def ukuran_sel_otomatis(lat, lon):
+    """Ukuran sel (km) dari bentang data — kira-kira GRID_SEL_TARGET sel per sisi."""
+    lat, lon = np.asarray(lat, dtype="float64"), np.asarray(lon, dtype="float64")
+    if not len(lat):
+        return 1.0
+    coslat = np.cos(np.radians(np.mean(lat)))
+    bentang = max(np.ptp(lat), np.ptp(lon) * coslat) * KM_PER_DERAJAT
+    return max(bentang / GRID_SEL_TARGET, GRID_SEL_MIN_KM)
+
+def grid_harga(lat, lon, harga, sel_km=None, q=(0.05, 0.95)):
+    """
+    Agregasi titik ke grid lat/lon berukuran ≈ sel_km (tanpa loop per titik):
+    median harga/m² dan jumlah titik per sel. Bobot = median (skala log)
+    dinormalisasi ke BOBOT_MIN–1 di antara kuantil `q` median sel, jadi satu
+    pencilan tidak mendominasi. Return DataFrame satu baris per sel:
+    Latitude, Longitude (pusat sel), Harga_Median, Jumlah, Bobot.
+    """
+    lat = np.asarray(lat, dtype="float64")
+    lon = np.asarray(lon, dtype="float64")
+    harga = np.asarray(harga, dtype="float64")
+    ok = np.isfinite(lat) & np.isfinite(lon) & np.isfinite(harga) & (harga > 0)
+    lat, lon, harga = lat[ok], lon[ok], harga[ok]
+    kolom = ["Latitude", "Longitude", "Harga_Median", "Jumlah", "Bobot"]
+    if not len(lat):
+        return pd.DataFrame(columns=kolom)
+
+    sel_km = sel_km or ukuran_sel_otomatis(lat, lon)
+    dlat = sel_km / KM_PER_DERAJAT
+    dlon = dlat / max(np.cos(np.radians(np.mean(lat))), 1e-6)
+    lat0, lon0 = lat.min(), lon.min()
+    iy = np.floor((lat - lat0) / dlat).astype("int64")
+    ix = np.floor((lon - lon0) / dlon).astype("int64")
+    lebar = ix.max() + 1
+    kunci = iy * lebar + ix
+
+    agg = pd.DataFrame({"k": kunci, "h": harga}).groupby("k", sort=False)["h"].agg(["median", "size"])
+    k = agg.index.to_numpy()
+    iy, ix = np.divmod(k, lebar)
+    med = agg["median"].to_numpy()
+
+    lg = np.log(med)
+    lo, hi = np.quantile(lg, q) if len(lg) > 1 else (lg[0] - 1, lg[0])
+    bobot = np.clip((lg - lo) / (hi - lo), 0.0, 1.0) if hi > lo else np.ones_like(lg)
+    bobot = BOBOT_MIN + (1 - BOBOT_MIN) * bobot    # sel termurah tetap terlihat
+    return pd.DataFrame({
+        "Latitude":     lat0 + (iy + 0.5) * dlat,
+        "Longitude":    lon0 + (ix + 0.5) * dlon,
+        "Harga_Median": med,
+        "Jumlah":       agg["size"].to_numpy(),
+        "Bobot":        bobot,
+    })
+
+
+def _xyz(lat, lon):
+    """Lat/lon (derajat) → vektor satuan 3D; jarak Euclid = tali busur great-circle."""
+    phi, lam = np.radians(lat), np.radians(lon)
+    return np.column_stack([np.cos(phi) * np.cos(lam), np.cos(phi) * np.sin(lam), np.sin(phi)])
+
+def _km_ke_tali(km):
+    return 2 * np.sin(np.asarray(km, dtype=float) / (2 * R_BUMI_KM))
+
+
+class SpatialIndex:
+    """
+    KD-tree atas koordinat (vektor satuan 3D) — jarak tali sebanding
+    monoton dengan jarak haversine, jadi tetangga terdekat & radius eksak.
+    `labels` = label index DataFrame asal untuk tiap titik.
+    """
+
+    def __init__(self, lat, lon, labels):
+        lat = np.asarray(lat, dtype="float64")
+        lon = np.asarray(lon, dtype="float64")
+        ok = np.isfinite(lat) & np.isfinite(lon)
+        self.lat, self.lon = lat[ok], lon[ok]
+        self.labels = np.asarray(labels)[ok]
+        self.tree = cKDTree(_xyz(self.lat, self.lon)) if ok.any() else None
+
+    @classmethod
+    def from_frame(cls, df, mask=None):
+        """Bangun dari kolom Latitude/Longitude; `mask` membatasi baris yang diindeks."""
+        if mask is not None:
+            df = df[np.asarray(mask, dtype=bool)]
+        return cls(pd.to_numeric(df["Latitude"], errors="coerce"),
+                   pd.to_numeric(df["Longitude"], errors="coerce"),
+                   df.index)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def nearest(self, lat, lon, k=5, radius_km=None, allowed=None):
+        """
+        k titik terdekat dari (lat, lon), opsional dalam radius km dan hanya
+        label yang lolos `allowed` (kumpulan/array label). Return DataFrame
+        berindeks label asal dengan kolom Jarak_km, urut terdekat.
+        """
+        empty = pd.DataFrame({"Jarak_km": pd.Series(dtype="float64")})
+        if self.tree is None or k <= 0 or not (np.isfinite(lat) and np.isfinite(lon)):
+            return empty
+        p = _xyz(np.array([lat]), np.array([lon]))[0]
+        ok = None if allowed is None else np.isin(self.labels, np.asarray(list(allowed)))
+
+        if radius_km:
+            pos = np.asarray(self.tree.query_ball_point(p, _km_ke_tali(radius_km)), dtype=int)
+            if ok is not None:
+                pos = pos[ok[pos]]
+        else:
+            # Ambil kandidat bertahap sampai k titik lolos filter (atau data habis)
+            n, fetch = len(self.labels), k
+            while True:
+                _, pos = self.tree.query(p, k=min(fetch, n))
+                pos = np.atleast_1d(pos)
+                hit = pos if ok is None else pos[ok[pos]]
+                if len(hit) >= k or fetch >= n:
+                    pos = hit
+                    break
+                fetch *= 4
+        if not len(pos):
+            return empty
+        dist = haversine_km(lat, lon, self.lat[pos], self.lon[pos])
+        order = np.argsort(dist, kind="stable")[:k]
+        return pd.DataFrame({"Jarak_km": dist[order]}, index=self.labels[pos][order])
+
+
+def pembanding_terdekat(sidx, df, subject, k=5, radius_km=None, jenis=None, min_tahun=None, kandidat=None):
+    """
+    Pembanding terdekat untuk satu Obyek Penilaian (Series baris obyek).
+    Filter opsional: Jenis_Properti sama (`jenis`), Tahun_Bersih ≥ `min_tahun`,
+    dan hanya label di `kandidat` (mis. hasil filter sidebar).
+    """
+    ok = pd.Series(True, index=df.index)
+    if kandidat is not None:
+        ok &= df.index.isin(kandidat)
+    if jenis is not None and "Jenis_Properti" in df.columns:
+        ok &= df["Jenis_Properti"].astype(str).str.strip().str.lower() == str(jenis).strip().lower()
+    if min_tahun is not None and "Tahun_Bersih" in df.columns:
+        ok &= df["Tahun_Bersih"] >= min_tahun
+    lat = pd.to_numeric(pd.Series([subject.get("Latitude")]), errors="coerce").iloc[0]
+    lon = pd.to_numeric(pd.Series([subject.get("Longitude")]), errors="coerce").iloc[0]
+    return sidx.nearest(lat, lon, k=k, radius_km=radius_km, allowed=df.index[ok])
+
+
+# ─── Permukaan harga (IDW) ───────────────────────────────────────────────────
+PERMUKAAN_GRID = 120
+IDW_K = 8
+IDW_PANGKAT = 2.0
+IDW_MIN_KM = 0.001             # titik tepat di pusat sel → nilai titik itu sendiri
+
+@dataclass
+class PermukaanHarga:
+    """Grid hasil interpolasi; baris 0 = paling utara (urutan gambar ImageOverlay)."""
+    lat:     np.ndarray        # (n,) pusat sel, utara → selatan
+    lon:     np.ndarray        # (n,) pusat sel, barat → timur
+    nilai:   np.ndarray        # (n, n) Rp/m², NaN = di luar jangkauan data
+    n_titik: int
+
+    @property
+    def bounds(self):
+        """[[selatan, barat], [utara, timur]] tepi luar grid."""
+        dlat = abs(self.lat[0] - self.lat[-1]) / max(len(self.lat) - 1, 1) / 2
+        dlon = abs(self.lon[-1] - self.lon[0]) / max(len(self.lon) - 1, 1) / 2
+        return [[float(self.lat[-1] - dlat), float(self.lon[0] - dlon)],
+                [float(self.lat[0] + dlat), float(self.lon[-1] + dlon)]]
+
+    def nilai_di(self, lat, lon):
+        """Nilai sel yang memuat (lat, lon); NaN di luar grid."""
+        (s, w), (n, e) = self.bounds
+        if not (s <= lat <= n and w <= lon <= e):
+            return np.nan
+        i = int(np.abs(self.lat - lat).argmin())
+        j = int(np.abs(self.lon - lon).argmin())
+        return float(self.nilai[i, j])
+
+
+def bounds_sekitar(lat, lon, radius_km):
+    """Kotak ±radius_km di sekitar satu titik: [[selatan, barat], [utara, timur]]."""
+    dlat = radius_km / KM_PER_DERAJAT
+    dlon = dlat / max(np.cos(np.radians(lat)), 1e-6)
+    return [[lat - dlat, lon - dlon], [lat + dlat, lon + dlon]]
+
+def permukaan_idw(lat, lon, harga, bounds, n=PERMUKAAN_GRID, k=IDW_K, pangkat=IDW_PANGKAT, maks_km=None):
+    """
+    Interpolasi harga/m² ke grid n×n di dalam `bounds` dengan inverse-distance
+    weighting: tiap sel memakai k pembanding terdekat (KD-tree SpatialIndex,
+    satu query untuk seluruh grid). Sel tanpa pembanding dalam `maks_km`
+    bernilai NaN. Harga sebaiknya sudah disesuaikan waktu.
+    """
+    harga = np.asarray(harga, dtype="float64")
+    ok = np.isfinite(harga) & (harga > 0)
+    harga = harga[ok]
+    sidx = SpatialIndex(np.asarray(lat, dtype="float64")[ok], np.asarray(lon, dtype="float64")[ok],
+                        np.arange(len(harga)))
+    (s, w), (u, e) = bounds
+    glat = np.linspace(u, s, n)
+    glon = np.linspace(w, e, n)
+    nilai = np.full((n, n), np.nan)
+    if sidx.tree is None:
+        return PermukaanHarga(glat, glon, nilai, 0)
+
+    mlat, mlon = np.meshgrid(glat, glon, indexing="ij")
+    kk = min(k, len(sidx))
+    batas = _km_ke_tali(maks_km) if maks_km else np.inf
+    tali, pos = sidx.tree.query(_xyz(mlat.ravel(), mlon.ravel()), k=kk, distance_upper_bound=batas)
+    tali, pos = tali.reshape(n * n, kk), pos.reshape(n * n, kk)
+
+    ada = np.isfinite(tali)                                   # tetangga di luar batas → inf
+    km = 2 * R_BUMI_KM * np.arcsin(np.clip(np.where(ada, tali, 0) / 2, 0, 1))
+    bobot = np.where(ada, 1.0 / np.maximum(km, IDW_MIN_KM) ** pangkat, 0.0)
+    v = np.append(harga[sidx.labels], 0.0)[pos]               # pos == len → baris pengisi
+    total = bobot.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        nilai = np.where(total > 0, (bobot * v).sum(axis=1) / total, np.nan).reshape(n, n)
+    return PermukaanHarga(glat, glon, nilai, len(sidx))
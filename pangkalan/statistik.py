@@ -0,0 +1,53 @@
+"""Regresi linear sederhana (OLS bentuk tertutup, NumPy) untuk garis tren dashboard."""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class GarisOLS:
+    """y = intersep + kemiringan · x, dengan R² dan rentang x data."""
+    kemiringan: float
+    intersep:   float
+    r2:         float
+    n:          int
+    x_min:      float
+    x_max:      float
+
+    def prediksi(self, x):
+        return self.intersep + self.kemiringan * np.asarray(x, dtype="float64")
+
+
+def fit_ols(x, y):
+    """OLS satu variabel dari momen data; None jika < 2 titik atau x konstan."""
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    ok = np.isfinite(x) & np.isfinite(y)
+    x, y = x[ok], y[ok]
+    if len(x) < 2:
+        return None
+    dx, dy = x - x.mean(), y - y.mean()
+    sxx = dx @ dx
+    if sxx <= 0:
+        return None
+    b = (dx @ dy) / sxx
+    a = y.mean() - b * x.mean()
+    syy = dy @ dy
+    sse = syy - b * (dx @ dy)
+    r2 = 1 - sse / syy if syy > 0 else 1.0
+    return GarisOLS(float(b), float(a), float(r2), len(x), float(x.min()), float(x.max()))
+
+def fit_ols_per_grup(x, y, grup):
+    """
+    fit_ols per nilai `grup` (urut nama grup). Return DataFrame satu baris per
+    grup yang bisa di-fit: Grup, Kemiringan, Intersep, R2, n, x_min, x_max.
+    """
+    data = pd.DataFrame({"x": np.asarray(x, dtype="float64"), "y": np.asarray(y, dtype="float64"),
+                         "g": pd.Series(grup).astype(str).to_numpy()})
+    rows = []
+    for g, sub in data.groupby("g", sort=True):
+        f = fit_ols(sub["x"].to_numpy(), sub["y"].to_numpy())
+        if f is not None:
+            rows.append((g, f.kemiringan, f.intersep, f.r2, f.n, f.x_min, f.x_max))
+    return pd.DataFrame(rows, columns=["Grup", "Kemiringan", "Intersep", "R2", "n", "x_min", "x_max"])
@@ -0,0 +1,274 @@
+"""Penyimpanan persisten (Parquet) untuk dataset hasil ingesti workbook."""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from functools import reduce
+from io import BytesIO
+
+import pandas as pd
+
+from .gabung import ganti_per_kunci, ringkas_tambahan, susun_rekaman, tandai_rekaman
+from .ingest import WorkbookBundle, read_workbook
+from .paralel import read_workbooks
+
+DEFAULT_STORE_DIR = os.environ.get(
+    "PANGKALAN_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "pangkalan_data"),
+)
+
+_TABLES = ("data", "bangunan", "btb")
+STORE_TIMING_KEY = "(buka dari store)"
+GABUNG_TIMING_KEY = "(gabung workbook)"
+NAMA_GABUNGAN = "Pangkalan Data Gabungan"
+# Versi format Parquet tersimpan — naikkan setiap parsing (ingest/parsing)
+# atau tipe kolom tersimpan berubah. Dataset versi lain diingesti ulang saat
+# workbook-nya diunggah lagi; meta tanpa versi = format awal (1).
+VERSI_FORMAT = 2
+
+
+def content_hash(data):
+    """SHA-256 dari isi file (bytes) — kunci dataset di store."""
+    return hashlib.sha256(data).hexdigest()
+
+def _arrow_safe(df):
+    """
+    Kolom object hasil transpose sering campur tipe (angka, teks, tanggal)
+    dan ditolak Parquet. Kolom seperti itu disimpan sebagai teks; nilai
+    kosong tetap NaN agar pengecekan pd.isna di UI tidak berubah.
+    """
+    import pyarrow as pa
+
+    out = df.copy()
+    out.columns = [str(c) for c in out.columns]
+    for col in out.columns:
+        s = out[col]
+        if s.dtype != object:
+            continue
+        try:
+            pa.array(s, from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError, ValueError):
+            out[col] = s.where(s.isna(), s.astype(str))
+    return out
+
+def _tulis(folder, tables, meta):
+    """Tulis tabel Parquet + meta.json ke `folder` secara atomik (folder sementara lalu rename)."""
+    root = os.path.dirname(folder)
+    os.makedirs(root, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=f".{os.path.basename(folder)[:12]}-", dir=root)
+    try:
+        for tbl, df in tables.items():
+            _arrow_safe(df).to_parquet(os.path.join(tmp, f"{tbl}.parquet"), index=False)
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as fh:
+            json.dump(meta, fh, ensure_ascii=False, indent=1)
+        if os.path.isdir(folder):
+            shutil.rmtree(folder)
+        os.replace(tmp, folder)
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+
+class DatasetStore:
+    """
+    Satu folder per dataset (nama folder = hash isi workbook):
+    `data.parquet`, `bangunan.parquet`, `btb.parquet` dan `meta.json`.
+    """
+
+    def __init__(self, root=DEFAULT_STORE_DIR):
+        self.root = root
+
+    def _dir(self, key):
+        return os.path.join(self.root, key)
+
+    def has(self, key):
+        return os.path.isfile(os.path.join(self._dir(key), "meta.json"))
+
+    def save(self, key, bundle, name="", **meta_tambahan):
+        """Simpan bundle secara atomik (tulis ke folder sementara lalu rename)."""
+        meta = {
+            "key":         key,
+            "versi":       VERSI_FORMAT,
+            "name":        name,
+            "ingested_at": datetime.now().isoformat(timespec="seconds"),
+            "fmt":         bundle.fmt,
+            "sheet_names": list(bundle.sheet_names),
+            "n_rows":      int(len(bundle.data)),
+            "timings":     bundle.timings,
+            **meta_tambahan,
+        }
+        _tulis(self._dir(key), {tbl: getattr(bundle, tbl) for tbl in _TABLES}, meta)
+        return meta
+
+    def terkini(self, key):
+        """Dataset ada dan ditulis dengan VERSI_FORMAT saat ini."""
+        try:
+            return self.has(key) and self.meta(key).get("versi", 1) == VERSI_FORMAT
+        except (OSError, ValueError):
+            return False
+
+    def meta(self, key):
+        with open(os.path.join(self._dir(key), "meta.json"), encoding="utf-8") as fh:
+            return json.load(fh)
+
+    def load(self, key):
+        """Buka dataset tersimpan → WorkbookBundle (tanpa parsing xlsx)."""
+        meta = self.meta(key)
+        t = time.perf_counter()
+        if meta.get("partisi"):
+            tables = self._susun_gabungan(meta)
+        else:
+            tables = {
+                tbl: pd.read_parquet(os.path.join(self._dir(key), f"{tbl}.parquet"))
+                for tbl in _TABLES
+            }
+        return WorkbookBundle(
+            data=tables["data"],
+            bangunan=tables["bangunan"],
+            btb=tables["btb"],
+            fmt=meta.get("fmt", ""),
+            sheet_names=meta.get("sheet_names", []),
+            # Waktu parsing saat ingesti awal + waktu buka dari store
+            timings={**meta.get("timings", {}),
+                     STORE_TIMING_KEY: {"baca_s": time.perf_counter() - t, "olah_s": 0.0}},
+            origin="store",
+        )
+
+    def list(self):
+        """Katalog dataset tersimpan (format terkini), terbaru di atas."""
+        return [m for m in self._metas() if m.get("versi", 1) == VERSI_FORMAT]
+
+    def _metas(self):
+        """Meta semua dataset tersimpan, termasuk format lama."""
+        if not os.path.isdir(self.root):
+            return []
+        metas = []
+        for key in os.listdir(self.root):
+            if key.startswith(".") or not self.has(key):
+                continue
+            try:
+                metas.append(self.meta(key))
+            except (OSError, ValueError):
+                continue
+        return sorted(metas, key=lambda m: m.get("ingested_at", ""), reverse=True)
+
+    def ingest(self, data, name=""):
+        """
+        Ingesti bytes workbook sekali saja: jika hash sudah ada di store
+        (dengan VERSI_FORMAT sama), parsing dilewati. Return key dataset.
+        """
+        key = content_hash(data)
+        if not self.terkini(key):
+            self.save(key, read_workbook(BytesIO(data)), name=name)
+        return key
+
+    def ingest_banyak(self, datas, names=None, progres=None, pool=None, workers=None):
+        """
+        Seperti ingest untuk banyak workbook (bytes) sekaligus: yang belum
+        ada di store di-parse paralel (paralel.read_workbooks), urutan key
+        mengikuti `datas`. Return list key dataset.
+        """
+        names = list(names) if names is not None else [""] * len(datas)
+        keys = [content_hash(d) for d in datas]
+        baru = {k: i for i, k in enumerate(keys) if not self.terkini(k)}
+        if baru:
+            bundles = read_workbooks([datas[i] for i in baru.values()], workers=workers,
+                                     progres=progres, pool=pool)
+            for (k, i), b in zip(baru.items(), bundles):
+                self.save(k, b, name=names[i])
+        return keys
+
+    # ── Pangkalan gabungan (banyak workbook) ──────────────────────────────
+    def gabungan(self, nama=NAMA_GABUNGAN):
+        """Meta versi terbaru pangkalan gabungan `nama`, atau None."""
+        return next((m for m in self.list() if m.get("gabungan") == nama), None)
+
+    def _dir_partisi(self, nama, key=""):
+        """Folder partisi pangkalan gabungan `nama` (satu subfolder per workbook sumber)."""
+        return os.path.join(self.root, ".gabungan", content_hash(nama.encode())[:16], key)
+
+    def _baca_partisi(self, nama, sumber, tbl, columns=None):
+        return [pd.read_parquet(os.path.join(self._dir_partisi(nama, s["key"]), f"{tbl}.parquet"), columns=columns)
+                for s in sumber]
+
+    def _susun_gabungan(self, meta):
+        """Tabel pangkalan gabungan dari partisinya (urut waktu digabung)."""
+        nama, sumber = meta["gabungan"], meta["sumber"]
+        return {
+            "data":     susun_rekaman(self._baca_partisi(nama, sumber, "data")),
+            "bangunan": reduce(lambda a, b: ganti_per_kunci(a, b, "Kode_Inspeksi"),
+                               self._baca_partisi(nama, sumber, "bangunan"), None),
+            # BTB tetap per workbook sumber (_berkas) — lihat koreksi_btb
+            "btb":      pd.concat(self._baca_partisi(nama, sumber, "btb"), ignore_index=True),
+        }
+
+    def gabung(self, keys, nama=NAMA_GABUNGAN):
+        """
+        Tambahkan dataset hasil ingest (`keys`) ke pangkalan gabungan `nama`.
+        Workbook yang sudah pernah digabung dilewati. Tiap workbook baru
+        ditulis sekali sebagai partisinya sendiri (tabelnya dibaca dari
+        Parquet, tanpa parsing ulang); partisi lama tidak ditulis ulang —
+        deduplikasi rekaman terjadi saat dibaca (susun_rekaman). Versi meta
+        gabungan sebelumnya diganti. Return (key_gabungan, ringkasan
+        {"workbook", "baru", "berubah", "duplikat"}).
+
+        Gabungan format lama dibangun ulang dari sumbernya yang sudah
+        terkini; sumber lain ikut lagi saat workbook-nya diunggah ulang.
+        """
+        meta = self.gabungan(nama)
+        if meta and not meta.get("partisi"):
+            meta = None                      # tata letak lama (satu Parquet utuh) → bangun ulang
+        usang = None if meta else next((m for m in self._metas() if m.get("gabungan") == nama), None)
+        if usang:
+            keys = [s["key"] for s in usang.get("sumber", []) if self.terkini(s["key"])] + list(keys)
+        sumber = list(meta["sumber"]) if meta else []
+        baru = [k for k in dict.fromkeys(keys) if k not in {s["key"] for s in sumber}]
+        ringkas = {"workbook": len(baru), "baru": 0, "berubah": 0, "duplikat": 0}
+        if not baru:
+            return (meta["key"] if meta else None), ringkas
+
+        t = time.perf_counter()
+        # Cukup kunci & sidik rekaman lama untuk ringkasan — tabel lengkap tidak dibaca
+        kolom = ["_kunci", "_sidik"]
+        lama = susun_rekaman(self._baca_partisi(nama, sumber, "data", columns=kolom)) if sumber else None
+        t_baca = time.perf_counter() - t
+        fmt, sheet_names = (meta["fmt"], list(meta["sheet_names"])) if meta else ("", [])
+        n_rows = meta["n_rows"] if meta else 0
+        for k in baru:
+            b, name = self.load(k), self.meta(k).get("name", "")
+            berkas = name or k[:10]
+            data = tandai_rekaman(b.data.assign(_berkas=berkas))
+            _tulis(self._dir_partisi(nama, k),
+                   {"data": data, "bangunan": b.bangunan, "btb": b.btb.assign(_berkas=berkas)},
+                   {"key": k, "versi": VERSI_FORMAT, "name": name})
+            r = ringkas_tambahan(lama, data)
+            lama = susun_rekaman([x for x in (lama, data[kolom]) if x is not None])
+            n_rows = len(lama)
+            fmt = fmt or b.fmt
+            sheet_names += [sh for sh in b.sheet_names if sh not in sheet_names]
+            sumber.append({"key": k, "name": name})
+            for x in ("baru", "berubah", "duplikat"):
+                ringkas[x] += r[x]
+
+        key = content_hash("\n".join([nama] + [s["key"] for s in sumber]).encode())
+        _tulis(self._dir(key), {}, {
+            "key":         key,
+            "versi":       VERSI_FORMAT,
+            "name":        nama,
+            "ingested_at": datetime.now().isoformat(timespec="seconds"),
+            "fmt":         fmt,
+            "sheet_names": sheet_names,
+            "n_rows":      n_rows,
+            "timings":     {GABUNG_TIMING_KEY: {"baca_s": t_baca, "olah_s": time.perf_counter() - t - t_baca}},
+            "gabungan":    nama,
+            "partisi":     True,
+            "sumber":      sumber,
+            "ringkasan":   ringkas,
+        })
+        for m in (meta, usang):
+            if m and m["key"] != key:
+                shutil.rmtree(self._dir(m["key"]), ignore_errors=True)
+        return key, ringkas
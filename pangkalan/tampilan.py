@@ -0,0 +1,380 @@
+"""
+Template HTML panel detail & label peta. Fragmen template dikompilasi sekali
+saat import; gaya ditulis sebagai kelas CSS dalam satu stylesheet per
+dokumen, bukan inline per sel.
+"""
+import html
+import json
+import re
+
+import numpy as np
+import pandas as pd
+
+_KOSONG = ("", "#", "nan", "None", "-")
+
+
+# ─── Helper format ────────────────────────────────────────────────────────────
+def generate_streetview_url(lat, lon):
+    return f"https://www.google.com/maps/@?api=1&map_action=pano&viewpoint={lat},{lon}&heading=0&pitch=0&fov=75"
+
+def gdrive_file_id(url):
+    """Ekstrak file ID dari berbagai format URL Google Drive."""
+    if not url or str(url).strip() in _KOSONG:
+        return None
+    url = str(url).strip()
+    patterns = [
+        r"drive\.google\.com/file/d/([a-zA-Z0-9_-]+)",
+        r"drive\.google\.com/open\?id=([a-zA-Z0-9_-]+)",
+        r"drive\.google\.com/uc\?(?:[^&]*&)*id=([a-zA-Z0-9_-]+)",
+        r"[?&]id=([a-zA-Z0-9_-]+)",
+    ]
+    for pat in patterns:
+        m = re.search(pat, url)
+        if m:
+            return m.group(1)
+    return None
+
+def gdrive_thumbnail(url, width=300):
+    """
+    Coba beberapa format URL thumbnail Google Drive.
+    Kembalikan daftar URL (diurutkan dari paling reliable).
+    """
+    fid = gdrive_file_id(url)
+    if not fid:
+        return None, None
+    # lh3 = CDN langsung, tidak perlu redirect auth (lebih andal di iframe)
+    lh3  = f"https://lh3.googleusercontent.com/d/{fid}=w{width}"
+    # thumbnail = API resmi Google Drive (backup)
+    thumb = f"https://drive.google.com/thumbnail?id={fid}&sz=w{width}"
+    return lh3, thumb
+
+def format_currency(value):
+    try:
+        return f"Rp {float(value):,.0f}".replace(",", ".")
+    except Exception:
+        return "N/A"
+
+def safe_get(row, col, default="-"):
+    val = getattr(row, col, default)
+    return default if pd.isna(val) else val
+
+def _esc(x):
+    return html.escape(str(x))
+
+def _v(x):
+    s = str(x) if x is not None else ""
+    return s if s not in ("-", "", "None", "nan") else "—"
+
+
+# ─── Stylesheet ───────────────────────────────────────────────────────────────
+DETAIL_CSS = """
+.pd-panel{height:620px;overflow-y:auto;padding:0 5px 8px 0;font-family:-apple-system,'Segoe UI',sans-serif;scrollbar-width:thin;scrollbar-color:#ddd transparent}
+.pd-head{padding:4px 8px;margin-bottom:4px;border-radius:0 4px 4px 0}
+.pd-head b{font-size:12px}
+.pd-head.obyek{background:#fdecea;border-left:3px solid #c0392b}
+.pd-head.obyek b{color:#c0392b}
+.pd-head.data{background:#eafaf1;border-left:3px solid #27ae60;display:flex;align-items:center;gap:5px}
+.pd-head.data b{color:#1a7a4a}
+.pd-badge{color:white;border-radius:6px;padding:1px 5px;font-size:9px}
+.pd-thn{color:#bbb;font-size:10px;margin-left:auto}
+.pd-car{position:relative;margin-bottom:4px;border-radius:5px;overflow:hidden;background:#111}
+.pd-car img{width:100%;height:auto;display:block}
+.pd-car-bar{position:absolute;bottom:0;left:0;right:0;background:linear-gradient(transparent,rgba(0,0,0,0.6));padding:5px 8px;display:flex;align-items:center;gap:6px}
+.pd-car button{background:rgba(255,255,255,0.2);border:1px solid rgba(255,255,255,0.4);color:white;font-size:18px;line-height:1;width:28px;height:28px;border-radius:4px;cursor:pointer;flex-shrink:0}
+.pd-car-lbl{color:white;font-size:10px;font-weight:600;flex:1;text-align:center}
+.pd-car-lnk{color:rgba(255,255,255,0.8);font-size:9px;text-decoration:none;white-space:nowrap;flex-shrink:0}
+.pd-links{display:flex;gap:8px;margin:2px 0 4px;flex-wrap:wrap;border-bottom:1px solid #efefef;padding-bottom:3px}
+.pd-links a{color:#2980b9;text-decoration:none;font-size:10px}
+.pd-links span{color:#bbb;font-size:9px}
+.pd-harga{display:flex;gap:4px;margin:3px 0}
+.pd-harga>div{flex:1;padding:3px 6px;border-radius:0 3px 3px 0}
+.pd-harga .tot{background:#f0fdf4;border-left:2px solid #27ae60}
+.pd-harga .m2{background:#eff6ff;border-left:2px solid #2980b9}
+.pd-harga .k{font-size:8px;color:#999;text-transform:uppercase;letter-spacing:.4px}
+.pd-harga .v{font-size:11px;font-weight:700}
+.pd-harga .tot .v{color:#1a7a4a}
+.pd-harga .m2 .v{color:#1a4a7a}
+.pd-sh{background:#f0faf5;color:#1a7a4a;font-size:8.5px;font-weight:700;text-transform:uppercase;letter-spacing:.5px;padding:2px 5px;border-radius:2px;margin:5px 0 1px}
+.pd-r1{display:flex;border-bottom:1px solid #f5f5f5;padding:1.5px 0}
+.pd-r1 .l{color:#bbb;font-size:9.5px;min-width:82px;flex-shrink:0}
+.pd-r2{display:grid;grid-template-columns:1fr 1fr;gap:0 3px;border-bottom:1px solid #f5f5f5;padding:1.5px 0}
+.pd-r2 .l{display:block;color:#bbb;font-size:9px}
+.pd-r1 .v,.pd-r2 .v{color:#1a1a1a;font-size:10.5px;font-weight:500}
+"""
+
+MAP_CSS = """
+.pd-lbl-harga{font-size:10px;color:#154360;font-weight:600;background:rgba(255,255,255,0.42);padding:1px 4px;border-radius:3px;white-space:nowrap;border:1px solid rgba(100,100,100,0.25);pointer-events:none;backdrop-filter:blur(2px);line-height:1.3}
+.pd-lbl-harga.merah{color:#922b21}
+.pd-lbl-harga span{font-size:9px;opacity:0.85}
+.pd-lbl-jarak{font-size:10px;font-weight:bold;color:#c0392b;background:rgba(255,255,255,0.9);padding:2px 6px;border-radius:10px;border:1px solid #e74c3c;white-space:nowrap;pointer-events:none;box-shadow:1px 1px 3px rgba(0,0,0,0.2)}
+.pd-lbl-obyek{font-size:11px;font-weight:bold;color:#c0392b;background:rgba(255,255,255,0.45);padding:2px 6px;border-radius:4px;white-space:nowrap;border:1px solid rgba(192,57,43,0.5);pointer-events:none;backdrop-filter:blur(2px);margin-top:2px}
+.pd-pin-obyek{position:relative;width:38px;height:50px}
+.pd-pin-obyek div{width:38px;height:38px;background:#c0392b;border-radius:50% 50% 50% 0;transform:rotate(-45deg);border:3px solid white;box-shadow:0 3px 8px rgba(0,0,0,0.5)}
+.pd-pin-obyek span{position:absolute;top:4px;left:6px;font-size:18px;line-height:1}
+.legend-box{position:fixed;bottom:30px;left:30px;z-index:1000;background:white;padding:10px 14px;border-radius:8px;border:2px solid #ccc;font-size:12px;font-family:sans-serif;box-shadow:2px 2px 6px rgba(0,0,0,0.2)}
+"""
+
+
+# ─── Template ─────────────────────────────────────────────────────────────────
+# Fragmen dikompilasi sekali sebagai str.format terikat; nilai data di-escape.
+# (Jinja2 diukur ~3× lebih lambat per baris karena overhead macro.)
+_R1 = '<div class="pd-r1"><span class="l">{}</span><span class="v">{}</span></div>'.format
+_R2 = ('<div class="pd-r2"><div><span class="l">{}</span><span class="v">{}</span></div>'
+       '<div><span class="l">{}</span><span class="v">{}</span></div></div>').format
+_SH = '<div class="pd-sh">{} {}</div>'.format
+
+_HEAD_OBYEK = '<div class="pd-head obyek"><b>🏠 Obyek Penilaian</b></div>'
+_HEAD_DATA  = ('<div class="pd-head data"><b>Data {}</b><span class="pd-badge" style="background:{}">{}</span>'
+               '<span class="pd-thn">{}</span></div>').format
+_CAROUSEL = """
+<div class="pd-car">
+  <img id="simg" src="{s}" referrerpolicy="no-referrer" onerror="this.src='{f}';this.onerror=null;">
+  <div class="pd-car-bar">
+    <button id="btnP">&#8249;</button>
+    <span id="slbl" class="pd-car-lbl">Depan 1/{n}</span>
+    <button id="btnN">&#8250;</button>
+    <a id="slnk" class="pd-car-lnk" href="{h}" target="_blank">↗ buka</a>
+  </div>
+</div>
+<script>
+(function(){{
+  var D={data}, i=0;
+  function go(n){{
+    i=(n+D.length)%D.length;
+    var el=document.getElementById('simg');
+    el.src=D[i].s;
+    el.onerror=function(){{el.src=D[i].f;el.onerror=null;}};
+    document.getElementById('slbl').textContent=D[i].l+' '+(i+1)+'/'+D.length;
+    document.getElementById('slnk').href=D[i].h;
+  }}
+  document.getElementById('btnP').addEventListener('click',function(){{go(i-1);}});
+  document.getElementById('btnN').addEventListener('click',function(){{go(i+1);}});
+}})();
+</script>""".format
+_LINKS = ('<div class="pd-links"><a href="{}" target="_blank">🔍 Street View ↗</a>'
+          '<span>{}</span></div>').format
+_HARGA = ('<div class="pd-harga"><div class="tot"><div class="k">Harga Total</div><div class="v">{}</div></div>'
+          '<div class="m2"><div class="k">Harga/m²</div><div class="v">{}</div></div></div>').format
+
+_LABEL_HARGA = '<div class="pd-lbl-harga{}">{}/m²<br><span>#{}</span></div>'.format
+_LABEL_JARAK = '<div class="pd-lbl-jarak">📏 {}</div>'.format
+
+# Id baris disisipkan tersembunyi di tooltip marker; streamlit-folium mengembalikan
+# teks tooltip (textContent) marker yang diklik → baris ditemukan persis, O(1).
+_ID_MARKER = '<span style="display:none">[pd-id:{}]</span>'.format
+_ID_RE = re.compile(r"\[pd-id:(-?\d+)\]")
+
+LABEL_OBYEK = '<div class="pd-lbl-obyek">🏠 Obyek</div>'
+PIN_OBYEK   = '<div class="pd-pin-obyek"><div></div><span>🏠</span></div>'
+
+
+# ─── Warna marker per tahun data ─────────────────────────────────────────────
+YEAR_COLORS = {
+    "gte_2025": "green",
+    "gte_2024": "blue",
+    "gte_2023": "orange",
+    "lt_2023":  "red",
+    "subject":  "purple",
+}
+
+def get_color_by_year(year):
+    try:
+        y = int(year)
+        if y >= 2025:
+            return YEAR_COLORS["gte_2025"]
+        if y >= 2024:
+            return YEAR_COLORS["gte_2024"]
+        if y >= 2023:
+            return YEAR_COLORS["gte_2023"]
+        return YEAR_COLORS["lt_2023"]
+    except Exception:
+        return "gray"
+
+def warna_tahun_series(tahun):
+    """get_color_by_year per kolom sekaligus (NaN/NA/bukan angka → gray)."""
+    tahun = pd.Series(tahun)
+    # Tahun_Bersih Int16: pd.NA bukan bool — np.select butuh array bool murni
+    y = pd.to_numeric(tahun, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    return pd.Series(np.select(
+        [y >= 2025, y >= 2024, y >= 2023, y < 2023],
+        [YEAR_COLORS["gte_2025"], YEAR_COLORS["gte_2024"], YEAR_COLORS["gte_2023"], YEAR_COLORS["lt_2023"]],
+        default="gray",
+    ), index=tahun.index)
+
+
+# Skala warna permukaan harga (murah → mahal)
+WARNA_PERMUKAAN = ("#ffffb2", "#fecc5c", "#fd8d3c", "#f03b20", "#bd0026")
+
+def warnai_grid(nilai, vmin, vmax, warna=WARNA_PERMUKAAN, alpha=0.6):
+    """Grid nilai → citra RGBA uint8 (n, m, 4) untuk ImageOverlay; sel NaN transparan."""
+    rgb = np.array([[int(c[i:i + 2], 16) for i in (1, 3, 5)] for c in warna], dtype="float64")
+    t = np.clip((nilai - vmin) / (vmax - vmin), 0, 1) if vmax > vmin else np.zeros_like(nilai)
+    t = np.nan_to_num(t)
+    titik = np.linspace(0, 1, len(warna))
+    img = np.empty(nilai.shape + (4,), dtype=np.uint8)
+    for c in range(3):
+        img[..., c] = np.interp(t, titik, rgb[:, c])
+    img[..., 3] = np.where(np.isnan(nilai), 0, round(alpha * 255))
+    return img
+
+
+# ─── Render ───────────────────────────────────────────────────────────────────
+def label_harga(harga_fmt, nomor, merah=False):
+    return _LABEL_HARGA(" merah" if merah else "", _esc(harga_fmt), _esc(nomor))
+
+def label_jarak(jarak_label):
+    return _LABEL_JARAK(_esc(jarak_label))
+
+def tooltip_dengan_id(text, row_id):
+    """Teks tooltip marker + id baris tersembunyi."""
+    return _esc(text) + _ID_MARKER(int(row_id))
+
+def id_dari_tooltip(tooltip):
+    """Id baris dari teks tooltip hasil klik (None jika tidak ada)."""
+    m = _ID_RE.search(str(tooltip or ""))
+    return int(m.group(1)) if m else None
+
+def _baris(r):
+    if len(r) == 2:
+        return _R1(_esc(r[0]), _esc(_v(r[1])))
+    return _R2(_esc(r[0]), _esc(_v(r[1])), _esc(r[2]), _esc(_v(r[3])))
+
+class _Baris(dict):
+    """Baris sebagai dict dengan akses atribut (getattr pada Series pandas mahal per kolom)."""
+    __slots__ = ()
+
+    def __getattr__(self, col):
+        try:
+            return self[col]
+        except KeyError:
+            raise AttributeError(col) from None
+
+def render_detail(row, df_bangunan):
+    """HTML panel detail (foto carousel, harga, lokasi, fisik) untuk satu baris data."""
+    if isinstance(row, pd.Series):
+        row = _Baris(zip(row.index.tolist(), row.tolist()))
+    nomor  = str(safe_get(row, "Nomor")).strip()
+    is_s   = "obyek" in nomor.lower()
+    tahun  = row.get("Tahun_Bersih")
+    ada_thn = tahun is not None and not pd.isna(tahun) and bool(tahun)   # pd.NA: cek isna dulu
+
+    # ── Kumpulkan semua foto ──────────────────────────────────
+    kolom_foto = [("Foto", "Depan"), ("Foto_Jalan", "Jalan")]
+    if is_s:
+        kolom_foto += [("Foto_Dalam", "Dalam"), ("Foto_Samping_Kanan", "Kanan"),
+                       ("Foto_Samping_Kiri", "Kiri"), ("Gambar_Situasi", "Situasi")]
+    fotos = []
+    for col, lb in kolom_foto:
+        u_raw = str(safe_get(row, col, ""))
+        if u_raw not in _KOSONG:
+            lh, th = gdrive_thumbnail(u_raw, width=600)
+            if lh:
+                fotos.append({"s": lh, "f": th, "h": u_raw, "l": lb})
+
+    def _luas(col):
+        v = row.get(col)
+        if v is None or (isinstance(v, float) and pd.isna(v)): return "—"
+        try: return f"{float(v):,.0f} m²".replace(",", ".")
+        except: return str(v)
+
+    # ── Isi seksi: (ikon, judul, [(label, nilai) | (l1, v1, l2, v2)]) ──
+    if is_s:
+        info = ("📋", "Identitas", [
+            ("Pemilik", safe_get(row, "Pemilik"), "Jenis", safe_get(row, "Jenis_Properti")),
+            ("Kode Inspeksi", safe_get(row, "Kode_Inspeksi"), "Tgl Inspeksi", safe_get(row, "Tanggal_Inspeksi")),
+            ("Reviewer", safe_get(row, "Reviewer"), "Pemberi Tugas", safe_get(row, "Pemberi_Tugas")),
+        ])
+    else:
+        info = ("📋", "Properti", [
+            ("Jenis", safe_get(row, "Jenis_Properti"), "Tahun", int(tahun) if ada_thn else "—"),
+        ])
+    lokasi = ("📍", "Lokasi", [
+        ("Alamat", safe_get(row, "Alamat")),
+        ("Kompleks", safe_get(row, "Kompleks")),
+        ("Kelurahan", safe_get(row, "Kelurahan"), "Kecamatan", safe_get(row, "Kecamatan")),
+        ("Kota", safe_get(row, "Kota"), "Propinsi", safe_get(row, "Propinsi")),
+    ])
+
+    fisik = []
+    bgn_rows = None
+    if is_s:
+        # Tentukan apakah ada data bangunan dari sheet terpisah
+        kode_ins = safe_get(row, "Kode_Inspeksi")
+        if (not df_bangunan.empty and kode_ins and kode_ins != "—"
+                and "Kode_Inspeksi" in df_bangunan.columns):
+            bgn_rows = df_bangunan[df_bangunan["Kode_Inspeksi"] == kode_ins]
+    if bgn_rows is not None and not bgn_rows.empty:
+        # Ada data dari Data Bangunan — tampilkan Luas Tanah saja di baris pertama
+        fisik.append(("Luas Tanah", _luas("Luas_Tanah")))
+        for _, br in bgn_rows.iterrows():
+            jenis_bgn = str(br.get("Jenis_Bangunan", "")) if pd.notna(br.get("Jenis_Bangunan")) else "—"
+            luas_bgn  = br.get("Luas_Bangunan")
+            fisik.append(("Jenis Bangunan", jenis_bgn, "Luas Bangunan",
+                          f"{luas_bgn:,.0f} m²" if pd.notna(luas_bgn) else "—"))
+    else:
+        fisik.append(("Luas Tanah", _luas("Luas_Tanah"), "Luas Bangunan", _luas("Luas_Bangunan")))
+    if not is_s:
+        fisik.append(("Kondisi Bgn", safe_get(row, "Kondisi_Bangunan"), "Kelas Bgn", safe_get(row, "Kelas_Bangunan")))
+    fisik.append(("Peruntukan", safe_get(row, "Peruntukan"), "Kepemilikan", safe_get(row, "Kepemilikan")))
+
+    sections = [info, lokasi, ("📐", "Fisik", fisik)]
+    if not is_s:
+        sections.append(("📞", "Kontak", [("Nama", safe_get(row, "Kontak"), "Telp", safe_get(row, "Telp"))]))
+
+    P = [f"<style>{DETAIL_CSS}</style>", '<div class="pd-panel">']
+    if is_s:
+        P.append(_HEAD_OBYEK)
+    else:
+        jenis = safe_get(row, "Jenis_Data")
+        badge = "#e67e22" if "penawaran" in str(jenis).lower() else "#2980b9"
+        P.append(_HEAD_DATA(_esc(nomor), badge, _esc(jenis), f"· {int(tahun)}" if ada_thn else ""))
+    if fotos:
+        f0 = fotos[0]
+        P.append(_CAROUSEL(s=_esc(f0["s"]), f=_esc(f0["f"]), h=_esc(f0["h"]), n=len(fotos),
+                           data=json.dumps(fotos).replace("</", "<\\/")))
+    sv = generate_streetview_url(row.get("Latitude"), row.get("Longitude"))
+    P.append(_LINKS(_esc(sv), f" | {len(fotos)} foto — geser ‹ ›" if fotos else ""))
+    if not is_s:
+        ht = row.get("Harga_Total")
+        P.append(_HARGA(format_currency(ht) if ht and not pd.isna(ht) else "—",
+                        format_currency(row.get("Harga_Tanah"))))
+    for icon, title, rows in sections:
+        P.append(_SH(icon, title))
+        P.extend(_baris(r) for r in rows)
+    P.append("</div>")
+    return "".join(P)
+
+
+# ─── Micro-benchmark: python -m pangkalan.tampilan [workbook.xlsx] ────────────
+def _bench(path=None, ulang=5):
+    import sys
+    import time
+
+    from .ingest import read_workbook
+    from .koreksi import siapkan_data
+
+    path = path or (sys.argv[1] if len(sys.argv) > 1 else None)
+    if not path:
+        print("Pemakaian: python -m pangkalan.tampilan <workbook.xlsx>")
+        return
+    bundle = read_workbook(path)
+    df, _ = siapkan_data(bundle)
+    rows = [df.loc[i] for i in df.index]
+
+    t, size = time.perf_counter(), 0
+    for _ in range(ulang):
+        for r in rows:
+            size += len(render_detail(r, bundle.bangunan))
+    n = ulang * len(rows)
+    print(f"panel detail : {(time.perf_counter() - t) / n * 1e6:7.1f} µs/baris  {size / n:7.0f} byte/baris")
+
+    nilai = [(format_currency(r.get("Harga_Tanah")), safe_get(r, "Nomor")) for r in rows]
+    t, size = time.perf_counter(), 0
+    for _ in range(ulang):
+        for h, nomor in nilai:
+            size += len(label_harga(h, nomor))
+    print(f"label harga  : {(time.perf_counter() - t) / n * 1e6:7.1f} µs/baris  {size / n:7.0f} byte/baris")
+
+
+if __name__ == "__main__":
+    _bench()
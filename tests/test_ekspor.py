@@ -0,0 +1,45 @@
+"""Ekspor Excel: tulis lalu baca kembali harus sama dengan tabel asal."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from pangkalan import ekspor
+from pangkalan.ekspor import EKSPOR_CHUNK, FORMAT_EKSPOR
+
+ENGINE = [pytest.param(ekspor._excel_openpyxl, id="openpyxl"),
+          pytest.param(ekspor._excel_xlsxwriter, id="xlsxwriter",
+                       marks=pytest.mark.skipif(not ekspor.ADA_XLSXWRITER, reason="xlsxwriter tidak terpasang"))]
+
+
+def _tabel(n):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "Nomor":        [str(i) for i in range(n)],
+        "Alamat":       [f"Jl. Contoh No. {i}" if i % 4 else None for i in range(n)],
+        "Tahun_Bersih": pd.array([2020 + i % 5 if i % 3 else None for i in range(n)], dtype="Int16"),
+        "Luas_Tanah":   rng.uniform(60, 5000, n).round(0),
+        "Harga_Tanah":  np.where(np.arange(n) % 5 == 0, np.nan, rng.lognormal(14, 0.6, n).round(0)),
+        "Jarak_km":     rng.uniform(0, 15, n),
+    })
+
+def _baca(path, df):
+    back = pd.read_excel(path, sheet_name="Data Tanah", dtype={"Nomor": str})
+    back["Tahun_Bersih"] = back["Tahun_Bersih"].astype("Int16")
+    return back
+
+
+@pytest.mark.parametrize("tulis", ENGINE)
+@pytest.mark.parametrize("n", [3, EKSPOR_CHUNK + 7])
+def test_round_trip(tmp_path, tulis, n):
+    df = _tabel(n)
+    path = tmp_path / "ekspor.xlsx"
+    with open(path, "wb") as f:
+        tulis(df, f, "Data Tanah", EKSPOR_CHUNK)
+    pd.testing.assert_frame_equal(_baca(path, df), df, check_dtype=False)
+
+def test_round_trip_format_excel(tmp_path):
+    df = _tabel(3)
+    path = tmp_path / "ekspor.xlsx"
+    with open(path, "wb") as f:
+        FORMAT_EKSPOR["Excel"].tulis(df, f)
+    pd.testing.assert_frame_equal(_baca(path, df), df, check_dtype=False)
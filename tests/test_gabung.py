@@ -0,0 +1,57 @@
+"""Penggabungan rekaman lintas workbook (gabung.py)."""
+import numpy as np
+import pandas as pd
+
+from pangkalan.gabung import (
+    hash_rekaman,
+    ringkas_tambahan,
+    susun_rekaman,
+    tandai_rekaman,
+)
+from pangkalan.koreksi import koreksi_btb
+
+
+def test_hash_nan_kanonik():
+    """Harga kosong dengan payload NaN berbeda tetap satu sidik."""
+    nan_lain = np.frombuffer(np.uint64(0x7FF8000000000001).tobytes(), dtype="float64")[0]
+    a = pd.DataFrame({"Nomor": ["1"], "Harga_Tanah": [np.nan]})
+    b = pd.DataFrame({"Nomor": ["1"], "Harga_Tanah": [nan_lain]})
+    assert hash_rekaman(a, ("Nomor", "Harga_Tanah")) == hash_rekaman(b, ("Nomor", "Harga_Tanah"))
+
+def _acuan_berurutan(partisi):
+    """Penggabungan satu per satu seperti dulu: kunci baru ditambah, harga berubah menggantikan."""
+    hasil = {}
+    for p in partisi:
+        for _, r in p.drop_duplicates("_kunci", keep="last").iterrows():
+            if r["_kunci"] in hasil and hasil[r["_kunci"]]["_sidik"] == r["_sidik"]:
+                continue
+            hasil.pop(r["_kunci"], None)
+            hasil[r["_kunci"]] = r
+    return sorted(r["Harga_Tanah"] for r in hasil.values())
+
+def test_susun_rekaman_sama_dengan_berurutan():
+    rng = np.random.default_rng(3)
+    partisi = [tandai_rekaman(pd.DataFrame({"Nomor": rng.integers(0, 40, 60).astype(str),
+                                            "Harga_Tanah": rng.integers(0, 3, 60) * 1000.0 + i}))
+               for i in range(5)]
+    # Harga sama lintas workbook → duplikat, bukan versi baru
+    partisi.append(partisi[0].copy())
+    hasil = susun_rekaman(partisi)
+    assert hasil["_kunci"].is_unique
+    assert sorted(hasil["Harga_Tanah"]) == _acuan_berurutan(partisi)
+
+def test_ringkas_tambahan():
+    lama = tandai_rekaman(pd.DataFrame({"Nomor": ["1", "2"], "Harga_Tanah": [1.0, 2.0]}))
+    baru = tandai_rekaman(pd.DataFrame({"Nomor": ["1", "2", "3", "3"], "Harga_Tanah": [1.0, 5.0, 3.0, 3.0]}))
+    assert ringkas_tambahan(lama, baru) == {"baru": 1, "berubah": 1, "duplikat": 2}
+    assert ringkas_tambahan(None, baru) == {"baru": 3, "berubah": 0, "duplikat": 1}
+
+def test_btb_per_berkas():
+    """Kelas sama di dua workbook: masing-masing memakai biaya BTB workbook-nya sendiri."""
+    data = pd.DataFrame({"_berkas": ["a.xlsx", "b.xlsx"], "Kelas_Bangunan": ["Kelas A", "kelas a"],
+                         "Harga_Total": [1000.0, 1000.0], "Luas_Bangunan": [1.0, 1.0],
+                         "Kondisi_Bangunan": [100.0, 100.0], "Luas_Tanah": [1.0, 1.0]})
+    btb = pd.DataFrame({"_berkas": ["a.xlsx", "b.xlsx"], "Kelas_Bangunan": ["Kelas A", "Kelas A"],
+                        "Biaya_BTB": [100.0, 300.0]})
+    df, _ = koreksi_btb(data, btb)
+    assert df["Harga_Tanah"].tolist() == [900.0, 700.0]
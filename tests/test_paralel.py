@@ -0,0 +1,37 @@
+"""Ingesti paralel: worker tidak menjalankan ulang skrip __main__ induk."""
+import importlib.util
+import sys
+import types
+from io import BytesIO
+
+import pandas as pd
+
+from pangkalan.ingest import read_workbook
+from pangkalan.paralel import pool_ingest, read_workbooks
+
+
+def _xlsx(n):
+    buf = BytesIO()
+    pd.DataFrame({"Nomor": [str(i) for i in range(n)], "Latitude": [0.5] * n,
+                  "Longitude": [123.0] * n}).to_excel(buf, index=False)
+    return buf.getvalue()
+
+
+def test_worker_tanpa_skrip_main(tmp_path, monkeypatch):
+    """Seperti di bawah Streamlit: __main__ = skrip aplikasi yang tidak boleh dijalankan ulang."""
+    skrip = tmp_path / "aplikasi.py"
+    skrip.write_text("raise SystemExit('skrip aplikasi dijalankan ulang di worker')\n")
+    main = types.ModuleType("__main__")
+    main.__file__ = str(skrip)
+    main.__spec__ = importlib.util.find_spec("pangkalan.__main__")
+    monkeypatch.setitem(sys.modules, "__main__", main)
+
+    datas = [_xlsx(3), _xlsx(5)]
+    pool = pool_ingest(2)
+    try:
+        hasil = read_workbooks(datas, pool=pool)
+    finally:
+        pool.shutdown()
+    assert sys.modules["__main__"] is main
+    for d, b in zip(datas, hasil):
+        assert b.data.equals(read_workbook(BytesIO(d)).data)
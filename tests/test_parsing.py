@@ -0,0 +1,51 @@
+"""Parser vektor harus identik dengan parse_indo_number per sel."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from pangkalan.parsing import parse_indo_number, parse_indo_number_series
+
+# Format yang muncul di workbook survei
+KORPUS = [
+    "1.234.567,89", "1.500", "12,5 %", "-", "", " ", "nan", None, np.nan,
+    "1.500.000", "1500000", "1,5", "0,75", "1.5", "1.50", "1.5000", "12.345.678",
+    "Rp 1.000", "1 500 000", "25%", "-1.250", "+3,5", ".5", "1e3", "inf", "abc",
+    "1.234,5.6", "3673526097786028.5", 1500, 1500.5, 1500.125, -2.125, 0.001,
+    1e-05, 3673526097786028.5, 12345678901234.125, 1e16, 2**60, True,
+]
+
+
+def _acuan(values):
+    return np.array([np.nan if (r := parse_indo_number(v)) is None else r for v in values], dtype="float64")
+
+def _sama(values, hasil):
+    np.testing.assert_array_equal(np.asarray(hasil, dtype="float64"), _acuan(values))
+
+
+def test_korpus_object():
+    s = pd.Series(KORPUS, dtype=object)
+    _sama(KORPUS, parse_indo_number_series(s))
+
+@pytest.mark.parametrize("desimal", [None, 0, 1, 2, 3, 4])
+@pytest.mark.parametrize("pangkat", range(-4, 20))
+def test_acak_float(pangkat, desimal):
+    """Kolom float (jalur cepat) dan object campuran pada berbagai besaran."""
+    rng = np.random.default_rng((pangkat + 10) * 10 + (desimal or 0))
+    v = rng.uniform(-1, 1, 500) * 10.0 ** pangkat
+    if desimal is not None:
+        v = np.round(v, desimal)
+    _sama(v, parse_indo_number_series(pd.Series(v)))
+    _sama(v, parse_indo_number_series(pd.Series(v, dtype=object)))
+
+def test_acak_teks():
+    """Teks format Indonesia hasil acak: ribuan titik, desimal koma, persen."""
+    rng = np.random.default_rng(7)
+    nilai = []
+    for x in rng.integers(0, 10**12, 2000):
+        ribuan = f"{x:,}".replace(",", ".")
+        nilai += [ribuan, f"{ribuan},{x % 100:02d}", f"{x % 1000},{x % 10} %", str(x)]
+    _sama(nilai, parse_indo_number_series(pd.Series(nilai)))
+
+def test_kolom_int():
+    v = pd.Series([0, 1500, -3, 10**15], dtype="int64")
+    _sama(v.tolist(), parse_indo_number_series(v))
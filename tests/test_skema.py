@@ -0,0 +1,29 @@
+"""Tahap skema (ringkas_tipe) tidak boleh mengubah perilaku hilir."""
+import pandas as pd
+
+from pangkalan.analisa import grid_awal
+from pangkalan.skema import ringkas_tipe
+
+
+def _pembanding(n=40):
+    # Alamat berulang (sedikit nilai unik) dengan sel kosong — teks bebas, bukan kategori
+    return pd.DataFrame({
+        "Nomor":       [str(i) for i in range(n)],
+        "Alamat":      [None if i % 7 == 0 else f"Jl. Contoh {i % 3}" for i in range(n)],
+        "Kecamatan":   ["Kota Tengah", "Dungingi"] * (n // 2),
+        "Kepemilikan": ["SHM", "HGB"] * (n // 2),
+        "Peruntukan":  ["Perumahan", "Komersial"] * (n // 2),
+        "Tahun":       [2024] * n,
+    })
+
+
+def test_kategori_hanya_kolom_terdaftar():
+    df = ringkas_tipe(_pembanding())
+    assert isinstance(df["Kecamatan"].dtype, pd.CategoricalDtype)
+    assert not isinstance(df["Alamat"].dtype, pd.CategoricalDtype)
+
+def test_grid_awal_setelah_ringkas_tipe():
+    asli, ringkas = _pembanding(), ringkas_tipe(_pembanding())
+    grid = grid_awal(ringkas, 4)
+    assert grid["Alamat"].iloc[0] == "—"
+    pd.testing.assert_frame_equal(grid, grid_awal(asli, 4))
@@ -0,0 +1,39 @@
+"""Tahap jarak (KD-tree) harus sama dengan pencarian brute-force obyek × pembanding."""
+import numpy as np
+import pandas as pd
+
+from pangkalan.spatial import bearing_deg, haversine_km, jarak_ke_obyek
+
+
+def _brute(lat, lon, is_obyek):
+    subj, comp = np.flatnonzero(is_obyek), np.flatnonzero(~is_obyek)
+    d = haversine_km(lat[subj][:, None], lon[subj][:, None], lat[comp][None, :], lon[comp][None, :])
+    best = subj[np.argmin(d, axis=0)]
+    return best, haversine_km(lat[best], lon[best], lat[comp], lon[comp]), bearing_deg(lat[best], lon[best], lat[comp], lon[comp])
+
+
+def test_jarak_ke_obyek_sama_dengan_brute_force():
+    rng = np.random.default_rng(3)
+    n = 3000
+    lat, lon = rng.uniform(-7, 2, n), rng.uniform(105, 125, n)
+    is_obyek = np.zeros(n, dtype=bool)
+    is_obyek[rng.choice(n, 40, replace=False)] = True
+    lat[np.flatnonzero(is_obyek)[1]] = lat[np.flatnonzero(is_obyek)[0]]     # obyek kembar
+    lon[np.flatnonzero(is_obyek)[1]] = lon[np.flatnonzero(is_obyek)[0]]
+    df = pd.DataFrame({"Nomor": [f"Obyek {i}" if o else str(i) for i, o in enumerate(is_obyek)],
+                       "Latitude": lat, "Longitude": lon}, index=np.arange(n) + 100)
+
+    out = jarak_ke_obyek(df, is_obyek)
+    best, jarak, arah = _brute(lat, lon, is_obyek)
+    comp = ~is_obyek
+    np.testing.assert_array_equal(out["_obyek_ref"].to_numpy()[comp].astype(int), df.index.to_numpy()[best])
+    np.testing.assert_allclose(out["Jarak_km"].to_numpy()[comp], jarak)
+    np.testing.assert_allclose(out["Arah_deg"].to_numpy()[comp], arah)
+    assert out["Jarak_km"][is_obyek].isna().all()
+
+def test_jarak_ke_obyek_tanpa_koordinat():
+    df = pd.DataFrame({"Nomor": ["Obyek Penilaian", "1", "2"],
+                       "Latitude": [0.6, np.nan, 0.7], "Longitude": [122.9, 123.0, 123.0]})
+    out = jarak_ke_obyek(df, [True, False, False])
+    assert np.isnan(out["Jarak_km"].iloc[1]) and out["Obyek_Terdekat"].iloc[1] is None
+    assert out["Obyek_Terdekat"].iloc[2] == "Obyek Penilaian"
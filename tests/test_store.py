@@ -0,0 +1,84 @@
+"""Store: dataset format lama diingesti ulang, bukan disajikan apa adanya."""
+import json
+import os
+
+import pandas as pd
+
+from pangkalan import store as store_mod
+from pangkalan.ingest import WorkbookBundle
+from pangkalan.store import NAMA_GABUNGAN, VERSI_FORMAT, DatasetStore, content_hash
+
+
+def _bundle(harga):
+    data = pd.DataFrame({"Nomor": ["1", "2"], "Latitude": [0.6, 0.7], "Longitude": [122.9, 123.0],
+                         "Kode_Inspeksi": ["A", "A"], "Harga_Tanah": [harga, harga * 2]})
+    return WorkbookBundle(data=data, bangunan=pd.DataFrame(), btb=pd.DataFrame(), fmt="multi-sheet")
+
+def _jadikan_usang(store, key):
+    path = os.path.join(store.root, key, "meta.json")
+    with open(path, encoding="utf-8") as fh:
+        meta = json.load(fh)
+    meta.pop("versi")
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(meta, fh)
+
+
+def test_ingest_ulang_format_lama(tmp_path, monkeypatch):
+    parse = []
+    monkeypatch.setattr(store_mod, "read_workbook", lambda f: parse.append(1) or _bundle(1000.0 * len(parse)))
+    store = DatasetStore(str(tmp_path))
+
+    key = store.ingest(b"xlsx", name="a.xlsx")
+    assert key == content_hash(b"xlsx") and store.meta(key)["versi"] == VERSI_FORMAT
+    store.ingest(b"xlsx")
+    assert len(parse) == 1                       # format sama → tanpa parsing
+
+    _jadikan_usang(store, key)
+    assert not store.terkini(key) and store.list() == []
+    store.ingest(b"xlsx")
+    assert len(parse) == 2 and store.terkini(key)
+    assert store.load(key).data["Harga_Tanah"].tolist() == [2000.0, 4000.0]
+
+def test_ingest_banyak_format_lama(tmp_path, monkeypatch):
+    dibaca = []
+    monkeypatch.setattr(store_mod, "read_workbooks",
+                        lambda datas, **kw: dibaca.extend(datas) or [_bundle(1.0) for _ in datas])
+    store = DatasetStore(str(tmp_path))
+    k1, k2 = store.ingest_banyak([b"a", b"b"])
+    assert (k1, k2) == (content_hash(b"a"), content_hash(b"b"))
+    _jadikan_usang(store, k1)
+    store.ingest_banyak([b"a", b"b"])
+    assert dibaca == [b"a", b"b", b"a"]
+
+def test_gabungan_format_lama_dibangun_ulang(tmp_path, monkeypatch):
+    monkeypatch.setattr(store_mod, "read_workbooks", lambda datas, **kw: [_bundle(1.0) for _ in datas])
+    store = DatasetStore(str(tmp_path))
+    keys = store.ingest_banyak([b"a", b"b"])
+    key_gab, _ = store.gabung(keys)
+    _jadikan_usang(store, key_gab)
+    assert store.gabungan() is None
+
+    k3 = store.ingest_banyak([b"c"])
+    key_baru, r = store.gabung(k3)
+    assert r["workbook"] == 3            # dua sumber lama dibangun ulang + satu baru
+    meta = store.gabungan()
+    assert meta["key"] == key_baru and meta["versi"] == VERSI_FORMAT
+    assert [s["key"] for s in meta["sumber"]] == keys + k3
+    assert not store.has(key_gab)
+
+def test_gabung_hanya_menulis_partisi_baru(tmp_path, monkeypatch):
+    monkeypatch.setattr(store_mod, "read_workbooks", lambda datas, **kw: [_bundle(float(len(d))) for d in datas])
+    store = DatasetStore(str(tmp_path))
+    k1 = store.ingest_banyak([b"a"], names=["a.xlsx"])
+    key1, _ = store.gabung(k1)
+    partisi = store._dir_partisi(NAMA_GABUNGAN, k1[0])
+    mtime = os.path.getmtime(os.path.join(partisi, "data.parquet"))
+
+    k2 = store.ingest_banyak([b"bb"], names=["b.xlsx"])
+    key2, r = store.gabung(k2)
+    assert os.path.getmtime(os.path.join(partisi, "data.parquet")) == mtime
+    assert r == {"workbook": 1, "baru": 0, "berubah": 2, "duplikat": 0}
+    assert not store.has(key1)
+    df = store.load(key2).data
+    assert df["Harga_Tanah"].tolist() == [2.0, 4.0] and set(df["_berkas"]) == {"b.xlsx"}
+    assert store.meta(key2)["n_rows"] == 2
@@ -0,0 +1,39 @@
+"""Tahun_Bersih Int16 (tahap skema) menyimpan tahun kosong sebagai pd.NA — bool(pd.NA) error."""
+import pandas as pd
+
+from pangkalan.skema import ringkas_tipe
+from pangkalan.spatial import SpatialIndex, pembanding_terdekat
+from pangkalan.tampilan import YEAR_COLORS, render_detail, warna_tahun_series
+
+
+def _data():
+    df = pd.DataFrame({
+        "Nomor":          ["Obyek Penilaian", "1", "2", "3"],
+        "Jenis_Properti": ["Tanah"] * 4,
+        "Latitude":       [0.60, 0.61, 0.62, 0.63],
+        "Longitude":      [122.90, 122.91, 122.92, 122.93],
+        "Luas_Tanah":     [200.0, 150.0, 300.0, 120.0],
+        "Harga_Tanah":    [None, 1_500_000.0, 1_200_000.0, 900_000.0],
+        "Tahun_Bersih":   [2025, None, 2024, 2021],
+    })
+    df = ringkas_tipe(df)
+    assert df["Tahun_Bersih"].dtype == "Int16" and df["Tahun_Bersih"].iloc[1] is pd.NA
+    return df
+
+
+def test_render_detail_tahun_kosong():
+    df = _data()
+    html = render_detail(df.loc[1], pd.DataFrame())
+    assert "—" in html
+    assert "2024" in render_detail(df.loc[2], pd.DataFrame())
+
+def test_pembanding_terdekat_min_tahun_kosong():
+    df = _data()
+    sidx = SpatialIndex.from_frame(df, mask=df["Nomor"] != "Obyek Penilaian")
+    hasil = pembanding_terdekat(sidx, df, df.loc[0], k=5, min_tahun=2022)
+    assert list(hasil.index) == [2]
+
+def test_warna_tahun_kosong():
+    """Mode peta ringan: warna marker per kolom sekaligus, tahun NA → abu-abu."""
+    warna = warna_tahun_series(_data()["Tahun_Bersih"])
+    assert warna.tolist() == [YEAR_COLORS["gte_2025"], "gray", YEAR_COLORS["gte_2024"], YEAR_COLORS["lt_2023"]]